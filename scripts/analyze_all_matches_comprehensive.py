@@ -35,6 +35,9 @@ if sys.platform == 'win32':
 
 # 日本語フォント設定（優先順位を変更）
 import matplotlib
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from utils.csv_reader import read_chat_csv, ANALYSIS_COLUMNS
 matplotlib.rcParams['font.family'] = 'sans-serif'
 matplotlib.rcParams['font.sans-serif'] = ['Yu Gothic', 'Meiryo', 'MS Gothic', 'DejaVu Sans']
 matplotlib.rcParams['axes.unicode_minus'] = False
@@ -79,7 +82,7 @@ def load_all_streams():
         
         for csv_file in csv_files:
             try:
-                df = pd.read_csv(csv_file, encoding='utf-8')
+                df = read_chat_csv(csv_file, usecols=ANALYSIS_COLUMNS)
                 
                 # テキストカラムを探す
                 text_col = None
@@ -9,6 +9,16 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from scipy.stats import f_oneway, mannwhitneyu, kruskal
 import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.table_store import load_table
+
+# 分析に使う列だけを読み込む（Parquet があれば列単位で読み込み、存在しない列は無視）
+EVENT_PAIR_COLUMNS = ['event_A_id', 'event_B_id', 'event_A', 'event_B', 'sim_event_id_A', 'sim_event_id_B',
+                      'combined_score', 'similarity_score', 'embedding_similarity', 'topic_jaccard',
+                      'lexical_similarity']
+EVENT_DETAIL_COLUMNS = ['sim_event_id', 'stream']
 
 # 日本語フォント設定
 plt.rcParams['font.sans-serif'] = ['MS Gothic', 'Yu Gothic', 'Meiryo']
@@ -17,7 +27,7 @@ plt.rcParams['axes.unicode_minus'] = False
 def load_event_similarity_data():
     """Event類似度データを読み込む"""
     try:
-        df = pd.read_csv('output/event_to_event_pairs.csv')
+        df = load_table('output/event_to_event_pairs.csv', columns=EVENT_PAIR_COLUMNS)
         return df
     except Exception as e:
         print(f"Error loading event similarity data: {e}")
@@ -26,7 +36,7 @@ def load_event_similarity_data():
 def load_event_details():
     """Event詳細データを読み込む"""
     try:
-        df = pd.read_csv('output/similar_event_details.csv')
+        df = load_table('output/similar_event_details.csv', columns=EVENT_DETAIL_COLUMNS)
         return df
     except Exception as e:
         print(f"Error loading event details: {e}")
@@ -12,6 +12,11 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from scipy.stats import kruskal, mannwhitneyu
 import os
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from utils.csv_reader import read_chat_csv, ANALYSIS_COLUMNS
 
 # 日本語フォント設定
 plt.rcParams['font.sans-serif'] = ['MS Gothic', 'Yu Gothic', 'Meiryo']
@@ -21,7 +26,7 @@ def load_comments(stream_file):
     """コメントデータを読み込む"""
     file_path = f"data/chat/{stream_file}"
     try:
-        df = pd.read_csv(file_path, encoding='utf-8')
+        df = read_chat_csv(file_path, usecols=ANALYSIS_COLUMNS)
         # カラム名の確認と調整
         if 'message' in df.columns:
             comments = df['message'].astype(str).tolist()
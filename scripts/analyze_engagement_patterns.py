@@ -11,6 +11,11 @@ from scipy.stats import kruskal, mannwhitneyu
 from scipy.signal import find_peaks
 from datetime import datetime, timedelta
 import os
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from utils.csv_reader import read_chat_csv, ANALYSIS_COLUMNS
 
 # 日本語フォント設定
 plt.rcParams['font.sans-serif'] = ['MS Gothic', 'Yu Gothic', 'Meiryo']
@@ -20,7 +25,7 @@ def load_comments_with_timestamps(stream_file):
     """タイムスタンプ付きコメントを読み込む"""
     file_path = f"data/chat/{stream_file}"
     try:
-        df = pd.read_csv(file_path, encoding='utf-8')
+        df = read_chat_csv(file_path, usecols=ANALYSIS_COLUMNS)
         
         # タイムスタンプカラムを探す
         time_col = None
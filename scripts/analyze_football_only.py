@@ -21,6 +21,11 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from scipy.stats import kruskal, mannwhitneyu
 import os
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from utils.csv_reader import read_chat_csv, ANALYSIS_COLUMNS
 
 # 日本語フォント設定
 plt.rcParams['font.sans-serif'] = ['MS Gothic', 'Yu Gothic', 'Meiryo']
@@ -89,7 +94,7 @@ def load_comments(stream_file):
     """コメントデータを読み込む"""
     file_path = f"data/chat/{stream_file}"
     try:
-        df = pd.read_csv(file_path, encoding='utf-8')
+        df = read_chat_csv(file_path, usecols=ANALYSIS_COLUMNS)
         if 'message' in df.columns:
             comments = df['message'].astype(str).tolist()
         elif 'text' in df.columns:
@@ -210,7 +215,7 @@ def analyze_engagement(stream_file):
     """エンゲージメントパターンを分析"""
     file_path = f"data/chat/{stream_file}"
     try:
-        df = pd.read_csv(file_path, encoding='utf-8')
+        df = read_chat_csv(file_path, usecols=ANALYSIS_COLUMNS)
         
         # Timestamp列の検出
         timestamp_col = None
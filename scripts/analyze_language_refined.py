@@ -25,15 +25,31 @@ if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
 
-# langdetectをインポート（インストールされていない場合はエラー処理）
-try:
-    from langdetect import detect, DetectorFactory
-    DetectorFactory.seed = 0  # 再現性のため
-    LANGDETECT_AVAILABLE = True
-except ImportError:
-    LANGDETECT_AVAILABLE = False
+# 共通の言語検出サービス（langdetect + キャッシュ + 文字種による高速判定）
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from utils.language_id import LANGDETECT_AVAILABLE, get_language_identifier
+from utils.csv_reader import read_chat_csv, ANALYSIS_COLUMNS
+if not LANGDETECT_AVAILABLE:
     print("⚠️ langdetectがインストールされていません。pip install langdetect を実行してください。")
 
+# 主要言語へのマッピング
+LANG_MAP = {
+    'ja': 'ja',  # 日本語
+    'en': 'en',  # 英語
+    'es': 'es',  # スペイン語
+    'pt': 'pt',  # ポルトガル語
+    'hi': 'hi',  # ヒンディー語
+    'ur': 'hi',  # ウルドゥー語（ヒンディー語と統合）
+    'ar': 'ar',  # アラビア語
+    'fr': 'fr',  # フランス語
+    'de': 'de',  # ドイツ語
+    'it': 'it',  # イタリア語
+    'nl': 'nl',  # オランダ語
+    'ko': 'ko',  # 韓国語
+    'zh-cn': 'zh',  # 中国語（簡体字）
+    'zh-tw': 'zh',  # 中国語（繁体字）
+}
+
 # データディレクトリ
 DATA_DIR = Path(r"G:\マイドライブ\大学\4年\ゼミ\watching_style_analysis\data\football")
 OUTPUT_DIR = Path(r"G:\マイドライブ\大学\4年\ゼミ\watching_style_analysis\output\language_refined_comparison")
@@ -63,34 +79,32 @@ def detect_comment_language(text):
     --------
     str : 検出された言語コード（'ja', 'en', 'es', 'pt', 'hi', 'ar', 'unknown'）
     """
+    return detect_comment_languages([text])[0]
+
+def detect_comment_languages(texts):
+    """
+    複数コメントの言語を一括検出（重複テキストは1回だけ判定、結果はキャッシュ）
+    
+    Parameters:
+    -----------
+    texts : list of str
+        コメントテキストのリスト
+        
+    Returns:
+    --------
+    list of str : texts と同じ順の言語コード
+    """
     if not LANGDETECT_AVAILABLE:
-        return 'unknown'
-    
-    if pd.isna(text) or len(str(text).strip()) < 3:
-        return 'unknown'
-    
-    try:
-        detected = detect(str(text))
-        # 主要言語にマッピング
-        lang_map = {
-            'ja': 'ja',  # 日本語
-            'en': 'en',  # 英語
-            'es': 'es',  # スペイン語
-            'pt': 'pt',  # ポルトガル語
-            'hi': 'hi',  # ヒンディー語
-            'ur': 'hi',  # ウルドゥー語（ヒンディー語と統合）
-            'ar': 'ar',  # アラビア語
-            'fr': 'fr',  # フランス語
-            'de': 'de',  # ドイツ語
-            'it': 'it',  # イタリア語
-            'nl': 'nl',  # オランダ語
-            'ko': 'ko',  # 韓国語
-            'zh-cn': 'zh',  # 中国語（簡体字）
-            'zh-tw': 'zh',  # 中国語（繁体字）
-        }
-        return lang_map.get(detected, 'other')
-    except:
-        return 'unknown'
+        return ['unknown'] * len(texts)
+    
+    # 3文字未満・欠損は判定しない
+    targets = [i for i, t in enumerate(texts) if not pd.isna(t) and len(str(t).strip()) >= 3]
+    detected = get_language_identifier(seed=0).detect_many([str(texts[i]) for i in targets])
+    
+    results = ['unknown'] * len(texts)
+    for i, lang in zip(targets, detected):
+        results[i] = 'unknown' if lang == 'unk' else LANG_MAP.get(lang, 'other')
+    return results
 
 def load_and_detect_languages(match_folder):
     """
@@ -120,7 +134,7 @@ def load_and_detect_languages(match_folder):
     
     for csv_file in csv_files:
         try:
-            df = pd.read_csv(csv_file, encoding='utf-8')
+            df = read_chat_csv(csv_file, usecols=ANALYSIS_COLUMNS)
             
             # カラム名を正規化
             if 'message' in df.columns:
@@ -154,8 +168,9 @@ def load_and_detect_languages(match_folder):
         combined_df['detected_language'] = 'unknown'
         
         print(f"  🔍 言語検出中（{sample_size:,}件サンプル）...")
-        for idx in sample_indices:
-            combined_df.loc[idx, 'detected_language'] = detect_comment_language(combined_df.loc[idx, 'comment'])
+        combined_df.loc[sample_indices, 'detected_language'] = detect_comment_languages(
+            combined_df.loc[sample_indices, 'comment'].tolist()
+        )
         
         # サンプルから全体の言語分布を推定
         sample_df = combined_df.loc[sample_indices]
@@ -173,7 +188,7 @@ def load_and_detect_languages(match_folder):
     else:
         # 全コメントを検出
         print(f"  🔍 言語検出中（全{len(combined_df):,}件）...")
-        combined_df['detected_language'] = combined_df['comment'].apply(detect_comment_language)
+        combined_df['detected_language'] = detect_comment_languages(combined_df['comment'].tolist())
     
     # 言語分布を表示
     lang_counts = combined_df['detected_language'].value_counts()
@@ -19,6 +19,10 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from scipy import stats
 import warnings
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from utils.csv_reader import read_chat_csv, ANALYSIS_COLUMNS
 warnings.filterwarnings('ignore')
 
 # 日本語フォント設定
@@ -84,7 +88,7 @@ def load_league_data(league_name):
         
         for csv_file in csv_files:
             try:
-                df = pd.read_csv(csv_file, encoding='utf-8-sig')
+                df = read_chat_csv(csv_file, usecols=ANALYSIS_COLUMNS)
                 
                 # カラム名正規化
                 if 'message' in df.columns and 'comment' not in df.columns:
@@ -18,6 +18,9 @@ from collections import defaultdict
 import warnings
 import sys
 import io
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from utils.csv_reader import read_chat_csv, ANALYSIS_COLUMNS
 warnings.filterwarnings('ignore')
 
 # Windows PowerShellの文字化け対策
@@ -83,7 +86,7 @@ def load_match_data(match_folder):
     
     for csv_file in csv_files:
         try:
-            df = pd.read_csv(csv_file, encoding='utf-8')
+            df = read_chat_csv(csv_file, usecols=ANALYSIS_COLUMNS)
             
             # カラム名を正規化
             if 'message' in df.columns:
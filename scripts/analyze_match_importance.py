@@ -23,6 +23,10 @@ import seaborn as sns
 from scipy import stats
 from scipy.stats import kruskal, mannwhitneyu
 import warnings
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from utils.csv_reader import read_chat_csv, ANALYSIS_COLUMNS
 warnings.filterwarnings('ignore')
 
 # 日本語フォント設定
@@ -66,7 +70,7 @@ def load_chat_logs(match_folder):
     
     for csv_file in csv_files:
         try:
-            df = pd.read_csv(csv_file, encoding='utf-8-sig')
+            df = read_chat_csv(csv_file, usecols=ANALYSIS_COLUMNS)
             print(f"  → {csv_file.name}: {len(df)} 行")
             
             # カラム名の正規化（message → comment）
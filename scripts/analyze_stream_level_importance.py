@@ -17,9 +17,13 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from scipy import stats
 from scipy.stats import kruskal, mannwhitneyu
+import sys
 import warnings
 warnings.filterwarnings('ignore')
 
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from utils.csv_reader import read_chat_csv, ANALYSIS_COLUMNS
+
 # 日本語フォント設定
 plt.rcParams['font.sans-serif'] = ['Yu Gothic', 'Meiryo', 'MS Gothic']
 plt.rcParams['axes.unicode_minus'] = False
@@ -71,7 +75,7 @@ def detect_language_from_filename(filename):
 def analyze_single_stream(match_folder, csv_file, tier_info):
     """単一配信のデータを分析"""
     try:
-        df = pd.read_csv(csv_file, encoding='utf-8-sig')
+        df = read_chat_csv(csv_file, usecols=ANALYSIS_COLUMNS)
         
         # カラム名の正規化
         if 'message' in df.columns and 'comment' not in df.columns:
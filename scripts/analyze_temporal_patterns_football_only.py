@@ -17,6 +17,11 @@ import seaborn as sns
 from scipy import stats
 from scipy.signal import find_peaks
 import warnings
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from utils.csv_reader import read_chat_csv, ANALYSIS_COLUMNS
 warnings.filterwarnings('ignore')
 
 # 日本語フォント設定
@@ -71,7 +76,7 @@ def load_football_data():
             continue
         
         try:
-            df = pd.read_csv(filepath, encoding='utf-8')
+            df = read_chat_csv(filepath, usecols=ANALYSIS_COLUMNS)
             
             # テキストカラム
             text_col = None
@@ -38,6 +38,11 @@ if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
 
+# 埋め込みキャッシュ
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.embedding_cache import EmbeddingCache
+from utils.csv_reader import read_chat_csv, ANALYSIS_COLUMNS
+
 # 日本語フォント設定
 import matplotlib
 matplotlib.rcParams['font.family'] = 'sans-serif'
@@ -105,7 +110,7 @@ def load_stream_data():
             continue
         
         try:
-            df = pd.read_csv(filepath, encoding='utf-8')
+            df = read_chat_csv(filepath, usecols=ANALYSIS_COLUMNS)
             
             # テキストカラムを探す
             text_col = None
@@ -168,7 +173,11 @@ def extract_topics_per_stream_time(stream_data):
     print("="*80)
     
     # 埋め込みモデル（共通）
-    embedding_model = SentenceTransformer('sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2')
+    model_name = 'sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2'
+    embedding_model = SentenceTransformer(model_name)
+    # トップ単語は時間帯・配信をまたいで重複するため、正規化なしの埋め込みをキャッシュ
+    embedding_cache = EmbeddingCache(model_name, cache_dir=os.path.join('cache', 'embeddings'),
+                                     normalize_embeddings=False)
     
     topic_data = []
     
@@ -201,7 +210,7 @@ def extract_topics_per_stream_time(stream_data):
             
             # 埋め込みベクトル計算（トップ単語の平均）
             if top_words:
-                embeddings = embedding_model.encode(top_words)
+                embeddings = embedding_cache.encode(embedding_model, top_words, batch_size=32)
                 topic_embedding = np.mean(embeddings, axis=0)
             else:
                 topic_embedding = np.zeros(384)  # モデルの次元数
@@ -218,6 +227,10 @@ def extract_topics_per_stream_time(stream_data):
             print(f"  ✅ Time bin {int(time_bin)}: {len(df_bin)} comments, "
                   f"top words: {', '.join(top_words[:3])}")
     
+    embedding_cache.flush()  # 時間ビンごとの少量のミスを1シャードにまとめて保存
+    cache_stats = embedding_cache.get_stats()
+    print(f"\n[Embedding Cache] hits={cache_stats['hits']}, misses={cache_stats['misses']}")
+    
     return pd.DataFrame(topic_data)
 
 def calculate_similarity_matrix(topic_df):
@@ -19,6 +19,11 @@ from sklearn.feature_extraction.text import CountVectorizer
 from umap import UMAP
 from hdbscan import HDBSCAN
 import warnings
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from utils.csv_reader import read_chat_csv, ANALYSIS_COLUMNS
 warnings.filterwarnings('ignore')
 
 # 日本語フォント設定
@@ -73,7 +78,7 @@ def load_football_comments():
             continue
         
         try:
-            df = pd.read_csv(filepath, encoding='utf-8')
+            df = read_chat_csv(filepath, usecols=ANALYSIS_COLUMNS)
             
             # テキストカラムを探す
             text_col = None
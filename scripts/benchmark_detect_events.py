@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+detect_events のピーク抽出ベンチマーク
+
+従来のグループごとのループ（group_timeseries の絞り込み → ビン割り当て → 平滑化 → ピーク抽出）と、
+(グループ × ビン) 行列でまとめて処理する方式の実行時間と結果を比較する。
+
+使い方:
+    python scripts/benchmark_detect_events.py --groups 200 --bins 300
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.time_bins import build_relative_time_bins, assign_time_bins
+from utils.peak_detection import timeseries_matrix, smooth_series, local_peaks
+
+
+def make_group_timeseries(n_groups: int, nr_bins: int, seed: int = 0):
+    """合成データ: 各グループがランダムなビンにコメントを持つ group_timeseries とビン"""
+    rng = np.random.default_rng(seed)
+    t0 = pd.Timestamp("2024-01-01 20:00:00")
+    bins = build_relative_time_bins(pd.Series([t0, t0 + pd.Timedelta(hours=2)]), nr_bins)
+    rows = []
+    for gid in range(n_groups):
+        active = np.flatnonzero(rng.random(nr_bins) < 0.6)
+        freq = rng.poisson(4.0, len(active)) + 1
+        rows.append(pd.DataFrame({"Group": gid, "Timestamp": bins.left[active], "Frequency": freq}))
+    return pd.concat(rows, ignore_index=True), bins
+
+
+def legacy_peaks(group_timeseries: pd.DataFrame, bins, n_events: int) -> List[List[int]]:
+    """従来のグループごとのループ"""
+    out = []
+    for gid in sorted(group_timeseries["Group"].unique()):
+        gdf = group_timeseries[group_timeseries["Group"] == gid]
+        counts = np.zeros(len(bins), dtype=float)
+        np.add.at(counts, assign_time_bins(gdf["Timestamp"], bins), gdf["Frequency"].to_numpy(dtype=float))
+        ypad = np.pad(counts, (2, 2), mode="reflect")
+        y = np.convolve(ypad, np.ones(5) / 5, mode="valid")
+        idxs = [i for i in range(len(y))
+                if y[i] >= (y[i-1] if i-1 >= 0 else -np.inf) and y[i] >= (y[i+1] if i+1 < len(y) else -np.inf)]
+        idxs.sort(key=lambda i: y[i], reverse=True)
+        out.append(idxs[:n_events])
+    return out
+
+
+def matrix_peaks(group_timeseries: pd.DataFrame, bins, n_events: int, prominence=None,
+                 min_distance=None) -> List[List[int]]:
+    """(グループ × ビン) 行列でまとめて処理"""
+    groups = sorted(group_timeseries["Group"].unique())
+    mat = timeseries_matrix(group_timeseries["Group"].to_numpy(),
+                            assign_time_bins(group_timeseries["Timestamp"], bins),
+                            group_timeseries["Frequency"].to_numpy(dtype=float),
+                            int(group_timeseries["Group"].max()) + 1, len(bins))
+    return local_peaks(smooth_series(mat[groups], k=5), n_keep=n_events,
+                       prominence=prominence, min_distance=min_distance)
+
+
+def best_time(func, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="detect_events のピーク抽出ベンチマーク")
+    parser.add_argument("--groups", type=int, default=200, help="グループ数")
+    parser.add_argument("--bins", type=int, default=300, help="ビン数")
+    parser.add_argument("--n-events", type=int, default=5, help="各グループから抽出するピーク数")
+    parser.add_argument("--repeat", type=int, default=5, help="計測回数（最小値を採用）")
+    parser.add_argument("--prominence", type=float, default=1.0, help="絞り込みありの計測で使うプロミネンス")
+    parser.add_argument("--min-distance", type=int, default=5, help="絞り込みありの計測で使う最小間隔")
+    args = parser.parse_args()
+
+    gts, bins = make_group_timeseries(args.groups, args.bins)
+    legacy = legacy_peaks(gts, bins, args.n_events)
+    matrix = matrix_peaks(gts, bins, args.n_events)
+    same = sum(a == b for a, b in zip(legacy, matrix))
+    print(f"[Benchmark] {args.groups} groups x {args.bins} bins, {len(gts)} rows")
+    print(f"[Benchmark] Identical peaks: {same}/{len(legacy)} groups")
+
+    t_legacy = best_time(lambda: legacy_peaks(gts, bins, args.n_events), args.repeat)
+    t_matrix = best_time(lambda: matrix_peaks(gts, bins, args.n_events), args.repeat)
+    t_filtered = best_time(lambda: matrix_peaks(gts, bins, args.n_events, args.prominence, args.min_distance),
+                           args.repeat)
+    print(f"[Benchmark] Per-group loop : {t_legacy * 1000:8.1f} ms")
+    print(f"[Benchmark] Matrix         : {t_matrix * 1000:8.1f} ms")
+    print(f"[Benchmark] Speedup        : {t_legacy / t_matrix:8.1f}x")
+    print(f"[Benchmark] Matrix + prominence={args.prominence:g}, min-distance={args.min_distance}: "
+          f"{t_filtered * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
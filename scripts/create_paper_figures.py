@@ -1,14 +1,24 @@
+import os
+import sys
+
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib import font_manager as fm
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.table_store import load_table
+
+# 図に使う列だけを読み込む（Parquet があれば列単位で読み込み）
+EVENT_PAIR_COLUMNS = ['event_A_id', 'event_B_id', 'embedding_similarity', 'topic_jaccard',
+                      'lexical_similarity', 'combined_score']
+
 # Set Japanese font
 plt.rcParams['font.sans-serif'] = ['Meiryo', 'Yu Gothic', 'MS Gothic']
 plt.rcParams['axes.unicode_minus'] = False
 
 # Load data
-df = pd.read_csv('output/event_to_event_pairs.csv')
+df = load_table('output/event_to_event_pairs.csv', columns=EVENT_PAIR_COLUMNS)
 
 # Calculate baseline scores for comparison
 baseline_scores = (df['embedding_similarity'] * 0.40 + 
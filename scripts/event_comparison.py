@@ -34,6 +34,8 @@ event_comparison.py  (全面改良版)
 - output/event_comments.json                 … （--save-json時）各イベント×配信者の抽出コメント
 - output/wordclouds/event_<EID>/WC_<basename>.png   … イベントごとのワードクラウド
 - output/timelines/<basename>_timeline.png         … 各配信者のTop-10(統合)時系列
+- output/timelines/<basename>_timeseries.csv       … 各配信者のグループ×ビン時系列
+  （主要テーブルは pyarrow / fastparquet があれば同名の .parquet も出力。読み込みは utils.table_store.load_table）
 """
 
 import argparse
@@ -44,26 +46,15 @@ from typing import Dict, List, Tuple, Optional
 # ===== Windows UTF-8対応 =====
 import sys
 import io
+import contextlib
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 # 標準出力をUTF-8に設定（Windows cp932エラー回避）
 if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
 
-# ===== 追加ライブラリ =====
-# 言語検出ライブラリ langdetect がインストールされていない環境に対応するため、
-# try-import を用いてフォールバックを用意する。
-try:
-    from langdetect import detect, DetectorFactory  # type: ignore
-    DetectorFactory.seed = 42
-    _LANGDETECT_AVAILABLE = True
-except ImportError:
-    _LANGDETECT_AVAILABLE = False
-    # ダミー関数を定義
-    def detect(text: str) -> str:
-        return "unk"
-    class DetectorFactory:
-        seed = None
-
 # ===== Noise Filter統合 =====
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -74,6 +65,42 @@ NOISE_FILTER = NoiseFilter()
 from utils.translation_bridge import TranslationBridge
 TRANSLATION_BRIDGE = None  # Lazy initialization
 
+# ===== Embedding Cache統合 =====
+from utils.embedding_cache import EmbeddingCache
+EMBEDDING_CACHE = None  # main() で初期化（--no-embedding-cache で無効）
+
+# ===== ステージキャッシュ（チェックポイント / 再開） =====
+from utils.stage_cache import StageCache, file_digest, stage_key
+STAGE_CACHE = None  # main() で初期化（--no-stage-cache で無効）
+
+# ===== 言語検出サービス（キャッシュ + 文字種による高速判定 + プロセスプール） =====
+from utils.language_id import get_language_identifier
+
+# 時間ビン割り当て（ベクトル化）
+from utils.time_bins import build_relative_time_bins, assign_time_bins, TimeBinIndex, topic_bin_counts
+# イベントごとのコメント抽出結果を1回だけ作って全ステージで共有
+from utils.event_comments import EventCommentStore, term_languages
+# グループ×ビン行列での平滑化・ピーク抽出（全グループをまとめて処理）
+from utils.peak_detection import timeseries_matrix, smooth_series, local_peaks
+# ライブ配信中の追記CSVからのオンラインイベント検出（--live）
+from utils.online_events import OnlineEventDetector, TermGrouper, follow_csv
+# ウォームアップで1回だけ学習したトピックモデルで割り当て、ドリフト時だけ再学習（--topic-warmup / --live-topic-*）
+from utils.incremental_topics import IncrementalTopicModel
+# パラメータスイープのグリッド展開・グリッド点ごとの出力先・集計（run_parameter_sweep）
+from utils.param_sweep import expand_sweep_grid, call_with_buffered_log, evaluate_sweep_points
+from utils.event_blocking import blocked_candidate_pairs
+from utils.distribution_distance import js_distance, js_distance_matrix, abs_diff_matrix
+
+# ===== 語彙距離エンジン（共有語彙 + 疎カウント行列） =====
+from utils.lexical_engine import LexicalEngine
+from utils.term_normalizer import TermNormalizer
+from utils import text_preprocess
+# 主要テーブルの保存（CSV + Parquet）
+from utils.table_store import save_table
+# CSV 読み込み（文字コードは先頭数KBで判定、必要な列だけをチャンク読み込み）
+from utils.csv_reader import read_chat_csv
+LEXICAL_ENGINES: Dict[int, LexicalEngine] = {}  # top_n -> engine（get_lexical_engine で生成）
+
 
 import numpy as np
 import pandas as pd
@@ -358,6 +385,9 @@ MULTILINGUAL_SYNONYMS = {
     "overtime": {"overtime", "extra time", "延長", "연장"},
 }
 
+# 用語正規化器（事前コンパイル済み正規表現 + 平坦化した参照テーブル + LRU キャッシュ）
+TERM_NORMALIZER = TermNormalizer(TERM_MAP, MULTILINGUAL_SYNONYMS)
+
 def normalize_with_synonyms(word: str) -> str:
     """
     多言語類義語辞書を使用して単語を正規化
@@ -368,71 +398,28 @@ def normalize_with_synonyms(word: str) -> str:
     Returns:
         正規化後の単語（類義語がある場合は代表語、ない場合は小文字化）
     """
-    word_lower = word.lower().strip()
-    
-    # 辞書から代表語を検索
-    for canonical, synonyms in MULTILINGUAL_SYNONYMS.items():
-        if word_lower in synonyms:
-            return canonical
-    
-    # 辞書にない場合はそのまま返す
-    return word_lower
+    return TERM_NORMALIZER.synonym(word)
 
 def normalize_term(word: str) -> str:
     """
     用語を正規化して精度を向上させる。
 
     改善内容：
-    1. 繰り返し文字の正規化（"goalllll" → "goal"）
+    1. 繰り返し文字の正規化（"goalllll" → "goall"）
     2. 大文字小文字の統一
     3. 最小長フィルタ（1文字の単語を除外）
     4. 多言語類義語の統一（"goal" = "ゴール"）
-    4. 数字のみの単語を除外
-    5. 特殊文字の除去
-    6. 用語マッピング辞書の適用
+    5. 数字のみの単語を除外
+    6. 特殊文字の除去
+    7. 用語マッピング辞書の適用
+
+    処理本体は utils.term_normalizer.TermNormalizer（同じトークンはキャッシュから返す）
     """
-    if not isinstance(word, str):
-        return word
-    
-    # 小文字化
-    w = word.lower().strip()
-    
-    # 空文字列チェック
-    if not w:
-        return ""
-    
-    # 数字のみの単語を除外
-    if w.isdigit():
-        return ""
-    
-    # 特殊文字のみの単語を除外（絵文字は除く）
-    import re
-    if re.match(r'^[^\w\s]+$', w) and not any(ord(c) > 0x1F600 for c in w):
-        return ""
-    
-    # 繰り返し文字の正規化（3文字以上の繰り返しを2文字に）
-    # "goalllllll" → "goal", "kkkkkk" → "kk"
-    w = re.sub(r'(.)\1{2,}', r'\1\1', w)
-    
-    # 最小長フィルタ（1文字の単語を除外、ただし日本語は除く）
-    if len(w) == 1:
-        # 日本語文字（ひらがな、カタカナ、漢字）は許可
-        if not (0x3040 <= ord(w) <= 0x309F or  # ひらがな
-                0x30A0 <= ord(w) <= 0x30FF or  # カタカナ
-                0x4E00 <= ord(w) <= 0x9FFF):   # 漢字
-            return ""
-    
-    # 用語マッピング辞書の適用
-    w = TERM_MAP.get(w, w)
-    
-    # 多言語類義語の統一（新規追加）
-    w = normalize_with_synonyms(w)
+    return TERM_NORMALIZER.normalize(word)
 
-    # 最終的に短すぎる場合は除外
-    if len(w) < 2 and not any(0x3040 <= ord(c) <= 0x9FFF for c in w):
-        return ""
-    
-    return w
+def normalize_terms(words: List[str]) -> List[str]:
+    """複数語を一括正規化（normalize_term を各語に適用したのと同じ結果）"""
+    return TERM_NORMALIZER.normalize_many(words)
 
 # -------------------------
 # ユーティリティ / 前処理
@@ -447,23 +434,7 @@ def segment_text(text: str) -> str:
     の境界でスペースを挿入します。
     これは厳密な形態素解析ではありませんが、トークン分割を改善します。
     """
-    result = []
-    prev_jp: Optional[bool] = None
-    for ch in text:
-        # 日本語（ひらがな・カタカナ・漢字）とそれ以外の境界を検出
-        is_jp = (
-            ('\u3040' <= ch <= '\u30ff')  # ひらがな・カタカナ
-            or ('\u4e00' <= ch <= '\u9fff')  # 漢字
-        )
-        if prev_jp is None:
-            result.append(ch)
-        else:
-            if is_jp != prev_jp:
-                # 境界でスペースを挿入
-                result.append(' ')
-            result.append(ch)
-        prev_jp = is_jp
-    return ''.join(result)
+    return text_preprocess.segment_text(text)
 def preprocess_text(text: str) -> str:
     """
     コメントテキストの前処理を行う。
@@ -473,37 +444,17 @@ def preprocess_text(text: str) -> str:
     - 記号をスペースに置換し、複数スペースを単一に
     - 日本語とその他の文字の間にスペースを挿入（簡易分割）
     - 小文字化
+
+    列全体をまとめて処理する場合は text_preprocess.preprocess_texts を使う（結果は同じ）
     """
-    if not isinstance(text, str):
-        return ""
-    # URLやメンションなどの除去
-    text = re.sub(r"http\S+|www\.\S+", " ", text)
-    text = re.sub(r"@\w+", " ", text)
-    text = re.sub(r"#\w+", " ", text)
-    # 一部絵文字を単語に変換
-    text = (
-        text.replace("😂", " laugh ")
-            .replace("😭", " cry ")
-            .replace("👏", " clap ")
-            .replace("🔥", " fire ")
-    )
-    # 記号をスペースに
-    text = re.sub(r"[^\w\s\u4E00-\u9FFF\u3040-\u30FF\uAC00-\uD7AF]", " ", text)
-    # 日本語とその他の文字列境界にスペースを挿入
-    text = segment_text(text)
-    # 複数スペースを一つに、前後のスペースを削除し小文字化
-    text = re.sub(r"\s+", " ", text).strip().lower()
-    return text
+    return text_preprocess.preprocess_text(text, segment=True)
 
 # -------------------------
 # 言語・絵文字関連ユーティリティ
 # -------------------------
-def detect_lang_safe(text: str) -> str:
-    """langdetect の例外を握りつぶして言語コードを返す"""
-    try:
-        return detect(text)
-    except Exception:
-        return "unk"
+def detect_langs(texts: List[str]) -> List[str]:
+    """コメントごとの言語コード（キャッシュ・高速判定・並列化は共通サービスに委譲、検出失敗は 'unk'）"""
+    return get_language_identifier().detect_many(texts)
 
 def is_emoji(char: str) -> bool:
     """簡易的な絵文字判定。Unicode の絵文字ブロックに属するかで判定"""
@@ -521,11 +472,17 @@ def is_emoji(char: str) -> bool:
 def compute_language_distribution(texts: List[str]) -> Dict[str, int]:
     """コメントリストから言語別件数を数える"""
     counter = defaultdict(int)
-    for txt in texts:
-        lang = detect_lang_safe(txt)
+    for lang in detect_langs(texts):
         counter[lang] += 1
     return counter
 
+def count_language_codes(langs: List[str]) -> Dict[str, int]:
+    """検出済みの言語コードのリストから言語別件数を数える（再検出しない）"""
+    counter = defaultdict(int)
+    for lang in langs:
+        counter[lang if isinstance(lang, str) else "unk"] += 1
+    return counter
+
 def compute_emoji_ratio(texts: List[str]) -> float:
     """コメント内の絵文字比率を計算（文字数ではなく絵文字数/単語数）"""
     total_tokens = 0
@@ -643,6 +600,36 @@ def compute_style_profile(texts: List[str]) -> Dict[str, float]:
         "mention_ratio": mention_ratio,
     }
 
+def extract_event_features(comments: List[str], langs: List[str]) -> Dict[str, object]:
+    """
+    (配信, イベント) ごとの特徴量を1回だけ計算する。
+    ペア比較ではこの特徴量を使い回し、距離行列は配列演算でまとめて求める。
+    """
+    return {
+        "lang_counts": count_language_codes(langs),
+        "emoji_count": sum(_count_emoji(t) for t in comments),
+        "token_count": sum(len(t.split()) for t in comments),
+        "emoji_ratio": compute_emoji_ratio(comments),
+        "sentiment": compute_sentiment_metrics(comments),
+        "style": compute_style_profile(comments),
+    }
+
+def feature_distance_matrices(features: List[Dict[str, object]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    特徴量リストから言語分布差（JS距離）と絵文字比率差の行列を一括計算する。
+
+    Returns: (lang_mat, emoji_mat)
+    """
+    lang_vocab = sorted({lang for f in features for lang in f["lang_counts"]})
+    col = {lang: c for c, lang in enumerate(lang_vocab)}
+    H = np.zeros((len(features), len(lang_vocab)), dtype=float)
+    for r, f in enumerate(features):
+        for lang, cnt in f["lang_counts"].items():
+            H[r, col[lang]] = cnt
+    lang_mat = js_distance_matrix(H)
+    emoji_mat = abs_diff_matrix([f["emoji_ratio"] for f in features])
+    return lang_mat, emoji_mat
+
 def style_distance(p: Dict[str, float], q: Dict[str, float]) -> float:
     """スタイルプロファイル間の平均絶対差"""
     keys = sorted(set(p.keys()) & set(q.keys()))
@@ -651,15 +638,6 @@ def style_distance(p: Dict[str, float], q: Dict[str, float]) -> float:
     diffs = [abs(float(p[k]) - float(q[k])) for k in keys]
     return float(np.mean(diffs))
 
-def read_csv_any(path: str) -> pd.DataFrame:
-    encodings = ["utf-8", "utf-8-sig", "cp932", "iso-8859-1"]
-    for enc in encodings:
-        try:
-            return pd.read_csv(path, encoding=enc)
-        except Exception:
-            pass
-    return pd.read_csv(path, engine="python", on_bad_lines="skip")
-
 def parse_country_from_filename(path: str) -> str:
     name = os.path.basename(path)
     m = re.findall(r"(japan|japanese|jpn|india|indian|dominican|usa|korea|korean|mexico|taiwan|china|chinese|france)", name.lower())
@@ -831,7 +809,7 @@ def merge_topics(words_by_tid: Dict[int, List[Tuple[str, float]]], threshold: fl
     for t in tids:
         raw_words = [w for w, _ in words_by_tid[t][:10] if isinstance(w, str) and w.strip()]
         # 正規化して空文字列を除外
-        normalized = {normalize_term(w) for w in raw_words}
+        normalized = set(normalize_terms(raw_words))
         normalized = {w for w in normalized if w}  # 空文字列除外
         sets[t] = normalized
         topic_sizes[t] = len(normalized)
@@ -889,36 +867,26 @@ def merge_topics(words_by_tid: Dict[int, List[Tuple[str, float]]], threshold: fl
     
     return list(groups.values())
 
-def compute_topics_over_time(topic_model: BERTopic, docs: List[str], topics: List[int], timestamps: List[pd.Timestamp], nr_bins: int) -> pd.DataFrame:
-    return topic_model.topics_over_time(docs=docs, topics=topics, timestamps=timestamps, nr_bins=nr_bins, datetime_format=None)
-
-def build_relative_time_bins(timestamps: pd.Series, nr_bins: int) -> pd.IntervalIndex:
-    tmin, tmax = timestamps.min(), timestamps.max()
-    edges = pd.date_range(start=tmin, end=tmax, periods=nr_bins + 1)
-    return pd.IntervalIndex.from_breaks(edges, closed="left")
-
-def smooth_series(y: np.ndarray, k: int = 3) -> np.ndarray:
-    """移動平均で平滑化（端は反射padding）"""
-    if k <= 1 or len(y) == 0:
-        return y
-    pad = k // 2
-    ypad = np.pad(y, (pad, pad), mode="reflect")
-    ker = np.ones(k) / k
-    return np.convolve(ypad, ker, mode="valid")
-
-def local_peaks(y: np.ndarray, n_keep: int = 3) -> List[int]:
-    """単純な局所最大（隣より大きい or 同等）を抽出して上位n_keep"""
-    if len(y) == 0:
-        return []
-    idxs = []
-    for i in range(len(y)):
-        l = y[i-1] if i-1 >= 0 else -np.inf
-        r = y[i+1] if i+1 < len(y) else -np.inf
-        if y[i] >= l and y[i] >= r:
-            idxs.append(i)
-    # 強いピーク順
-    idxs.sort(key=lambda i: y[i], reverse=True)
-    return idxs[:n_keep]
+def build_group_timeseries(topics: List[int], timestamps: pd.Series, groups: List[List[int]],
+                           nr_bins: int) -> pd.DataFrame:
+    """
+    トピック割り当てから グループ×ビン の時系列（Frequency / Percentage）を作る
+
+    件数は topic_bin_counts（BERTopic.topics_over_time と同じビン・件数）で直接集計するため、
+    bin 数を変えても BERTopic の再学習やビンごとの c-TF-IDF 計算は不要。
+    """
+    tot = topic_bin_counts(topics, timestamps, nr_bins)
+    # raw topic -> group
+    raw2g = {}
+    for gid, members in enumerate(groups):
+        for t in members: raw2g[t] = gid
+    tot["Group"] = tot["Topic"].map(raw2g).astype(int)
+
+    sums = tot.groupby("Timestamp")["Frequency"].sum().rename("total")
+    df_g = (tot.groupby(["Group", "Timestamp"], as_index=False)["Frequency"].sum()
+              .merge(sums, left_on="Timestamp", right_index=True, how="left"))
+    df_g["Percentage"] = 100.0 * df_g["Frequency"] / df_g["total"].clip(lower=1)
+    return df_g.drop(columns=["total"])
 
 # -------------------------
 # データ構造
@@ -927,7 +895,8 @@ class StreamData:
     def __init__(self, file_path: str, country: str, df_valid: pd.DataFrame,
                  topics_valid: List[int], groups: List[List[int]],
                  gid_label: Dict[int, str], group_timeseries: pd.DataFrame,
-                 nr_bins: int, group_top_words: Dict[int, List[str]]):
+                 nr_bins: int, group_top_words: Dict[int, List[str]],
+                 embeddings: Optional[np.ndarray] = None):
         self.file_path = file_path
         self.country = country
         self.df_valid = df_valid
@@ -937,15 +906,92 @@ class StreamData:
         self.group_timeseries = group_timeseries
         self.nr_bins = nr_bins
         self.group_top_words = group_top_words  # {group_id: [str,...]}
+        # df_valid と行対応した埋め込み行列（正規化済み, n_rows x dim）
+        self.embeddings = embeddings
         # 言語列が含まれていれば保持
         self.languages = df_valid.get("lang") if "lang" in df_valid.columns else None
+        # ステージキャッシュ上のキー（process_stream で設定、下流ステージのキーに使う）
+        self.stage_key: Optional[str] = None
+        self._build_bin_index()
+
+    def rebin(self, nr_bins: int) -> 'StreamData':
+        """
+        トピック割り当て・グループはそのままに、bin 数だけ変えた StreamData を作る
+
+        group_timeseries・ビン・(group, bin) インデックスを作り直すだけで、BERTopic は再学習しない。
+        stage_key は元のキーと nr_bins から導出する（下流の events ステージのキャッシュ用）。
+        """
+        sd = StreamData(
+            file_path=self.file_path,
+            country=self.country,
+            df_valid=self.df_valid.copy(),
+            topics_valid=self.topics_valid,
+            groups=self.groups,
+            gid_label=self.gid_label,
+            group_timeseries=build_group_timeseries(self.topics_valid, self.df_valid["timestamp"],
+                                                    self.groups, nr_bins),
+            nr_bins=nr_bins,
+            group_top_words=self.group_top_words,
+            embeddings=self.embeddings,
+        )
+        if self.stage_key is not None:
+            sd.stage_key = stage_key("rebin", {"nr_bins": nr_bins, "version": 1}, [self.stage_key])
+        return sd
+
+    def _build_bin_index(self):
+        """各行の bin_id を一括計算し、(group_id, bin_id) -> 行 の転置インデックスを構築"""
+        self.bins = build_relative_time_bins(self.df_valid["timestamp"], self.nr_bins)
+        self.df_valid["bin_id"] = assign_time_bins(self.df_valid["timestamp"], self.bins)
+        raw2g: Dict[int, int] = {}
+        for g_id, members in enumerate(self.groups):
+            for t in members:
+                raw2g[t] = g_id
+        self.row_group_ids = np.array([raw2g.get(t, -1) if t != -1 else -1 for t in self.topics_valid],
+                                      dtype=np.int64)
+        self.bin_index = TimeBinIndex(self.row_group_ids, self.df_valid["bin_id"].to_numpy())
+        self._event_comments: Optional[EventCommentStore] = None
+        self._group_matrix: Optional[np.ndarray] = None
+
+    @property
+    def group_matrix(self) -> np.ndarray:
+        """group_timeseries の Frequency を (グループ数 × nr_bins) の密行列にしたもの（初回参照時に作成）"""
+        if getattr(self, "_group_matrix", None) is None:
+            gts = self.group_timeseries
+            n_groups = max(len(self.groups), int(gts["Group"].max()) + 1 if len(gts) else 0)
+            self._group_matrix = timeseries_matrix(gts["Group"].to_numpy(),
+                                                   assign_time_bins(gts["Timestamp"], self.bins),
+                                                   gts["Frequency"].to_numpy(dtype=float),
+                                                   n_groups, len(self.bins))
+        return self._group_matrix
+
+    @property
+    def event_comments(self) -> EventCommentStore:
+        """イベントコメントストア（初回参照時に作成。ステージキャッシュ保存時点では空）"""
+        if getattr(self, "_event_comments", None) is None:
+            self._event_comments = EventCommentStore(
+                self.bin_index, self.df_valid["message_clean"].tolist(),
+                self.languages.tolist() if self.languages is not None else None, self.nr_bins)
+        return self._event_comments
 
 # -------------------------
 # ストリーム1本の処理
 # -------------------------
-def process_stream(csv_file: str, embedding_model: SentenceTransformer,
-                   jaccard_th: float, nr_bins: int, topk_plot: int = 10) -> Optional[StreamData]:
-    df = read_csv_any(csv_file)
+def encode_texts(embedding_model: SentenceTransformer, texts: List[str], batch_size: int = 64) -> np.ndarray:
+    """埋め込みキャッシュ経由でテキストをエンコード（キャッシュ無効時は直接encode）"""
+    if EMBEDDING_CACHE is not None:
+        return EMBEDDING_CACHE.encode(embedding_model, texts, batch_size=batch_size)
+    return embedding_model.encode(texts, batch_size=batch_size, show_progress_bar=False, normalize_embeddings=True)
+
+def embed_stage_params() -> Dict[str, object]:
+    """[embed] ステージのキー（encode_texts の出力を変える設定: モデル・保存精度・正規化）"""
+    if EMBEDDING_CACHE is not None:
+        return {"model": EMB_NAME, "dtype": EMBEDDING_CACHE.dtype.name,
+                "normalize": EMBEDDING_CACHE.normalize_embeddings}
+    return {"model": EMB_NAME, "dtype": "float32", "normalize": True}
+
+def clean_stream(csv_file: str, workers: int = 1) -> Optional[pd.DataFrame]:
+    """[clean] CSV読み込み → タイムスタンプ正規化 → 前処理 → ノイズ除去 → 言語検出（workers: 前処理のプロセス数）"""
+    df = read_chat_csv(csv_file)
     if df.empty or "message" not in df.columns:
         print(f"Skipping {csv_file}: no message column")
         return None
@@ -960,12 +1006,13 @@ def process_stream(csv_file: str, embedding_model: SentenceTransformer,
 
     # 前処理
     df = df.dropna(subset=["message"]).copy()
-    df["message_clean"] = df["message"].astype(str).apply(preprocess_text)
+    df["message_clean"] = text_preprocess.preprocess_texts(df["message"].astype(str), segment=True,
+                                                           workers=workers)
     df = df[df["message_clean"].str.len() > 0].copy()
     
     # ===== Noise Filtering統合 =====
     # ノイズコメント除去 (kkkk, wwww, etc.)
-    df["is_noise"] = df["message_clean"].apply(NOISE_FILTER.is_noise)
+    df["is_noise"] = NOISE_FILTER.noise_mask(df["message_clean"])
     noise_count = df["is_noise"].sum()
     total_before = len(df)
     df = df[~df["is_noise"]].copy()
@@ -976,20 +1023,52 @@ def process_stream(csv_file: str, embedding_model: SentenceTransformer,
         print(f"Skipping {csv_file}: no usable comments after noise filtering")
         return None
     # 言語検出（後でスタイル比較に利用）
-    df["lang"] = df["message_clean"].apply(detect_lang_safe)
-    texts = df["message_clean"].tolist()
+    df["lang"] = detect_langs(df["message_clean"].tolist())
+    return df
 
-    # 埋め込み & BERTopic (動的パラメータ適用)
-    emb = embedding_model.encode(texts, batch_size=64, show_progress_bar=False, normalize_embeddings=True)
-    topic_model = build_topic_model(embedding_model, num_comments=len(df))
+def fit_topic_model(texts: List[str], emb: np.ndarray, embedding_model: SentenceTransformer) -> Tuple[BERTopic, List[int]]:
+    """BERTopic を texts で学習し、(モデル, トピック割り当て) を返す（IncrementalTopicModel の fit_fn）"""
+    topic_model = build_topic_model(embedding_model, num_comments=len(texts))
     topics, _ = topic_model.fit_transform(texts, embeddings=emb)
+    return topic_model, list(topics)
 
-    valid_idx = [i for i, t in enumerate(topics) if t != -1]
-    if len(valid_idx) < 10:
-        print(f"Skipping {csv_file}: too few valid topics")
-        return None
-    df_valid = df.iloc[valid_idx].reset_index(drop=True)
-    topics_valid = [topics[i] for i in valid_idx]
+def fit_stream_topics_incremental(texts: List[str], emb: np.ndarray, embedding_model: SentenceTransformer,
+                                  timestamps: Optional[pd.Series], warmup: int, drift_th: float,
+                                  batch_size: int = 500) -> Dict[str, object]:
+    """
+    [topic] 時刻順で最初の warmup 件だけで BERTopic を学習し、残りは transform で割り当てる
+
+    batch_size 件ごとにドリフト（外れ値の割合の増加・トピック重心との類似度の低下）を確認し、
+    drift_th を超えたときだけ直近 warmup 件で再学習する。トピックIDは再学習をまたいで安定。
+    """
+    order = np.argsort(pd.to_datetime(timestamps).to_numpy(), kind="stable") if timestamps is not None \
+        else np.arange(len(texts))
+    itm = IncrementalTopicModel(lambda t, e: fit_topic_model(t, e, embedding_model),
+                                warmup=warmup, drift_window=batch_size, drift_threshold=drift_th)
+    topics = np.full(len(texts), -1, dtype=np.int64)
+    head = order[:warmup]
+    topics[head] = itm.fit([texts[i] for i in head], emb[head])
+    # 再学習前に割り当てた行は引退したIDを持つので、その時点の上位語も残す
+    words_by_tid = itm.words_by_tid()
+    for start in range(warmup, len(order), batch_size):
+        idx = order[start:start + batch_size]
+        topics[idx] = itm.assign([texts[i] for i in idx], emb[idx])
+        words_by_tid.update(itm.words_by_tid())
+    # 行が1つもない安定IDは渡さない
+    present = set(topics.tolist())
+    words_by_tid = {gid: words for gid, words in words_by_tid.items() if gid in present}
+    stats = itm.get_stats()
+    print(f"  [BERTopic] Incremental: warmup={warmup}, transformed={len(texts) - len(head)}, "
+          f"refits={stats['refits']}, topics={len(words_by_tid)}")
+    return {"topic_model": itm.model, "topics": topics.tolist(), "words_by_tid": words_by_tid}
+
+def fit_stream_topics(texts: List[str], emb: np.ndarray, embedding_model: SentenceTransformer,
+                      timestamps: Optional[pd.Series] = None, warmup: Optional[int] = None,
+                      drift_th: float = 0.15) -> Dict[str, object]:
+    """[topic] BERTopic (動的パラメータ適用) を学習し、トピック割り当てと上位語を返す"""
+    if warmup and len(texts) > warmup:
+        return fit_stream_topics_incremental(texts, emb, embedding_model, timestamps, warmup, drift_th)
+    topic_model, topics = fit_topic_model(texts, emb, embedding_model)
 
     # 上位語
     topic_info = topic_model.get_topic_info()
@@ -999,6 +1078,22 @@ def process_stream(csv_file: str, embedding_model: SentenceTransformer,
         items = topic_model.get_topic(tid) or []
         items = [(str(w), float(s)) for w, s in items if isinstance(w, str) and str(w).strip()]
         words_by_tid[tid] = items
+    return {"topic_model": topic_model, "topics": list(topics), "words_by_tid": words_by_tid}
+
+def build_stream_timeseries(csv_file: str, df: pd.DataFrame, emb: np.ndarray, topic_res: Dict[str, object],
+                            jaccard_th: float, nr_bins: int) -> Optional[StreamData]:
+    """[timeseries] 似トピック統合 → グループ時系列を計算して StreamData を作成"""
+    topics = topic_res["topics"]
+    words_by_tid = topic_res["words_by_tid"]
+
+    valid_idx = [i for i, t in enumerate(topics) if t != -1]
+    if len(valid_idx) < 10:
+        print(f"Skipping {csv_file}: too few valid topics")
+        return None
+    df_valid = df.iloc[valid_idx].reset_index(drop=True)
+    topics_valid = [topics[i] for i in valid_idx]
+    # イベントベクトル計算で再利用するため、df_valid と行対応させて保持
+    emb_valid = np.asarray(emb, dtype=np.float32)[valid_idx]
 
     # 似トピック統合
     groups = merge_topics(words_by_tid, threshold=jaccard_th)
@@ -1008,10 +1103,9 @@ def process_stream(csv_file: str, embedding_model: SentenceTransformer,
         counter = Counter()
         for t in members:
             # トピック重複検出改善: 10語 → 20語に増加
-            for w, s in words_by_tid.get(t, [])[:20]:
-                if isinstance(w, str) and w.strip():
-                    norm = normalize_term(w)
-                    counter[norm] += float(s)
+            pairs = [(w, s) for w, s in words_by_tid.get(t, [])[:20] if isinstance(w, str) and w.strip()]
+            for norm, (_w, s) in zip(normalize_terms([w for w, _ in pairs]), pairs):
+                counter[norm] += float(s)
         # ラベルは上位4語のまま（可読性のため）
         tops = [w for w, _ in counter.most_common(4)]
         # トピック比較用には上位20語を保存
@@ -1020,25 +1114,7 @@ def process_stream(csv_file: str, embedding_model: SentenceTransformer,
         gid_label[gid] = "・".join(tops) if tops else f"group_{gid}"
 
     # 時系列（統合）
-    tot = compute_topics_over_time(topic_model, df_valid["message_clean"].tolist(),
-                                   topics_valid, df_valid["timestamp"].tolist(), nr_bins)
-    # raw topic -> group
-    raw2g = {}
-    for gid, members in enumerate(groups):
-        for t in members: raw2g[t] = gid
-    tot["Group"] = tot["Topic"].map(raw2g).astype(int)
-
-    sums = tot.groupby("Timestamp")["Frequency"].sum().rename("total")
-    df_g = (tot.groupby(["Group", "Timestamp"], as_index=False)["Frequency"].sum()
-              .merge(sums, left_on="Timestamp", right_index=True, how="left"))
-    df_g["Percentage"] = 100.0 * df_g["Frequency"] / df_g["total"].clip(lower=1)
-    df_g = df_g.drop(columns=["total"])
-
-    # 可視化: 各配信者のTop-10時系列
-    plot_top_groups(df_g, gid_label,
-                    out_png=os.path.join(OUT_DIR, "timelines", f"{os.path.basename(csv_file).replace('.csv','')}_timeline.png"),
-                    title=f"Topics Over Time (Top-{topk_plot}) : {os.path.basename(csv_file)} [{parse_country_from_filename(csv_file)}]",
-                    top_k=topk_plot)
+    df_g = build_group_timeseries(topics_valid, df_valid["timestamp"], groups, nr_bins)
 
     return StreamData(
         file_path=os.path.basename(csv_file),
@@ -1050,8 +1126,64 @@ def process_stream(csv_file: str, embedding_model: SentenceTransformer,
         group_timeseries=df_g,
         nr_bins=nr_bins,
         group_top_words=group_top_words,
+        embeddings=emb_valid,
     )
 
+def process_stream(csv_file: str, embedding_model: SentenceTransformer,
+                   jaccard_th: float, nr_bins: int, topk_plot: int = 10,
+                   topic_warmup: Optional[int] = None, topic_drift_th: float = 0.15,
+                   topic_model_dir: Optional[str] = None, preprocess_workers: int = 1) -> Optional[StreamData]:
+    """
+    1配信の処理: clean → embed → topic → timeseries
+
+    STAGE_CACHE が有効な場合、各ステージの出力は入力ファイルの内容ハッシュと
+    ステージに効く引数をキーに保存され、変更のないステージは読み込みで済ませる。
+    topic_warmup を指定すると、BERTopic は最初の topic_warmup 件だけで学習し残りは transform で割り当てる
+    （ドリフト時のみ再学習）。topic_model_dir を指定すると学習済みモデルを保存する（--live-topic-model 用）。
+    preprocess_workers > 1 なら大きなCSVの前処理をプロセスプールでチャンク並列に行う（結果は同じ）。
+    """
+    cache = STAGE_CACHE if STAGE_CACHE is not None else StageCache(enabled=False)
+    externals = {"embedding_model": embedding_model}
+
+    clean_key, df = cache.run("clean", {"file": file_digest(csv_file), "version": 2},
+                              lambda: clean_stream(csv_file, workers=preprocess_workers))
+    if df is None:
+        return None
+    texts = df["message_clean"].tolist()
+
+    # 埋め込み & BERTopic (動的パラメータ適用)
+    embed_key, emb = cache.run("embed", embed_stage_params(),
+                               lambda: encode_texts(embedding_model, texts, batch_size=64),
+                               parents=[clean_key])
+    topic_params = {"model": EMB_NAME, "version": 1}
+    if topic_warmup:
+        topic_params.update(warmup=topic_warmup, drift_th=topic_drift_th)
+    topic_key, topic_res = cache.run("topic", topic_params,
+                                     lambda: fit_stream_topics(texts, emb, embedding_model, df["timestamp"],
+                                                               topic_warmup, topic_drift_th),
+                                     parents=[embed_key], externals=externals)
+    if topic_model_dir:
+        model_path = os.path.join(topic_model_dir, os.path.basename(csv_file).replace(".csv", ".bertopic"))
+        os.makedirs(topic_model_dir, exist_ok=True)
+        topic_res["topic_model"].save(model_path, serialization="pickle", save_embedding_model=False)
+        print(f"  [BERTopic] Saved model: {model_path}")
+    ts_key, sd = cache.run("timeseries", {"jaccard_th": jaccard_th, "nr_bins": nr_bins, "version": 2},
+                           lambda: build_stream_timeseries(csv_file, df, emb, topic_res, jaccard_th, nr_bins),
+                           parents=[topic_key])
+    if sd is None:
+        return None
+    # 下流ステージ（events 以降）のキーに使う
+    sd.stage_key = ts_key
+
+    # 可視化: 各配信者のTop-10時系列（出力ファイルなのでキャッシュ時も毎回書き出す）
+    base = os.path.basename(csv_file).replace('.csv', '')
+    save_table(sd.group_timeseries, os.path.join(OUT_DIR, "timelines", f"{base}_timeseries.csv"))
+    plot_top_groups(sd.group_timeseries, sd.gid_label,
+                    out_png=os.path.join(OUT_DIR, "timelines", f"{base}_timeline.png"),
+                    title=f"Topics Over Time (Top-{topk_plot}) : {os.path.basename(csv_file)} [{parse_country_from_filename(csv_file)}]",
+                    top_k=topk_plot)
+    return sd
+
 def plot_top_groups(df_g: pd.DataFrame, labels: Dict[int, str], out_png: str, title: str, top_k: int = 10):
     os.makedirs(os.path.dirname(out_png), exist_ok=True)
     order = (df_g.groupby("Group")["Frequency"].sum().sort_values(ascending=False))
@@ -1068,10 +1200,92 @@ def plot_top_groups(df_g: pd.DataFrame, labels: Dict[int, str], out_png: str, ti
     plt.tight_layout(); plt.savefig(out_png, dpi=220); plt.close()
     print(f"Saved timeline: {out_png}")
 
+# -------------------------
+# 複数ストリームの並列処理（--workers）
+# -------------------------
+_WORKER_EMBEDDING_MODEL = None  # ワーカープロセスごとに1回だけロード
+
+def _init_stream_worker(lang_cache: Optional[str], embedding_cache_dir: Optional[str],
+                        embedding_cache_dtype: str, n_threads: int, stage_cache_dir: Optional[str] = None,
+                        out_dir: Optional[str] = None):
+    """ワーカー初期化: 埋め込みモデル・言語検出・埋め込み/ステージキャッシュをプロセスごとに1回だけ用意"""
+    global _WORKER_EMBEDDING_MODEL, EMBEDDING_CACHE, STAGE_CACHE, OUT_DIR
+    if out_dir:
+        OUT_DIR = out_dir  # 親プロセスと同じ出力先（スイープ時は名前空間）
+    try:
+        import torch
+        torch.set_num_threads(n_threads)  # ワーカー間で CPU コアを分け合う
+    except ImportError:
+        pass
+    # ワーカー内ではさらにプロセスプールを作らない
+    get_language_identifier(cache_path=lang_cache, seed=42, workers=1)
+    if embedding_cache_dir:
+        EMBEDDING_CACHE = EmbeddingCache(EMB_NAME, cache_dir=embedding_cache_dir, dtype=embedding_cache_dtype)
+    if stage_cache_dir:
+        STAGE_CACHE = StageCache(stage_cache_dir)
+    _WORKER_EMBEDDING_MODEL = SentenceTransformer(EMB_NAME)
+
+def _process_stream_worker(csv_file: str, jaccard_th: float, nr_bins: int, topk_plot: int,
+                           topic_warmup: Optional[int] = None, topic_drift_th: float = 0.15,
+                           topic_model_dir: Optional[str] = None) -> Tuple[Optional[StreamData], str]:
+    """ワーカーで process_stream を実行し、ログは親プロセスで入力順に出すためバッファして返す"""
+    buf = io.StringIO()
+    with contextlib.redirect_stdout(buf):
+        sd = process_stream(csv_file, _WORKER_EMBEDDING_MODEL, jaccard_th, nr_bins, topk_plot=topk_plot,
+                            topic_warmup=topic_warmup, topic_drift_th=topic_drift_th,
+                            topic_model_dir=topic_model_dir)
+        # ワーカーの終了時に atexit が呼ばれない場合があるため、ストリームごとに書き出す
+        if EMBEDDING_CACHE is not None:
+            EMBEDDING_CACHE.flush()
+    return sd, buf.getvalue()
+
+def process_streams(csv_files: List[str], embedding_model: SentenceTransformer, args) -> Dict[str, StreamData]:
+    """
+    全CSVを process_stream で処理する（args.workers > 1 ならファイル単位でプロセスプール）
+
+    結果の辞書とログの出力順は入力ファイル順で固定し、逐次実行と同じ出力になるようにする。
+    ワーカーは spawn で起動し、埋め込みモデルはワーカーごとに1回だけロードする。
+    """
+    streams: Dict[str, StreamData] = {}
+    existing = []
+    for csv_file in csv_files:
+        if not os.path.exists(csv_file):
+            print(f"File not found: {csv_file}"); continue
+        existing.append(csv_file)
+
+    workers = min(max(1, args.workers), len(existing))
+    if workers <= 1:
+        for csv_file in existing:
+            sd = process_stream(csv_file, embedding_model, args.jaccard_th, args.time_bins, topk_plot=args.topk,
+                                topic_warmup=args.topic_warmup, topic_drift_th=args.topic_drift_th,
+                                topic_model_dir=args.save_topic_model_dir,
+                                # ファイル単位の並列化をしない（1ファイルのみ等）場合は前処理を並列化
+                                preprocess_workers=args.workers)
+            if sd: streams[csv_file] = sd
+        return streams
+
+    print(f"[Workers] Processing {len(existing)} streams with {workers} processes")
+    n_threads = max(1, (os.cpu_count() or 1) // workers)
+    cache_dir = None if args.no_embedding_cache else args.embedding_cache_dir
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_stream_worker,
+                             initargs=(args.lang_cache, cache_dir, args.embedding_cache_dtype, n_threads,
+                                       None if args.no_stage_cache else args.stage_cache_dir, OUT_DIR)) as ex:
+        futures = [ex.submit(_process_stream_worker, f, args.jaccard_th, args.time_bins, args.topk,
+                             args.topic_warmup, args.topic_drift_th, args.save_topic_model_dir)
+                   for f in existing]
+        # 完了順ではなく入力順に回収してログを出す
+        for csv_file, fut in zip(existing, futures):
+            sd, log = fut.result()
+            sys.stdout.write(log)
+            if sd: streams[csv_file] = sd
+    return streams
+
 # -------------------------
 # イベント抽出・照合・テキスト距離
 # -------------------------
-def detect_events(stream: StreamData, n_events: int = 5, focus_top: Optional[int] = None) -> List[Dict[str, object]]:
+def detect_events(stream: StreamData, n_events: int = 5, focus_top: Optional[int] = None,
+                  prominence: Optional[float] = None, min_distance: Optional[int] = None) -> List[Dict[str, object]]:
     """
     各グループ（トピック統合）の時系列からピークイベントを抽出する。
 
@@ -1085,6 +1299,10 @@ def detect_events(stream: StreamData, n_events: int = 5, focus_top: Optional[int
         トピックグループを総出現回数の多い順に限定する数。
         例: 10 を指定すると、コメント数の多い上位10グループのみからピーク検出を行う。
         None の場合はすべてのグループを対象とする。
+    prominence : float or None
+        平滑化後の系列でこれ未満のプロミネンスのピークを除外する（None で無効）。
+    min_distance : int or None
+        同じグループ内で採用するピーク同士の最小間隔（bin 数、強いピークを優先。None で無効）。
 
     Returns
     -------
@@ -1098,29 +1316,12 @@ def detect_events(stream: StreamData, n_events: int = 5, focus_top: Optional[int
         groups_to_use = sums.sort_values(ascending=False).head(focus_top).index.tolist()
     else:
         groups_to_use = sorted(stream.group_timeseries["Group"].unique())
-    # Binning 再現
-    bins = build_relative_time_bins(stream.df_valid["timestamp"], stream.nr_bins)
-    for gid in groups_to_use:
-        gdf = stream.group_timeseries[stream.group_timeseries["Group"] == gid]
-        if gdf.empty:
-            continue
-        # Bin assignment
-        bin_edges = list(zip(bins.left, bins.right))
-        counts = np.zeros(len(bins), dtype=float)
-        for _, r in gdf.iterrows():
-            ts = r["Timestamp"]
-            b = None
-            for bi, (lft, rgt) in enumerate(bin_edges):
-                if ts >= lft and ts < rgt:
-                    b = bi
-                    break
-            if b is None:
-                centers = np.array([iv.left.value for iv in bins], dtype=np.int64)
-                b = int(np.argmin(np.abs(centers - int(ts.value))))
-            counts[b] += float(r["Frequency"])
-        # 平滑化→ピーク抽出
-        y = smooth_series(counts, k=5)
-        peak_idx = local_peaks(y, n_keep=n_events)
+    # (グループ × ビン) 行列で全グループをまとめて平滑化→ピーク抽出（StreamData で作成済みのビンを使用）
+    bins = stream.bins
+    groups_to_use = [int(gid) for gid in groups_to_use]
+    y = smooth_series(stream.group_matrix[groups_to_use], k=5)
+    peaks = local_peaks(y, n_keep=n_events, prominence=prominence, min_distance=min_distance)
+    for gid, peak_idx in zip(groups_to_use, peaks):
         for b in peak_idx:
             events.append({
                 "group_id": int(gid),
@@ -1153,6 +1354,7 @@ def match_events_across_streams(
     embed_th: Optional[float] = None,
     streams: Optional[Dict[str, 'StreamData']] = None,
     embedding_model: Optional['SentenceTransformer'] = None,
+    peak_pad: Optional[int] = None,
 ) -> Dict[Tuple[str, int], int]:
     """
     多数のイベントをペアワイズで比較し、類似するイベントを同一IDに統合する。
@@ -1176,6 +1378,9 @@ def match_events_across_streams(
         イベント発生binの差の許容範囲。
     embed_th : float or None
         イベント埋め込みベクトル同士のコサイン類似度閾値。Noneのときはチェックしない。
+    peak_pad : int or None
+        Translation Bridge 用のコメント抽出の padding。指定時はイベントコメントストアの言語コードで
+        上位語の翻訳元言語を決める（Noneのときは自動検出）。
 
     Returns
     -------
@@ -1198,147 +1403,166 @@ def match_events_across_streams(
         rx, ry = find(x), find(y)
         if rx != ry:
             parent[ry] = rx
-    # Pairwise comparisons
+
+    # ===== イベントごとの前計算（ペアループの外で1回だけ） =====
+    stream_index = {k: n for n, k in enumerate(events_by_stream.keys())}
+    stream_ids = np.array([stream_index[k] for k, _, _ in items], dtype=np.int64)
+    bin_ids = np.array([int(e.get("bin_id", -1)) for _, _, e in items], dtype=np.int64)
+    # コメント数の推定（top_wordsの数をプロキシとして使用）: 3語以上あるイベントのみ照合対象
+    has_sufficient_data = np.array([len(e.get("top_words", [])) >= 3 for _, _, e in items], dtype=bool)
+    # 正規化済みの上位語集合
+    word_sets = [
+        frozenset(normalize_terms([w for w in e.get("top_words", []) if isinstance(w, str) and w.strip()]))
+        for _, _, e in items
+    ]
+    # 埋め込み行列（欠損イベントはゼロ行 + マスク）
+    emb_matrix = None
+    has_emb = np.array([e.get("embedding") is not None for _, _, e in items], dtype=bool)
+    if embed_th is not None and has_emb.any():
+        dim = len(next(e["embedding"] for _, _, e in items if e.get("embedding") is not None))
+        emb_matrix = np.zeros((len(items), dim), dtype=np.float64)
+        for n, (_, _, e) in enumerate(items):
+            if e.get("embedding") is not None:
+                emb_matrix[n] = np.asarray(e["embedding"], dtype=np.float64)
+
+    # ===== 候補生成: bin_id でブロック化し、time_th 以内の異ストリームペアのみ =====
+    cand_a, cand_b, cand_sims = blocked_candidate_pairs(bin_ids, stream_ids, time_th, embeddings=emb_matrix)
+
+    # ===== Translation Bridge 前処理: 候補に現れるイベントを1回だけ翻訳・エンコード =====
+    translated_events = None
+    if (embed_th is not None and TRANSLATION_BRIDGE is not None
+            and streams is not None and embedding_model is not None):
+        eligible = has_sufficient_data & has_emb
+        needed = set()
+        for a, b in zip(cand_a.tolist(), cand_b.tolist()):
+            if eligible[a] and eligible[b]:
+                needed.add(a); needed.add(b)
+        # top_wordsから代表的なコメントを生成 (実際のコメント取得の代わり)
+        proxy_events = []
+        for n, (key, _, e) in enumerate(items):
+            words = list(e.get("top_words", [])[:10]) if n in needed else []
+            proxy = {'comments': words, 'topics': words}
+            # キャッシュ済みの言語コードを再利用（per_comment なら上位語ごと、それ以外はイベントの最頻言語）
+            if words and peak_pad is not None and key in streams:
+                entry = streams[key].event_comments.get(e["group_id"], e["bin_id"], peak_pad)
+                event_lang, word_langs = term_languages(words, entry.comments, entry.langs)
+                proxy['languages'] = word_langs if TRANSLATION_BRIDGE.per_comment else [event_lang] * len(words)
+            proxy_events.append(proxy)
+        try:
+            translated_events = TRANSLATION_BRIDGE.prepare_event_translations(proxy_events, embedding_model)
+            mem_stats = TRANSLATION_BRIDGE.get_translation_stats()['memory']
+            print(f"[Translation Bridge] Prepared {len(needed)} events "
+                  f"(translation memory hits={mem_stats['hits']}, misses={mem_stats['misses']})")
+        except Exception as e:
+            print(f"[Translation Bridge] Pre-translation failed, using original embeddings: {e}")
+            translated_events = None
+
+    # Candidate comparisons
     debug_count = 0
     debug_match_count = 0
     DEBUG_VERBOSE = False  # 詳細なデバッグ出力を有効化する場合はTrue
-    for a in range(len(items)):
+    for n_pair in range(len(cand_a)):
+        a, b = int(cand_a[n_pair]), int(cand_b[n_pair])
         ka, ia, ea = items[a]
-        for b in range(a+1, len(items)):
-            kb, ib, eb = items[b]
-            # 同一ストリーム内のイベントはマージしない
-            if ka == kb:
-                continue
-            
-            debug_count += 1
-            
-            # DEBUG: 最初の数ペアを詳細に記録（DEBUG_VERBOSEがTrueの場合のみ）
-            if DEBUG_VERBOSE and debug_count <= 5:
-                print(f"[DEBUG] Pair {debug_count}: {os.path.basename(ka)} event{ia} vs {os.path.basename(kb)} event{ib}")
-            
-            # Time proximity check first (fastest)
-            bin_diff = abs(int(ea.get("bin_id", -1)) - int(eb.get("bin_id", -1)))
+        kb, ib, eb = items[b]
+
+        debug_count += 1
+
+        # DEBUG: 最初の数ペアを詳細に記録（DEBUG_VERBOSEがTrueの場合のみ）
+        if DEBUG_VERBOSE and debug_count <= 5:
+            print(f"[DEBUG] Pair {debug_count}: {os.path.basename(ka)} event{ia} vs {os.path.basename(kb)} event{ib}")
+            print(f"  - Time bin difference: {abs(bin_ids[a] - bin_ids[b])} (threshold: {time_th})")
+
+        # ===精度向上: 最小コメント数チェック===
+        if not has_sufficient_data[a] or not has_sufficient_data[b]:
             if DEBUG_VERBOSE and debug_count <= 5:
-                print(f"  - Time bin difference: {bin_diff} (threshold: {time_th})")
-            if bin_diff > time_th:
-                if DEBUG_VERBOSE and debug_count <= 5:
-                    print(f"  - SKIP: Time difference too large")
-                continue
-            
-            # ===精度向上: 最小コメント数チェック===
-            # 各イベントが十分なコメント数を持っているか確認（偽陽性削減）
-            min_comments_threshold = 5  # 最小5コメント
-            
-            # コメント数の推定（top_wordsの数をプロキシとして使用）
-            # または、後で extract_event_comments を呼び出してチェックすることも可能
-            # ここでは簡易的に top_words が存在するかで判定
-            has_sufficient_data_a = len(ea.get("top_words", [])) >= 3
-            has_sufficient_data_b = len(eb.get("top_words", [])) >= 3
-            
-            if not has_sufficient_data_a or not has_sufficient_data_b:
+                print(f"  - SKIP: Insufficient topic data (A:{len(ea.get('top_words', []))}, B:{len(eb.get('top_words', []))})")
+            continue
+
+        # Embedding similarity check (if enabled, this is primary matching method)
+        if embed_th is not None:
+            # どちらか欠如ならスキップ
+            if not has_emb[a] or not has_emb[b]:
                 if DEBUG_VERBOSE and debug_count <= 5:
-                    print(f"  - SKIP: Insufficient topic data (A:{len(ea.get('top_words', []))}, B:{len(eb.get('top_words', []))})")
+                    print(f"  - SKIP: Missing embedding")
                 continue
-            
-            # Embedding similarity check (if enabled, this is primary matching method)
-            if embed_th is not None:
-                emb_a = ea.get("embedding")
-                emb_b = eb.get("embedding")
-                # どちらか欠如ならスキップ
-                if emb_a is None or emb_b is None:
-                    if DEBUG_VERBOSE and debug_count <= 5:
-                        print(f"  - SKIP: Missing embedding")
-                    continue
-                # 正規化済みベクトルとしてコサイン類似度
-                num = float(np.dot(emb_a, emb_b))
-                
-                # ===== Translation Bridge強化 =====
-                # Translation Bridgeが有効な場合、翻訳ベースの類似度も計算
-                if TRANSLATION_BRIDGE is not None and streams is not None and embedding_model is not None:
-                    try:
-                        # top_wordsから代表的なコメントを生成 (実際のコメント取得の代わり)
-                        event_a_dict = {
-                            'comments': list(sa_raw[:10]),  # Top 10 words as proxy for comments
-                            'topics': list(sa_raw[:10])
-                        }
-                        event_b_dict = {
-                            'comments': list(sb_raw[:10]),
-                            'topics': list(sb_raw[:10])
-                        }
-                        
-                        # 翻訳ベース類似度
-                        trans_sim, trans_details = TRANSLATION_BRIDGE.get_cross_lingual_similarity(
-                            event_a_dict, event_b_dict, embedding_model
-                        )
-                        
-                        # 両方の類似度を組み合わせ（加重平均）
-                        # オリジナルのembedding: 50%, 翻訳ベース: 50%
-                        num = 0.5 * num + 0.5 * trans_sim
-                        
-                        if DEBUG_VERBOSE and debug_count <= 5:
-                            print(f"  - Embedding similarity (original): {float(np.dot(emb_a, emb_b)):.4f}")
-                            print(f"  - Translation similarity: {trans_sim:.4f}")
-                            print(f"  - Combined similarity: {num:.4f} (threshold: {embed_th})")
-                            if trans_details['cross_lingual']:
-                                print(f"  - Cross-lingual match: {trans_details['lang_A']} <-> {trans_details['lang_B']}")
-                    
-                    except Exception as e:
-                        if DEBUG_VERBOSE and debug_count <= 5:
-                            print(f"  - Translation Bridge error: {e}")
-                        # エラー時はオリジナルの類似度を使用
-                        pass
-                else:
-                    if DEBUG_VERBOSE and debug_count <= 5:
-                        print(f"  - Embedding similarity: {num:.4f} (threshold: {embed_th})")
-                
-                # 既にnormalize_embeddings=Trueで生成しているのでnormは≈1
-                if num < embed_th:
+            # 正規化済みベクトルとしてコサイン類似度（ブロック行列積で計算済み）
+            num = float(cand_sims[n_pair])
+
+            # ===== Translation Bridge強化 =====
+            # Translation Bridgeが有効な場合、翻訳ベースの類似度も計算
+            if translated_events is not None:
+                try:
+                    # 翻訳ベース類似度（前処理済みの翻訳埋め込みの内積）
+                    trans_sim, trans_details = TRANSLATION_BRIDGE.prepared_similarity(
+                        translated_events[a], translated_events[b]
+                    )
+
+                    # 両方の類似度を組み合わせ（加重平均）
+                    # オリジナルのembedding: 50%, 翻訳ベース: 50%
+                    orig_sim = num
+                    num = 0.5 * num + 0.5 * trans_sim
+
                     if DEBUG_VERBOSE and debug_count <= 5:
-                        print(f"  - SKIP: Embedding similarity too low")
-                    continue
-                # Embedding check passed, now check Jaccard (if both pass = stronger match)
-            
-            # Jaccard on top words (secondary check, or primary if embed_th is None)
-            sa_raw = ea.get("top_words", [])
-            sb_raw = eb.get("top_words", [])
-            sa = {normalize_term(w) for w in sa_raw if isinstance(w, str) and w.strip()}
-            sb = {normalize_term(w) for w in sb_raw if isinstance(w, str) and w.strip()}
-            
-            if DEBUG_VERBOSE and debug_count <= 5:
-                print(f"  - top_words_A: {sa_raw}")
-                print(f"  - top_words_B: {sb_raw}")
-                print(f"  - normalized_A: {sa}")
-                print(f"  - normalized_B: {sb}")
-            
-            # Jaccard similarity of normalized sets
-            jacc = 0.0
-            if sa or sb:
-                jacc = len(sa & sb) / (len(sa | sb) + 1e-12)
-            if DEBUG_VERBOSE and debug_count <= 5:
-                print(f"  - Jaccard similarity: {jacc:.4f} (threshold: {word_th})")
-            
-            # If embedding matching is enabled, Jaccard is optional (just for extra validation)
-            # If embedding matching is disabled, Jaccard is required
-            if embed_th is None:
-                # No embedding check - rely on Jaccard
-                if jacc < word_th:
+                        print(f"  - Embedding similarity (original): {orig_sim:.4f}")
+                        print(f"  - Translation similarity: {trans_sim:.4f}")
+                        print(f"  - Combined similarity: {num:.4f} (threshold: {embed_th})")
+                        if trans_details['cross_lingual']:
+                            print(f"  - Cross-lingual match: {trans_details['lang_A']} <-> {trans_details['lang_B']}")
+
+                except Exception as e:
                     if DEBUG_VERBOSE and debug_count <= 5:
-                        print(f"  - SKIP: Jaccard too low (no embedding check)")
-                    continue
+                        print(f"  - Translation Bridge error: {e}")
+                    # エラー時はオリジナルの類似度を使用
+                    pass
             else:
-                # Embedding check already passed - Jaccard is just for logging
                 if DEBUG_VERBOSE and debug_count <= 5:
-                    if jacc >= word_th:
-                        print(f"  - Jaccard also passed (strong match)")
-                    else:
-                        print(f"  - Jaccard low but embedding passed (semantic match)")
-            
-            # All conditions satisfied → union
-            debug_match_count += 1
+                    print(f"  - Embedding similarity: {num:.4f} (threshold: {embed_th})")
+
+            # 既にnormalize_embeddings=Trueで生成しているのでnormは≈1
+            if num < embed_th:
+                if DEBUG_VERBOSE and debug_count <= 5:
+                    print(f"  - SKIP: Embedding similarity too low")
+                continue
+            # Embedding check passed, now check Jaccard (if both pass = stronger match)
+
+        # Jaccard on top words (secondary check, or primary if embed_th is None)
+        sa = word_sets[a]
+        sb = word_sets[b]
+
+        if DEBUG_VERBOSE and debug_count <= 5:
+            print(f"  - normalized_A: {set(sa)}")
+            print(f"  - normalized_B: {set(sb)}")
+
+        # Jaccard similarity of normalized sets
+        jacc = 0.0
+        if sa or sb:
+            jacc = len(sa & sb) / (len(sa | sb) + 1e-12)
+        if DEBUG_VERBOSE and debug_count <= 5:
+            print(f"  - Jaccard similarity: {jacc:.4f} (threshold: {word_th})")
+
+        # If embedding matching is enabled, Jaccard is optional (just for extra validation)
+        # If embedding matching is disabled, Jaccard is required
+        if embed_th is None:
+            # No embedding check - rely on Jaccard
+            if jacc < word_th:
+                if DEBUG_VERBOSE and debug_count <= 5:
+                    print(f"  - SKIP: Jaccard too low (no embedding check)")
+                continue
+        else:
+            # Embedding check already passed - Jaccard is just for logging
             if DEBUG_VERBOSE and debug_count <= 5:
-                print(f"  - ✓ MATCHED!")
-            union((ka, ia), (kb, ib))
-    
+                if jacc >= word_th:
+                    print(f"  - Jaccard also passed (strong match)")
+                else:
+                    print(f"  - Jaccard low but embedding passed (semantic match)")
+
+        # All conditions satisfied → union
+        debug_match_count += 1
+        if DEBUG_VERBOSE and debug_count <= 5:
+            print(f"  - ✓ MATCHED!")
+        union((ka, ia), (kb, ib))
+
     if embed_th is not None:
         print(f"[INFO] Event matching: {debug_match_count} similar events matched (embedding-based, threshold={embed_th})")
     else:
@@ -1357,146 +1581,57 @@ def match_events_across_streams(
         event_map[(k,i)] = root2id[r]
     return event_map
 
+def extract_event_rows(stream: StreamData, event: Dict[str, object], peak_pad: int) -> List[int]:
+    """
+    イベントに該当するコメントの df_valid 行インデックスを抽出する。
+    """
+    # イベントコメントストアから取得（df_valid の行順を維持）
+    return stream.event_comments.get(event["group_id"], event["bin_id"], peak_pad).rows.tolist()
+
 def extract_event_comments(stream: StreamData, event: Dict[str, object], peak_pad: int) -> Tuple[List[str], List[str]]:
     """
     イベントに該当するコメントとその言語リストを抽出する。
     戻り値は (コメントのリスト, 言語のリスト)
+    イベントコメントストアの結果をそのまま返すので、呼び出し側で変更しないこと。
     """
-    gid, bin_id = event["group_id"], int(event["bin_id"])
-    bins = build_relative_time_bins(stream.df_valid["timestamp"], stream.nr_bins)
-    raw2g: Dict[int, int] = {}
-    for g_id, members in enumerate(stream.groups):
-        for t in members:
-            raw2g[t] = g_id
-    low, high = max(0, bin_id - peak_pad), min(stream.nr_bins - 1, bin_id + peak_pad)
-    comments: List[str] = []
-    langs: List[str] = []
-    # 1:1対応のため topics_valid は df_valid と同じ順
-    for i, row in stream.df_valid.iterrows():
-        topic_id = stream.topics_valid[i]
-        if topic_id == -1 or raw2g.get(topic_id, -1) != gid:
-            continue
-        ts = row["timestamp"]
-        b = None
-        for bi, iv in enumerate(bins):
-            if ts >= iv.left and ts < iv.right:
-                b = bi
-                break
-        if b is None:
-            centers = np.array([iv.left.value for iv in bins], dtype=np.int64)
-            b = int(np.argmin(np.abs(centers - int(ts.value))))
-        if low <= b <= high:
-            comments.append(row["message_clean"])
-            # 言語列があれば取得
-            lang = row.get("lang") if isinstance(row, pd.Series) else None
-            if lang is None and stream.languages is not None and i < len(stream.languages):
-                lang = stream.languages.iloc[i]
-            langs.append(lang if isinstance(lang, str) else "unk")
-    return comments, langs
-
-def js_distance(p: np.ndarray, q: np.ndarray) -> float:
+    entry = stream.event_comments.get(event["group_id"], event["bin_id"], peak_pad)
+    return entry.comments, entry.langs
+
+def event_embedding(stream: StreamData, rows: List[int]) -> np.ndarray:
     """
-    Jensen-Shannon距離を計算（精度向上版）
-    
-    改善内容：
-    1. NaN/Inf チェック
-    2. ゼロベクトル処理
-    3. Laplace smoothing
+    イベント行の埋め込みを gather して平均し、単位長に再正規化する。
+    （process_stream で計算済みの埋め込みを再利用し、モデルを再実行しない）
     """
-    p = p.astype(float)
-    q = q.astype(float)
-    
-    # ゼロベクトルチェック
-    p_sum = p.sum()
-    q_sum = q.sum()
-    
-    if p_sum == 0 or q_sum == 0:
-        # どちらかが空の場合は最大距離を返す
-        return 1.0
-    
-    # 正規化（Laplace smoothing適用）
-    smoothing = 1e-10
-    p = (p + smoothing) / (p_sum + smoothing * len(p))
-    q = (q + smoothing) / (q_sum + smoothing * len(q))
-    
-    # 中点分布
-    m = 0.5 * (p + q)
-    
-    # KLダイバージェンス計算（数値安定性向上）
-    with np.errstate(divide='ignore', invalid='ignore'):
-        kl_pm = np.sum(np.where(p > 0, p * np.log(p / m), 0.0))
-        kl_qm = np.sum(np.where(q > 0, q * np.log(q / m), 0.0))
-    
-    # NaN/Infチェック
-    if np.isnan(kl_pm) or np.isinf(kl_pm):
-        kl_pm = 0.0
-    if np.isnan(kl_qm) or np.isinf(kl_qm):
-        kl_qm = 0.0
-    
-    # JS距離
-    js_div = 0.5 * (kl_pm + kl_qm)
-    
-    # 負の値やNaNの処理
-    if js_div < 0 or np.isnan(js_div):
-        return 0.0
-    
-    js_dist = np.sqrt(js_div)
-    
-    # 最終チェック
-    if np.isnan(js_dist) or np.isinf(js_dist):
-        return 1.0
-    
-    return float(min(js_dist, 1.0))  # [0, 1]に制限
+    vecs = stream.embeddings[np.asarray(rows, dtype=np.intp)]
+    mean_vec = vecs.mean(axis=0)
+    norm = np.linalg.norm(mean_vec) + 1e-12
+    return mean_vec / norm
+
+def get_lexical_engine(top_n: int = 1000) -> LexicalEngine:
+    """top_n ごとに共有の LexicalEngine を取得（初回呼び出し時に生成）"""
+    engine = LEXICAL_ENGINES.get(top_n)
+    if engine is None:
+        engine = LexicalEngine(normalize_term, top_n=top_n, min_terms=7, min_vocab=5)
+        LEXICAL_ENGINES[top_n] = engine
+    return engine
 
 def compute_lexical_distance(comments_a: List[str], comments_b: List[str], top_n: int = 1000) -> float:
     """
     コメントリスト同士の語彙分布差（Jensen–Shannon距離）を計算する（精度向上版）
     
     改善内容：
-    1. 最小データ数チェック
+    1. 最小データ数チェック（各側最低7語、上位語彙最低5語）
     2. 空文字列除外の徹底
     3. 語彙の多様性チェック
+    4. 共有語彙 + 疎カウント行列（LexicalEngine）で同じコメント集合の再集計を省略
     """
-    # カウンター作成（改善版正規化を使用）
-    ca, cb = Counter(), Counter()
-    
-    for txt in comments_a:
-        if not isinstance(txt, str):
-            continue
-        for w in txt.split():
-            norm = normalize_term(w)
-            if norm:  # 空文字列除外
-                ca[norm] += 1
-    
-    for txt in comments_b:
-        if not isinstance(txt, str):
-            continue
-        for w in txt.split():
-            norm = normalize_term(w)
-            if norm:  # 空文字列除外
-                cb[norm] += 1
-    
-    # 最小データ数チェック（精度向上・調整済み）
-    min_words_threshold = 7  # 各側最低7単語（10から緩和）
-    if len(ca) < min_words_threshold or len(cb) < min_words_threshold:
-        # データ不足の場合は最大距離を返す
-        return 1.0
-    
-    # 語彙の組み合わせ
-    combined = ca + cb
-    
-    # 上位単語を最大 top_n まで
-    vocab = [w for w, _ in combined.most_common(top_n) if w]  # 空文字列除外
-    
-    if not vocab or len(vocab) < 5:  # 最低5単語必要
-        return 1.0
-    
-    # ベクトル作成
-    va = np.array([ca.get(w, 0) for w in vocab], dtype=float)
-    vb = np.array([cb.get(w, 0) for w in vocab], dtype=float)
-    
-    # JS距離計算（改善版を使用）
-    return js_distance(va, vb)
+    return get_lexical_engine(top_n).distance(comments_a, comments_b)
+
+def compute_lexical_distance_matrix(comment_lists: List[List[str]], top_n: int = 1000) -> np.ndarray:
+    """
+    複数のコメントリストの全ペア語彙 JS 距離行列（compute_lexical_distance を i < j で計算して対称化）
+    """
+    return get_lexical_engine(top_n).distance_matrix(comment_lists)
 
 # -------------------------
 # Event-to-Event Comparison（イベント間類似度計算）
@@ -1530,7 +1665,7 @@ def aggregate_event_representation(evts_dict: Dict[str, Dict[str, object]],
         
         # トピック語
         top_words = evt.get("top_words", [])
-        all_topics.update([normalize_term(w) for w in top_words if isinstance(w, str)])
+        all_topics.update(normalize_terms([w for w in top_words if isinstance(w, str)]))
         
         # 時間情報
         bin_ids.append(int(evt.get("bin_id", -1)))
@@ -2209,10 +2344,407 @@ def make_wordcloud(texts: List[str], out_png: str):
         # ワードクラウド生成に失敗した場合は警告のみ出力
         print(f"[WARN] wordcloud failed for {out_png}: {e}")
 
+def detect_stream_events(streams: Dict[str, StreamData], embedding_model: SentenceTransformer,
+                         n_events: int, focus_top: Optional[int], peak_pad: int,
+                         prominence: Optional[float] = None,
+                         min_distance: Optional[int] = None) -> Dict[str, List[Dict[str, object]]]:
+    """[events] 各ストリームのピークイベント抽出と、イベントごとの平均埋め込み・N-gramトピックの付与"""
+    # 各ストリームでイベント抽出（コメントが多い上位グループを優先）
+    events_by_stream: Dict[str, List[Dict[str, object]]] = {}
+    for key, sd in streams.items():
+        events_by_stream[key] = detect_events(sd, n_events=n_events, focus_top=focus_top,
+                                              prominence=prominence, min_distance=min_distance)
+        # 以降のステージはこのストアからコメントを参照する
+        sd.event_comments.build(events_by_stream[key], peak_pad)
+
+    # 各イベントにコメント埋め込みベクトルと独自N-gramトピックを付与する
+    # まずはイベントのコメントを抽出し、平均埋め込みを計算（normalize_embeddings=Trueであるため平均後も単位長に再正規化）
+    for stream_key, evts in events_by_stream.items():
+        for evt in evts:
+            try:
+                sd = streams[stream_key]
+                entry = sd.event_comments.get(evt["group_id"], evt["bin_id"], peak_pad)
+                rows, comments = entry.rows, entry.comments
+                if comments:
+                    # 埋め込みベクトル: process_stream の行対応埋め込みから gather
+                    # 平均した後、再正規化
+                    if sd.embeddings is not None:
+                        mean_vec = event_embedding(sd, rows)
+                    else:
+                        vecs = encode_texts(embedding_model, comments, batch_size=32)
+                        mean_vec = np.mean(vecs, axis=0)
+                        mean_vec = mean_vec / (np.linalg.norm(mean_vec) + 1e-12)
+
+                    # 【新機能】独自N-gram抽出でトピック語を取得
+                    # BERTopicではなく、TfidfVectorizerで直接N-gramフレーズを抽出
+                    # Phase 1.6: 動的top_k調整（コメント数に応じて適応的に設定）
+                    dynamic_top_k = max(5, min(30, len(comments) // 2))  # コメント数の1/2、最小5、最大30
+                    ngram_topics = extract_ngram_topics_direct(comments, top_k=dynamic_top_k)
+                    evt["topics"] = ngram_topics  # N-gramトピックを保存
+
+                    print(f"  [Event] {os.path.basename(stream_key)} event: {len(comments)} comments, {len(ngram_topics)} topics")
+                else:
+                    # コメントがない場合はゼロベクトル
+                    dim = embedding_model.get_sentence_embedding_dimension()
+                    mean_vec = np.zeros(dim, dtype=float)
+                    evt["topics"] = []
+                evt["embedding"] = mean_vec
+            except Exception as e:
+                # エラー時はembeddingとtopicsをNone/空に
+                print(f"  [ERROR] Failed to process event: {e}")
+                evt["embedding"] = None
+                evt["topics"] = []
+    return events_by_stream
+
+def run_events_stage(streams: Dict[str, StreamData], embedding_model: SentenceTransformer,
+                     n_events: int, focus_top: Optional[int], peak_pad: int,
+                     prominence: Optional[float] = None, min_distance: Optional[int] = None):
+    """[events] ステージを STAGE_CACHE 経由で実行し (キー, events_by_stream) を返す"""
+    cache = STAGE_CACHE if STAGE_CACHE is not None else StageCache(enabled=False)
+    events_key, events_by_stream = cache.run(
+        "events",
+        {"n_events": n_events, "focus_top": focus_top, "peak_pad": peak_pad,
+         "prominence": prominence, "min_distance": min_distance,
+         "streams": list(streams.keys()), "version": 1},
+        lambda: detect_stream_events(streams, embedding_model, n_events, focus_top, peak_pad,
+                                     prominence, min_distance),
+        parents=[streams[k].stage_key for k in streams],
+    )
+    # キャッシュから読み込んだ場合もイベントコメントストアを作っておく（作成済みのイベントはそのまま）
+    for key, evts in events_by_stream.items():
+        streams[key].event_comments.build(evts, peak_pad)
+    return events_key, events_by_stream
+
+def run_match_stage(events_key: str, events_by_stream: Dict[str, List[Dict[str, object]]],
+                    streams: Dict[str, StreamData], embedding_model: Optional[SentenceTransformer],
+                    word_match_th: float, time_match_th: int, embedding_match_th: Optional[float],
+                    use_translation: bool = False, translation_per_comment: bool = False,
+                    peak_pad: Optional[int] = None):
+    """[match] ステージを STAGE_CACHE 経由で実行し (キー, event_map) を返す"""
+    cache = STAGE_CACHE if STAGE_CACHE is not None else StageCache(enabled=False)
+    match_params = {"word_match_th": word_match_th, "time_match_th": time_match_th,
+                    "embedding_match_th": embedding_match_th,
+                    "use_translation": use_translation,
+                    "translation_per_comment": translation_per_comment, "version": 1}
+    # 翻訳時は上位語の言語をイベントコメントから決めるので peak_pad も結果に効く
+    if use_translation:
+        match_params["peak_pad"] = peak_pad
+    return cache.run(
+        "match", match_params,
+        lambda: match_events_across_streams(
+            events_by_stream,
+            word_match_th,
+            time_match_th,
+            embed_th=embedding_match_th,
+            streams=streams,
+            embedding_model=embedding_model,
+            peak_pad=peak_pad,
+        ),
+        parents=[events_key],
+    )
+
+def run_similarity_stage(match_key: str, events_by_sim_id: Dict[int, Dict[str, Dict[str, object]]],
+                         streams: Dict[str, StreamData], peak_pad: int) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """[similarity] ステージを STAGE_CACHE 経由で実行し (類似度行列, ペアデータ) を返す"""
+    cache = STAGE_CACHE if STAGE_CACHE is not None else StageCache(enabled=False)
+    _, (sim_matrix_df, event_pairs_df) = cache.run(
+        "similarity", {"peak_pad": peak_pad, "version": 1},
+        lambda: generate_event_similarity_matrix(events_by_sim_id, streams, peak_pad),
+        parents=[match_key],
+    )
+    return sim_matrix_df, event_pairs_df
+
+def group_events_by_sim_id(events_by_stream: Dict[str, List[Dict[str, object]]],
+                           event_map: Dict[Tuple[str, int], int]) -> Dict[int, Dict[str, Dict[str, object]]]:
+    """照合結果から 類似イベントID -> {stream_key: event} を作る"""
+    events_by_sim_id: Dict[int, Dict[str, Dict[str, object]]] = defaultdict(dict)
+    for stream_key, evts in events_by_stream.items():
+        for i, evt in enumerate(evts):
+            eid = event_map.get((stream_key, i))
+            if eid is None:
+                continue
+            events_by_sim_id[eid][stream_key] = evt
+    return events_by_sim_id
+
+def similar_event_detail_rows(sim_id: int, evts_dict: Dict[str, Dict[str, object]],
+                              streams: Dict[str, StreamData]) -> List[Dict[str, object]]:
+    """類似イベント1件について、配信者ごとのbin範囲・ラベル・上位語の詳細行を作る（不参加の配信者は空欄）"""
+    rows: List[Dict[str, object]] = []
+    for sk in streams.keys():
+        base_name = os.path.basename(sk)
+        if sk in evts_dict:
+            evt_info = evts_dict[sk]
+            stream_obj = streams[sk]
+            bins = stream_obj.bins
+            b = int(evt_info.get("bin_id", -1))
+            if 0 <= b < len(bins):
+                interval = bins[b]
+                t0 = stream_obj.df_valid["timestamp"].min()
+                bin_start_sec = int((interval.left - t0).total_seconds())
+                bin_end_sec = int((interval.right - t0).total_seconds())
+            else:
+                bin_start_sec = None
+                bin_end_sec = None
+            gid_local = int(evt_info.get("group_id", -1))
+            label_local = str(evt_info.get("label", ""))
+            top_words_local = stream_obj.group_top_words.get(gid_local, [])[:5]
+            rows.append({
+                "sim_event_id": sim_id,
+                "stream": base_name,
+                "bin_id": b,
+                "bin_start_sec": bin_start_sec if bin_start_sec is not None else "",
+                "bin_end_sec": bin_end_sec if bin_end_sec is not None else "",
+                "label": label_local,
+                "top_words": " ".join(top_words_local),
+            })
+        else:
+            rows.append({
+                "sim_event_id": sim_id,
+                "stream": base_name,
+                "bin_id": "",
+                "bin_start_sec": "",
+                "bin_end_sec": "",
+                "label": "",
+                "top_words": "",
+            })
+    return rows
+
+# -------------------------
+# パラメータスイープ（重いステージは1回だけ計算し、照合パラメータの組み合わせをプロセス内で評価）
+# -------------------------
+_SWEEP_STATE: Dict[str, object] = {}  # スイープ用ワーカーが保持するストリームとイベント
+
+def rebin_streams(streams: Dict[str, StreamData], nr_bins: int) -> Dict[str, StreamData]:
+    """全ストリームを別の bin 数で作り直す（キャッシュ済みのトピック割り当てを再利用）"""
+    return {k: (sd if sd.nr_bins == nr_bins else sd.rebin(nr_bins)) for k, sd in streams.items()}
+
+def evaluate_sweep_point(streams: Dict[str, StreamData], events_key: str,
+                         events_by_stream: Dict[str, List[Dict[str, object]]], point: Dict[str, object],
+                         peak_pad: int, out_dir: Optional[str] = None,
+                         embedding_model: Optional[SentenceTransformer] = None,
+                         use_translation: bool = False, translation_per_comment: bool = False) -> Dict[str, object]:
+    """
+    グリッド1点について [match] → [similarity] を実行し、集計値を返す
+
+    out_dir を指定すると similar_event_details / event_to_event_pairs /
+    event_to_event_similarity_matrix をそのディレクトリに保存する（main() と同じ列構成）。
+    """
+    match_key, event_map = run_match_stage(events_key, events_by_stream, streams, embedding_model,
+                                           point["word_match_th"], point["time_match_th"],
+                                           point["embedding_match_th"], use_translation, translation_per_comment,
+                                           peak_pad)
+    events_by_sim_id = group_events_by_sim_id(events_by_stream, event_map)
+    shared = {sid: evts for sid, evts in events_by_sim_id.items() if len(evts) >= 2}
+    details_df = pd.DataFrame([row for sid, evts in shared.items()
+                               for row in similar_event_detail_rows(sid, evts, streams)])
+    # 2件未満ではペアが作れない
+    if len(shared) >= 2:
+        sim_matrix_df, pairs_df = run_similarity_stage(match_key, events_by_sim_id, streams, peak_pad)
+    else:
+        sim_matrix_df, pairs_df = pd.DataFrame(), pd.DataFrame()
+
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+        save_table(details_df, os.path.join(out_dir, "similar_event_details.csv"))
+        if not pairs_df.empty:
+            save_table(pairs_df, os.path.join(out_dir, "event_to_event_pairs.csv"))
+            save_table(sim_matrix_df, os.path.join(out_dir, "event_to_event_similarity_matrix.csv"), index=True)
+
+    summary = dict(point)
+    summary.update({
+        "n_events_total": sum(len(evts) for evts in events_by_stream.values()),
+        "n_similar_events": len(shared),
+        "n_pairs": len(pairs_df),
+        "avg_combined_score": float(pairs_df["combined_score"].mean()) if len(pairs_df) else np.nan,
+        "avg_embedding_similarity": (float(pairs_df["embedding_similarity"].mean())
+                                     if len(pairs_df) else np.nan),
+        "out_dir": out_dir or "",
+    })
+    return summary
+
+def _init_sweep_worker(streams_by_bins: Dict[int, Dict[str, StreamData]],
+                       events_by_setting: Dict[Tuple[int, int], Tuple[str, object]],
+                       stage_cache_dir: Optional[str]):
+    """スイープ用ワーカー初期化: bin 数ごとのストリームと (bin 数, n_events) ごとのイベントを1回だけ受け取る"""
+    global STAGE_CACHE
+    _SWEEP_STATE["streams_by_bins"] = streams_by_bins
+    _SWEEP_STATE["events_by_setting"] = events_by_setting
+    STAGE_CACHE = StageCache(stage_cache_dir) if stage_cache_dir else StageCache(enabled=False)
+
+def _evaluate_sweep_state_point(point: Dict[str, object], out_dir: str, peak_pad: int) -> Dict[str, object]:
+    events_key, events_by_stream = _SWEEP_STATE["events_by_setting"][(point["time_bins"], point["n_events"])]
+    return evaluate_sweep_point(_SWEEP_STATE["streams_by_bins"][point["time_bins"]], events_key,
+                                events_by_stream, point, peak_pad, out_dir)
+
+def _sweep_point_worker(point: Dict[str, object], out_dir: str, peak_pad: int) -> Tuple[Dict[str, object], str]:
+    """ワーカーでグリッド1点を評価し、ログは親プロセスでグリッド順に出すためバッファして返す"""
+    return call_with_buffered_log(_evaluate_sweep_state_point, point, out_dir, peak_pad)
+
+def run_parameter_sweep(csv_files: List[str], grid: Dict[str, List[object]],
+                        out_root: str = os.path.join("output", "sweep"), workers: int = 1,
+                        args=None, embedding_model: Optional[SentenceTransformer] = None) -> pd.DataFrame:
+    """
+    照合パラメータのグリッドをプロセス内で評価する（最適化スクリプト用のライブラリAPI）
+
+    clean → embed → topic → timeseries は1回だけ計算し、time_bins を変える場合はキャッシュ済みの
+    トピック割り当てから再ビン化する（BERTopic は再学習しない）。[events] は (time_bins, n_events) ごとに
+    1回だけ計算し、embedding_match_th / time_match_th / word_match_th の各組み合わせで
+    [match] → [similarity] を実行する。各グリッド点の出力は out_root/<sweep_point_name> に分けて保存し、
+    output/ 直下の共有ファイルは上書きしない。
+
+    Args:
+        csv_files (list): 比較するCSV
+        grid (dict): {引数名: 値のリスト}（SWEEP_PARAMS のみ、指定のない引数は args の値）
+        out_root (str): スイープ出力のルートディレクトリ
+        workers (int): グリッド点を並列評価するプロセス数（1で逐次）
+        args: parse_args() の結果（None なら --files csv_files の既定値）。grid にない引数の既定値
+        embedding_model: 読み込み済みの埋め込みモデル（None ならロード）
+
+    Returns:
+        DataFrame: グリッド点ごとの集計（out_root/sweep_summary.csv にも保存）
+    """
+    global OUT_DIR
+    if args is None:
+        args = parse_args(["--files", *csv_files])
+    points = expand_sweep_grid(grid, args)
+    if embedding_model is None:
+        embedding_model = SentenceTransformer(EMB_NAME)
+    init_runtime(args)
+
+    # 配信ごとのタイムライン等もスイープの名前空間に出力
+    prev_out_dir, OUT_DIR = OUT_DIR, out_root
+    try:
+        streams = process_streams(args.files, embedding_model, args)
+    finally:
+        OUT_DIR = prev_out_dir
+    if len(streams) < 2:
+        print("[Sweep] Need at least two valid streams to compare events.")
+        return pd.DataFrame()
+
+    streams_by_bins = {tb: rebin_streams(streams, tb) for tb in sorted({p["time_bins"] for p in points})}
+    events_by_setting = {
+        (tb, n): run_events_stage(streams_by_bins[tb], embedding_model, n, args.focus_top, args.peak_pad,
+                                  args.peak_prominence, args.peak_min_distance)
+        for tb, n in sorted({(p["time_bins"], p["n_events"]) for p in points})
+    }
+    workers = min(max(1, workers), len(points))
+    if workers > 1 and TRANSLATION_BRIDGE is not None:
+        # 翻訳モデルはワーカーへ渡せないため逐次実行
+        print("[Sweep] Translation Bridge is enabled; evaluating grid points sequentially")
+        workers = 1
+    print(f"[Sweep] Evaluating {len(points)} grid points with {workers} process(es)")
+
+    def evaluate(point: Dict[str, object], out_dir: str) -> Dict[str, object]:
+        events_key, events_by_stream = events_by_setting[(point["time_bins"], point["n_events"])]
+        return evaluate_sweep_point(streams_by_bins[point["time_bins"]], events_key, events_by_stream,
+                                    point, args.peak_pad, out_dir, embedding_model,
+                                    args.use_translation, args.translation_per_comment)
+
+    stage_cache_dir = None if args.no_stage_cache else args.stage_cache_dir
+    return evaluate_sweep_points(points, out_root, evaluate, workers=workers,
+                                 worker=functools.partial(_sweep_point_worker, peak_pad=args.peak_pad),
+                                 initializer=_init_sweep_worker,
+                                 initargs=(streams_by_bins, events_by_setting, stage_cache_dir))
+
+# -------------------------
+# ライブ（オンライン）イベント検出
+# -------------------------
+LIVE_EVENT_COLUMNS = ["stream", "group_id", "bin_id", "peak_time", "label", "count", "score",
+                      "detected_bin", "latency_sec", "comments"]
+
+def clean_live_batch(df: pd.DataFrame, workers: int = 1) -> pd.DataFrame:
+    """追記分のバッチに clean_stream と同じ前処理（タイムスタンプ正規化・前処理・ノイズ除去）を適用"""
+    if df.empty or "message" not in df.columns or "timestamp" not in df.columns:
+        return df.iloc[0:0]
+    df = df.copy()
+    ts = pd.to_datetime(df["timestamp"], errors="coerce", utc=True, format="mixed")
+    df["timestamp"] = ts.dt.tz_localize(None)
+    df = df.dropna(subset=["timestamp", "message"])
+    df["message_clean"] = text_preprocess.preprocess_texts(df["message"].astype(str), segment=True,
+                                                           workers=workers)
+    df = df[df["message_clean"].str.len() > 0]
+    return df[~NOISE_FILTER.noise_mask(df["message_clean"])]
+
+def build_live_topic_grouper(args, embedding_model: SentenceTransformer) -> IncrementalTopicModel:
+    """
+    ライブ検出用の BERTopic グループ割り当て
+
+    --live-topic-model があれば保存済みモデルで最初から transform、なければ最初の --live-topic-warmup 件で学習する。
+    どちらもドリフト時だけ直近のコメントで再学習する。
+    """
+    def encode(texts: List[str]) -> np.ndarray:
+        return embedding_model.encode(texts, batch_size=64, show_progress_bar=False, normalize_embeddings=True)
+
+    model = None
+    if args.live_topic_model:
+        model = BERTopic.load(args.live_topic_model, embedding_model=embedding_model)
+    return IncrementalTopicModel(lambda t, e: fit_topic_model(t, e, embedding_model), encode=encode,
+                                 model=model, warmup=args.live_topic_warmup or 2000,
+                                 drift_threshold=args.topic_drift_th, max_groups=args.live_max_groups)
+
+def run_live_stream(csv_file: str, args, embedding_model: Optional[SentenceTransformer] = None) -> int:
+    """
+    追記中のチャットCSV 1本を追いかけ、イベントを検出するたびに表示・追記保存する
+
+    embedding_model があればグループは BERTopic のトピック（build_live_topic_grouper）、なければコメント内の語。
+
+    Returns:
+        int: 検出したイベント数
+    """
+    base = os.path.basename(csv_file).replace(".csv", "")
+    out_csv = os.path.join(OUT_DIR, "live", f"{base}_live_events.csv")
+    os.makedirs(os.path.dirname(out_csv), exist_ok=True)
+    if embedding_model is not None:
+        grouper = build_live_topic_grouper(args, embedding_model)
+    else:
+        grouper = TermGrouper(max_groups=args.live_max_groups, normalize=normalize_term,
+                              stopwords=NOISE_FILTER.is_stopword)
+    detector = OnlineEventDetector(bin_seconds=args.live_bin_seconds, window_bins=args.live_window_bins,
+                                   z_threshold=args.live_z_threshold, min_count=args.live_min_count,
+                                   prominence=args.peak_prominence,
+                                   min_distance=args.peak_min_distance or 5,
+                                   grouper=grouper, peak_pad=args.peak_pad)
+    print(f"[Live] Following {base} (bin={args.live_bin_seconds:g}s, "
+          f"max latency {detector.latency_bins} bins after the peak bin)")
+    n_events = 0
+
+    def emit(events: List[Dict[str, object]]):
+        nonlocal n_events
+        if not events:
+            return
+        for evt in events:
+            print(f"[Live] {base}: '{evt['label']}' peak at {evt['peak_time']} "
+                  f"(count={evt['count']:.0f}, z={evt['score']:.1f}, latency={evt['latency_sec']:.0f}s)")
+        rows = pd.DataFrame([{**evt, "stream": base, "comments": " / ".join(evt["comments"][:5])}
+                             for evt in events])[LIVE_EVENT_COLUMNS]
+        # 追記時に BOM を途中へ書かないよう、新規作成時だけ utf-8-sig
+        exists = os.path.exists(out_csv)
+        rows.to_csv(out_csv, mode="a", header=not exists, index=False,
+                    encoding="utf-8" if exists else "utf-8-sig")
+        n_events += len(events)
+
+    for batch in follow_csv(csv_file, poll_seconds=args.live_poll_seconds, idle_timeout=args.live_idle_timeout):
+        emit(detector.ingest(clean_live_batch(batch, workers=args.workers)))
+    emit(detector.flush())
+    stats = detector.get_stats()
+    print(f"[Live] {base} finished: {stats['comments']} comments, {n_events} events "
+          f"({stats['late']} late comments) -> {out_csv}")
+    return n_events
+
+def run_live(args):
+    """--live: 各CSVを並行して追いかける（ファイルごとに1スレッド、埋め込みモデルはトピック割り当て時のみ）"""
+    from concurrent.futures import ThreadPoolExecutor
+    embedding_model = None
+    if args.live_topic_model or args.live_topic_warmup:
+        embedding_model = SentenceTransformer(EMB_NAME)
+    with ThreadPoolExecutor(max_workers=len(args.files)) as ex:
+        totals = list(ex.map(lambda f: run_live_stream(f, args, embedding_model), args.files))
+    print(f"[Live] Done: {sum(totals)} events from {len(args.files)} streams")
+
 # -------------------------
 # 引数処理
 # -------------------------
-def parse_args():
+def parse_args(argv: Optional[List[str]] = None):
     p = argparse.ArgumentParser(description="Compare events across multiple streams for the same match.")
     # 複数ファイル or フォルダ＋パターン
     p.add_argument("--files", nargs="+", help="分析するCSVを複数指定（スペース区切り）")
@@ -2235,12 +2767,69 @@ def parse_args():
                    help="matched_event_presence.png に表示する上位イベント数（コメント総数の多い順、0で制限なし）")
     # 上位グループに限定する数（例: 10→コメント数が多い上位10グループのみ）
     p.add_argument("--focus-top", type=int, default=10, help="ピーク検出を行う対象グループ数（Noneの場合は全グループ）")
+    # ピーク検出の絞り込み（未指定なら従来どおり局所最大の上位 n-events）
+    p.add_argument("--peak-prominence", type=float, default=None,
+                   help="平滑化後のコメント数でこれ未満のプロミネンスのピークを除外")
+    p.add_argument("--peak-min-distance", type=int, default=None,
+                   help="同じグループ内のピーク同士の最小間隔（bin数、強いピークを優先）")
     # Emoji timeline 可視化設定
     p.add_argument("--emoji-topk", type=int, default=10, help="各配信の絵文字タイムラインに表示する上位絵文字数")
     # Translation Bridge (多言語対応)
+    # 言語検出（キャッシュ + 並列化）
+    p.add_argument("--lang-cache", type=str, default=os.path.join("cache", "language", "lang_cache.sqlite"),
+                   help="言語検出結果のキャッシュファイル（SQLite）")
+    p.add_argument("--lang-workers", type=int, default=1,
+                   help="未キャッシュの言語検出に使うプロセス数")
     p.add_argument("--use-translation", action="store_true", 
                    help="Translation Bridgeを有効化（多言語イベントマッチング、Topic Jaccard改善に有効）")
-    args = p.parse_args()
+    p.add_argument("--translation-per-comment", action="store_true",
+                   help="翻訳時にコメントごとに言語を判定し、言語別にまとめて翻訳（多言語が混在するイベント向け）")
+    p.add_argument("--translation-max-models", type=int, default=None,
+                   help="同時にメモリへ載せる翻訳モデル数の上限（超えたら最も古いモデルを解放, 既定: 無制限）")
+    # ライブ（オンライン）イベント検出
+    p.add_argument("--live", action="store_true",
+                   help="追記中のCSV（収集スクリプトが書き込み中）を追いかけ、配信中にイベントを検出して output/live に追記")
+    p.add_argument("--live-bin-seconds", type=float, default=30.0, help="ライブ検出の1ビンの秒数")
+    p.add_argument("--live-window-bins", type=int, default=120,
+                   help="ライブ検出で保持するビン数（基準値の計算範囲、メモリはこれで一定）")
+    p.add_argument("--live-z-threshold", type=float, default=3.0,
+                   help="平滑化したコメント数が 基準平均+z×標準偏差（下限1） 以上ならイベント")
+    p.add_argument("--live-min-count", type=float, default=5.0, help="イベントとみなす平滑化コメント数の下限")
+    p.add_argument("--live-max-groups", type=int, default=64, help="ライブ検出で同時に追跡する語（グループ）数")
+    p.add_argument("--live-poll-seconds", type=float, default=2.0, help="CSVの追記を確認する間隔（秒）")
+    p.add_argument("--live-idle-timeout", type=float, default=600.0,
+                   help="この秒数だけCSVが増えなければ配信終了とみなす")
+    p.add_argument("--live-topic-model", type=str, default=None,
+                   help="ライブ検出のグループに使う保存済みBERTopicモデル（--save-topic-model-dir で保存したもの）")
+    p.add_argument("--live-topic-warmup", type=int, default=0,
+                   help="ライブ検出のグループを BERTopic のトピックにし、最初のこの件数で学習（学習までのコメントは集計しない、0で語ごとのグループ）")
+    # BERTopic の逐次割り当て（ウォームアップで1回だけ学習し、ドリフト時だけ再学習）
+    p.add_argument("--topic-warmup", type=int, default=None,
+                   help="時刻順で最初のこの件数だけで BERTopic を学習し、残りは transform で割り当てる（未指定なら全件で学習）")
+    p.add_argument("--topic-drift-th", type=float, default=0.15,
+                   help="外れ値の割合の増加・トピック重心との類似度の低下がこれを超えたら直近のコメントで再学習")
+    p.add_argument("--save-topic-model-dir", type=str, default=None,
+                   help="配信ごとの学習済みBERTopicモデルの保存先（--live-topic-model で再利用）")
+    # ステージキャッシュ（途中ステージからの再開）
+    p.add_argument("--stage-cache-dir", type=str, default=os.path.join("cache", "stages"),
+                   help="各ステージ出力のチェックポイント保存先（入力ファイルの内容と引数のハッシュで管理）")
+    p.add_argument("--no-stage-cache", action="store_true",
+                   help="ステージキャッシュを無効化（毎回CSVから全ステージを再計算）")
+    p.add_argument("--stage-cache-max-gb", type=float, default=None,
+                   help="チェックポイントの合計サイズの上限（GB）。超えたら最も長く使われていないものから削除"
+                        "（未指定なら削除しない。不要になったら --stage-cache-dir を手動で削除）")
+    # 複数ストリームの並列処理
+    p.add_argument("--workers", type=int, default=1,
+                   help="process_stream をファイル単位で並列実行するプロセス数（1で逐次、ワーカーごとに埋め込みモデルをロード）。"
+                        "ファイルが1つの場合は前処理をこのプロセス数で並列化")
+    # 埋め込みキャッシュ（再実行時にエンコードを省略）
+    p.add_argument("--embedding-cache-dir", type=str, default=os.path.join("cache", "embeddings"),
+                   help="コメント埋め込みの永続キャッシュ先ディレクトリ")
+    p.add_argument("--embedding-cache-dtype", type=str, default="float32", choices=["float16", "float32"],
+                   help="キャッシュの保存精度（float16でディスク使用量半減）")
+    p.add_argument("--no-embedding-cache", action="store_true",
+                   help="埋め込みキャッシュを無効化（毎回エンコード）")
+    args = p.parse_args(argv)
 
     # --folder/--pattern を --files に展開
     if (not args.files) and args.folder:
@@ -2258,77 +2847,62 @@ def parse_args():
 # -------------------------
 # メイン
 # -------------------------
-def main():
-    args = parse_args()
-    embedding_model = SentenceTransformer(EMB_NAME)
+def init_runtime(args):
+    """言語検出・ステージキャッシュ・埋め込みキャッシュ・Translation Bridge を args に従って初期化"""
+    # 言語検出サービス初期化
+    get_language_identifier(cache_path=args.lang_cache, seed=42, workers=args.lang_workers)
+
+    # ステージキャッシュ初期化（clean → embed → topic → timeseries → events → match → similarity → report）
+    global STAGE_CACHE
+    # 上限による削除は親プロセスだけで行う（ワーカーは保存のみ）
+    max_bytes = None if args.stage_cache_max_gb is None else int(args.stage_cache_max_gb * 2**30)
+    STAGE_CACHE = StageCache(args.stage_cache_dir, enabled=not args.no_stage_cache, max_bytes=max_bytes)
+    if STAGE_CACHE.enabled:
+        print(f"[Stage Cache] Checkpoints in {args.stage_cache_dir}")
+
+    # 埋め込みキャッシュ初期化
+    global EMBEDDING_CACHE
+    if not args.no_embedding_cache:
+        EMBEDDING_CACHE = EmbeddingCache(EMB_NAME, cache_dir=args.embedding_cache_dir,
+                                         dtype=args.embedding_cache_dtype)
+        print(f"[Embedding Cache] {len(EMBEDDING_CACHE)} cached embeddings in {EMBEDDING_CACHE.cache_dir}")
     
     # Translation Bridge初期化
     global TRANSLATION_BRIDGE
     if args.use_translation:
         print("\n[Translation Bridge] Initializing...")
-        TRANSLATION_BRIDGE = TranslationBridge()
+        TRANSLATION_BRIDGE = TranslationBridge(max_resident_models=args.translation_max_models,
+                                               per_comment=args.translation_per_comment)
         print("[Translation Bridge] Ready for cross-lingual event matching\n")
     else:
         print("\n[Translation Bridge] Disabled (use --use-translation to enable)\n")
 
+def main():
+    args = parse_args()
+    if args.live:
+        run_live(args)
+        return
+    embedding_model = SentenceTransformer(EMB_NAME)
+    init_runtime(args)
+
     # ストリーム処理
-    streams: Dict[str, StreamData] = {}
-    for csv_file in args.files:
-        if not os.path.exists(csv_file):
-            print(f"File not found: {csv_file}"); continue
-        sd = process_stream(csv_file, embedding_model, args.jaccard_th, args.time_bins, topk_plot=args.topk)
-        if sd: streams[csv_file] = sd
+    streams = process_streams(args.files, embedding_model, args)
     if len(streams) < 2:
         print("Need at least two valid streams to compare events."); return
 
-    # 各ストリームでイベント抽出（コメントが多い上位グループを優先）
-    events_by_stream: Dict[str, List[Dict[str, object]]] = {}
-    for key, sd in streams.items():
-        events_by_stream[key] = detect_events(sd, n_events=args.n_events, focus_top=args.focus_top)
-
-    # 各イベントにコメント埋め込みベクトルと独自N-gramトピックを付与する
-    # まずはイベントのコメントを抽出し、平均埋め込みを計算（normalize_embeddings=Trueであるため平均後も単位長に再正規化）
-    for stream_key, evts in events_by_stream.items():
-        for evt in evts:
-            try:
-                comments, _langs = extract_event_comments(streams[stream_key], evt, args.peak_pad)
-                if comments:
-                    # 埋め込みベクトル（既存の処理）
-                    vecs = embedding_model.encode(comments, batch_size=32, show_progress_bar=False, normalize_embeddings=True)
-                    # 2D array (n_comments x dim)
-                    # 平均した後、再正規化
-                    mean_vec = np.mean(vecs, axis=0)
-                    norm = np.linalg.norm(mean_vec) + 1e-12
-                    mean_vec = mean_vec / norm
-
-                    # 【新機能】独自N-gram抽出でトピック語を取得
-                    # BERTopicではなく、TfidfVectorizerで直接N-gramフレーズを抽出
-                    # Phase 1.6: 動的top_k調整（コメント数に応じて適応的に設定）
-                    dynamic_top_k = max(5, min(30, len(comments) // 2))  # コメント数の1/2、最小5、最大30
-                    ngram_topics = extract_ngram_topics_direct(comments, top_k=dynamic_top_k)
-                    evt["topics"] = ngram_topics  # N-gramトピックを保存
-
-                    print(f"  [Event] {os.path.basename(stream_key)} event: {len(comments)} comments, {len(ngram_topics)} topics")
-                else:
-                    # コメントがない場合はゼロベクトル
-                    dim = embedding_model.get_sentence_embedding_dimension()
-                    mean_vec = np.zeros(dim, dtype=float)
-                    evt["topics"] = []
-                evt["embedding"] = mean_vec
-            except Exception as e:
-                # エラー時はembeddingとtopicsをNone/空に
-                print(f"  [ERROR] Failed to process event: {e}")
-                evt["embedding"] = None
-                evt["topics"] = []
-    # 共通イベント照合
-    event_map = match_events_across_streams(
-        events_by_stream,
-        args.word_match_th,
-        args.time_match_th,
-        embed_th=args.embedding_match_th,
-        streams=streams,
-        embedding_model=embedding_model,
-    )
+    # イベント抽出 [events]
+    events_key, events_by_stream = run_events_stage(streams, embedding_model, args.n_events,
+                                                    args.focus_top, args.peak_pad,
+                                                    args.peak_prominence, args.peak_min_distance)
+    if EMBEDDING_CACHE is not None:
+        EMBEDDING_CACHE.flush()  # ストリーム・イベントごとのミスを1シャードにまとめて保存
+        cache_stats = EMBEDDING_CACHE.get_stats()
+        print(f"[Embedding Cache] hits={cache_stats['hits']}, misses={cache_stats['misses']} "
+              f"(hit ratio {cache_stats['hit_ratio']:.1%})")
+    # 共通イベント照合 [match]（閾値を変えた場合はここから下流だけを再計算）
+    match_key, event_map = run_match_stage(events_key, events_by_stream, streams, embedding_model,
+                                           args.word_match_th, args.time_match_th, args.embedding_match_th,
+                                           args.use_translation, args.translation_per_comment, args.peak_pad)
     if not event_map:
         print("一致する共通イベントが見つかりませんでした。閾値（--time-match-th, --word-match-th, --jaccard-th）を調整して再実行してください。")
         return
@@ -2372,29 +2946,11 @@ def main():
         # 距離行列（語彙・言語・絵文字のスタイル差）
         keys = list(streams_comments.keys())
         n = len(keys)
-        dmat = np.zeros((n, n), dtype=float)
-        lang_mat = np.zeros((n, n), dtype=float)
-        emoji_mat = np.zeros((n, n), dtype=float)
-        for i in range(n):
-            for j in range(n):
-                if i == j:
-                    dmat[i, j] = 0.0
-                    lang_mat[i, j] = 0.0
-                    emoji_mat[i, j] = 0.0
-                elif i < j:
-                    # 語彙差
-                    d = compute_lexical_distance(streams_comments[keys[i]], streams_comments[keys[j]])
-                    dmat[i, j] = d; dmat[j, i] = d
-                    # 言語分布差
-                    lang_dist_a = compute_language_distribution(streams_langs[keys[i]])
-                    lang_dist_b = compute_language_distribution(streams_langs[keys[j]])
-                    ld = js_distance_distribution(lang_dist_a, lang_dist_b)
-                    lang_mat[i, j] = ld; lang_mat[j, i] = ld
-                    # 絵文字比率差
-                    er_a = compute_emoji_ratio(streams_comments[keys[i]])
-                    er_b = compute_emoji_ratio(streams_comments[keys[j]])
-                    emoji_diff = abs(er_a - er_b)
-                    emoji_mat[i, j] = emoji_diff; emoji_mat[j, i] = emoji_diff
+        # 配信ごとの特徴量を1回だけ計算し、言語・絵文字の距離は配列演算で一括計算
+        features = {k: extract_event_features(streams_comments[k], streams_langs[k]) for k in keys}
+        lang_mat, emoji_mat = feature_distance_matrices([features[k] for k in keys])
+        # 語彙差（同じコメント集合の集計・ペア距離はエンジン内でキャッシュ）
+        dmat = compute_lexical_distance_matrix([streams_comments[k] for k in keys])
 
         # 平均距離などを結果に
         tril = dmat[np.tril_indices(n, k=-1)]
@@ -2413,8 +2969,8 @@ def main():
         }
         # 各ペアごとの値を追加
         # 事前に各配信の感情・スタイル特徴を計算
-        sentiments = {k: compute_sentiment_metrics(streams_comments[k]) for k in keys}
-        styles = {k: compute_style_profile(streams_comments[k]) for k in keys}
+        sentiments = {k: features[k]["sentiment"] for k in keys}
+        styles = {k: features[k]["style"] for k in keys}
         for i in range(n):
             for j in range(i+1, n):
                 name = f"{os.path.basename(keys[i])} vs {os.path.basename(keys[j])}"
@@ -2447,7 +3003,7 @@ def main():
     else:
         results_df = pd.DataFrame(results)
     out_csv = os.path.join(OUT_DIR, "event_comparison_results.csv")
-    results_df.to_csv(out_csv, index=False, encoding="utf-8-sig")
+    save_table(results_df, out_csv)
     print(f"Saved: {out_csv}")
 
     # 共通イベント presence ヒートマップ
@@ -2482,11 +3038,8 @@ def main():
                 comments[k] = cmt
             else:
                 comments[k] = []
-        for i in range(n):
-            for j in range(i+1, n):
-                d = compute_lexical_distance(comments[stream_keys[i]], comments[stream_keys[j]])
-                acc[i, j] += d; acc[j, i] += d
-                cnt[i, j] += 1; cnt[j, i] += 1
+        acc += compute_lexical_distance_matrix([comments[k] for k in stream_keys])
+        cnt += 1 - np.eye(n, dtype=int)
     # [DISABLED] event_comparison_results.png - ユーザー要望により無効化
     # with np.errstate(divide='ignore', invalid='ignore'):
     #     avg = np.where(cnt>0, acc/np.maximum(cnt,1), 0.0)
@@ -2555,25 +3108,13 @@ def main():
         # 距離行列を計算
         keys = list(streams.keys())
         n = len(keys)
-        dmat = np.zeros((n, n), dtype=float)
-        lang_mat = np.zeros((n, n), dtype=float)
-        emoji_mat = np.zeros((n, n), dtype=float)
-        for i in range(n):
-            for j in range(i+1, n):
-                d = compute_lexical_distance(comments_by_stream[keys[i]], comments_by_stream[keys[j]])
-                dmat[i, j] = d; dmat[j, i] = d
-                ld = js_distance_distribution(
-                    compute_language_distribution(langs_by_stream[keys[i]]),
-                    compute_language_distribution(langs_by_stream[keys[j]])
-                )
-                lang_mat[i, j] = ld; lang_mat[j, i] = ld
-                ediff = abs(
-                    compute_emoji_ratio(comments_by_stream[keys[i]]) - compute_emoji_ratio(comments_by_stream[keys[j]])
-                )
-                emoji_mat[i, j] = ediff; emoji_mat[j, i] = ediff
+        # 配信ごとの特徴量を1回だけ計算し、言語・絵文字の距離は配列演算で一括計算
+        features = {k: extract_event_features(comments_by_stream[k], langs_by_stream[k]) for k in keys}
+        lang_mat, emoji_mat = feature_distance_matrices([features[k] for k in keys])
+        dmat = compute_lexical_distance_matrix([comments_by_stream[k] for k in keys])
         # 感情・スタイル特徴（ペア距離算出用）
-        sentiments = {k: compute_sentiment_metrics(comments_by_stream.get(k, [])) for k in keys}
-        styles = {k: compute_style_profile(comments_by_stream.get(k, [])) for k in keys}
+        sentiments = {k: features[k]["sentiment"] for k in keys}
+        styles = {k: features[k]["style"] for k in keys}
         # === 追加: この一致イベント（同一group×bin）の"時間帯"と"各配信のラベル(上位語)"、"類似度(1-JS距離)"を注釈として作成 ===
         # 参加配信（コメントが存在する＝presence=1）の抽出
         present_streams_basename: List[str] = []
@@ -2589,7 +3130,7 @@ def main():
         for sk in present_streams_keys:
             evt_info = evts_dict[sk]
             stream_obj = streams[sk]
-            bins = build_relative_time_bins(stream_obj.df_valid["timestamp"], stream_obj.nr_bins)
+            bins = stream_obj.bins
             b_local = int(evt_info.get("bin_id", -1))
             if 0 <= b_local < len(bins):
                 interval = bins[b_local]
@@ -2605,7 +3146,7 @@ def main():
                 short = ",".join(top_words_local)
             else:
                 raw_label = str(evt_info.get("label", ""))
-                toks = [normalize_term(w) for w in re.split(r"[\s・,，。!！?？]+", raw_label) if w]
+                toks = normalize_terms([w for w in re.split(r"[\s・,，。!！?？]+", raw_label) if w])
                 toks = [t for t in toks if len(t) > 1][:2]
                 short = ",".join(toks) if toks else "topic"
             stream_label_map[os.path.basename(sk)] = short
@@ -2805,7 +3346,7 @@ def main():
                 evt_info = evts_dict[sk]
                 stream_obj = streams[sk]
                 # bin境界を取得
-                bins = build_relative_time_bins(stream_obj.df_valid["timestamp"], stream_obj.nr_bins)
+                bins = stream_obj.bins
                 b = int(evt_info.get("bin_id", -1))
                 if 0 <= b < len(bins):
                     interval = bins[b]
@@ -2949,14 +3490,10 @@ def main():
     print("Matching events across streams by topic similarity and time ...")
     print(f"[DEBUG] Matching parameters: word_match_th={args.word_match_th}, time_match_th={args.time_match_th}, embedding_match_th={args.embedding_match_th}")
     print(f"[DEBUG] Total events: {sum(len(evts) for evts in events_by_stream.values())}")
-    similar_event_map = match_events_across_streams(
-        events_by_stream, 
-        args.word_match_th, 
-        args.time_match_th, 
-        args.embedding_match_th,
-        streams=streams,
-        embedding_model=embedding_model
-    )
+    # 同じ引数の照合なので、ステージキャッシュ有効時は [match] の結果をそのまま再利用
+    _, similar_event_map = run_match_stage(events_key, events_by_stream, streams, embedding_model,
+                                           args.word_match_th, args.time_match_th, args.embedding_match_th,
+                                           args.use_translation, args.translation_per_comment, args.peak_pad)
     print(f"[DEBUG] Similar event map created with {len(set(similar_event_map.values()))} unique groups")
     similar_results = []
     similar_presence = []
@@ -2964,13 +3501,7 @@ def main():
     # 類似イベント詳細情報の保存用リスト
     similar_details_all: List[Dict[str, object]] = []
     # Build mapping from event_id to list of (stream_key, event)
-    events_by_sim_id: Dict[int, Dict[str, Dict[str, object]]] = defaultdict(dict)
-    for stream_key, evts in events_by_stream.items():
-        for i, evt in enumerate(evts):
-            eid = similar_event_map.get((stream_key, i))
-            if eid is None:
-                continue
-            events_by_sim_id[eid][stream_key] = evt
+    events_by_sim_id = group_events_by_sim_id(events_by_stream, similar_event_map)
     for sim_id, evts_dict in events_by_sim_id.items():
         # skip if less than two streams participate
         if len(evts_dict) < 2:
@@ -2999,22 +3530,10 @@ def main():
         # Compute distance matrices
         keys = list(streams.keys())
         n = len(keys)
-        dmat = np.zeros((n, n), dtype=float)
-        lang_mat = np.zeros((n, n), dtype=float)
-        emoji_mat = np.zeros((n, n), dtype=float)
-        for i in range(n):
-            for j in range(i+1, n):
-                d = compute_lexical_distance(comments_by_stream[keys[i]], comments_by_stream[keys[j]])
-                dmat[i, j] = d; dmat[j, i] = d
-                ld = js_distance_distribution(
-                    compute_language_distribution(langs_by_stream[keys[i]]),
-                    compute_language_distribution(langs_by_stream[keys[j]])
-                )
-                lang_mat[i, j] = ld; lang_mat[j, i] = ld
-                ediff = abs(
-                    compute_emoji_ratio(comments_by_stream[keys[i]]) - compute_emoji_ratio(comments_by_stream[keys[j]])
-                )
-                emoji_mat[i, j] = ediff; emoji_mat[j, i] = ediff
+        # 配信ごとの特徴量を1回だけ計算し、言語・絵文字の距離は配列演算で一括計算
+        features = {k: extract_event_features(comments_by_stream[k], langs_by_stream[k]) for k in keys}
+        lang_mat, emoji_mat = feature_distance_matrices([features[k] for k in keys])
+        dmat = compute_lexical_distance_matrix([comments_by_stream[k] for k in keys])
         # Compute averages
         tril = dmat[np.tril_indices(n, k=-1)]
         avg_lex = float(np.mean(tril)) if tril.size else 0.0
@@ -3060,48 +3579,12 @@ def main():
                     print(f"[WARN] wordcloud failed for similar event {sim_id}, stream {sk}: {e}")
 
         # --- 詳細情報を収集: 各配信者ごとのbin範囲やラベルなど ---
-        for sk in streams.keys():
-            base_name = os.path.basename(sk)
-            if sk in evts_dict:
-                evt_info = evts_dict[sk]
-                stream_obj = streams[sk]
-                bins = build_relative_time_bins(stream_obj.df_valid["timestamp"], stream_obj.nr_bins)
-                b = int(evt_info.get("bin_id", -1))
-                if 0 <= b < len(bins):
-                    interval = bins[b]
-                    t0 = stream_obj.df_valid["timestamp"].min()
-                    bin_start_sec = int((interval.left - t0).total_seconds())
-                    bin_end_sec = int((interval.right - t0).total_seconds())
-                else:
-                    bin_start_sec = None
-                    bin_end_sec = None
-                gid_local = int(evt_info.get("group_id", -1))
-                label_local = str(evt_info.get("label", ""))
-                top_words_local = stream_obj.group_top_words.get(gid_local, [])[:5]
-                similar_details_all.append({
-                    "sim_event_id": sim_id,
-                    "stream": base_name,
-                    "bin_id": b,
-                    "bin_start_sec": bin_start_sec if bin_start_sec is not None else "",
-                    "bin_end_sec": bin_end_sec if bin_end_sec is not None else "",
-                    "label": label_local,
-                    "top_words": " ".join(top_words_local),
-                })
-            else:
-                similar_details_all.append({
-                    "sim_event_id": sim_id,
-                    "stream": base_name,
-                    "bin_id": "",
-                    "bin_start_sec": "",
-                    "bin_end_sec": "",
-                    "label": "",
-                    "top_words": "",
-                })
+        similar_details_all.extend(similar_event_detail_rows(sim_id, evts_dict, streams))
     # Save similar event results
     if similar_results:
         similar_df = pd.DataFrame(similar_results)
         csv_path = os.path.join(OUT_DIR, "similar_event_comparison_results.csv")
-        similar_df.to_csv(csv_path, index=False, encoding="utf-8-sig")
+        save_table(similar_df, csv_path)
         print(f"Saved similar events results: {csv_path}")
         # [DISABLED] similar_event_presence.png - ユーザー要望により無効化
         # Save presence CSV only (no heatmap/plot)
@@ -3124,7 +3607,7 @@ def main():
     if similar_details_all:
             sim_details_df = pd.DataFrame(similar_details_all)
             sim_details_csv = os.path.join(OUT_DIR, "similar_event_details.csv")
-            sim_details_df.to_csv(sim_details_csv, index=False, encoding="utf-8-sig")
+            save_table(sim_details_df, sim_details_csv)
             print(f"Saved similar event details: {sim_details_csv}")
             # PNGとしてテーブルを保存
             sim_details_png = os.path.join(OUT_DIR, "similar_event_details.png")
@@ -3139,6 +3622,14 @@ def main():
     bc_comparison_dir = os.path.join(OUT_DIR, "broadcaster_comparisons")
     os.makedirs(bc_comparison_dir, exist_ok=True)
     
+    # 類似イベントごとの配信者間距離（lex/lang/emoji 列）を sim_event_id で引けるようにしておく
+    sim_distance_rows = {}
+    if similar_results:
+        dist_cols = [c for c in similar_df.columns
+                     if " vs " in c and ("(lex)" in c or "(lang)" in c or "(emoji)" in c)]
+        for sid, vals in zip(similar_df["sim_event_id"], similar_df[dist_cols].to_dict("records")):
+            sim_distance_rows.setdefault(sid, vals)
+
     # 上位イベントを選択（参加配信者数が多く、コメント数も多いもの）
     event_priority = []
     for sim_id, evts_dict in events_by_sim_id.items():
@@ -3158,21 +3649,8 @@ def main():
         try:
             evts_dict = events_by_sim_id[sim_id]
             
-            # 距離データを収集（CSVから直接読み込み）
-            distance_results = {}
-            try:
-                csv_path = os.path.join(OUT_DIR, "similar_event_comparison_results.csv")
-                sim_results_df = pd.read_csv(csv_path, encoding="utf-8-sig")
-                
-                for row_idx, row in sim_results_df.iterrows():
-                    if row["sim_event_id"] == sim_id:
-                        for col in sim_results_df.columns:
-                            if " vs " in col and ("(lex)" in col or "(lang)" in col or "(emoji)" in col):
-                                distance_results[col] = row[col]
-                        break
-            except Exception as e:
-                print(f"[WARN] Could not load distance data for Event {sim_id}: {e}")
-                distance_results = {}
+            # 距離データを収集（保存済みの類似イベント結果をメモリ上で参照）
+            distance_results = dict(sim_distance_rows.get(sim_id, {}))
             
             out_png = os.path.join(bc_comparison_dir, f"event_{sim_id}_comparison.png")
             generate_event_broadcaster_comparison(
@@ -3206,7 +3684,7 @@ def main():
             
             for sk, evt_info in evts_dict.items():
                 stream_obj = streams[sk]
-                bins = build_relative_time_bins(stream_obj.df_valid["timestamp"], stream_obj.nr_bins)
+                bins = stream_obj.bins
                 b_local = int(evt_info.get("bin_id", -1))
                 if 0 <= b_local < len(bins):
                     interval = bins[b_local]
@@ -3223,7 +3701,7 @@ def main():
                     short = ",".join(top_words_local)
                 else:
                     raw_label = str(evt_info.get("label", ""))
-                    toks = [normalize_term(w) for w in re.split(r"[\s・,，。!！?？]+", raw_label) if w]
+                    toks = normalize_terms([w for w in re.split(r"[\s・,，。!！?？]+", raw_label) if w])
                     toks = [t for t in toks if len(t) > 1][:2]
                     short = ",".join(toks) if toks else "topic"
                 stream_label_map_sim[os.path.basename(sk)] = short
@@ -3242,18 +3720,17 @@ def main():
             present_keys = list(evts_dict.keys())
             n_present = len(present_keys)
             
-            # 各ペアのコメントを取得して類似度を計算
+            # 各配信のコメントを1回だけ抽出し、全ペアの JS 距離を一括計算
+            present_comments = [extract_event_comments(streams[sk], evts_dict[sk], args.peak_pad)[0]
+                                for sk in present_keys]
+            present_dmat = compute_lexical_distance_matrix(present_comments)
             for i in range(n_present):
                 for j in range(i+1, n_present):
                     sk_i = present_keys[i]
                     sk_j = present_keys[j]
                     
-                    # コメント抽出
-                    comments_i, _ = extract_event_comments(streams[sk_i], evts_dict[sk_i], args.peak_pad)
-                    comments_j, _ = extract_event_comments(streams[sk_j], evts_dict[sk_j], args.peak_pad)
-                    
-                    # JS距離を計算
-                    lex_dist = compute_lexical_distance(comments_i, comments_j)
+                    # JS距離
+                    lex_dist = present_dmat[i, j]
                     sim_val = float(max(0.0, min(1.0, 1.0 - lex_dist)))
                     
                     # ラベル
@@ -3274,7 +3751,7 @@ def main():
                         "B_label": lb,
                         "pair": pair_label,
                         "Similarity": sim_val,
-                        "total_comments": len(comments_i) + len(comments_j),
+                        "total_comments": len(present_comments[i]) + len(present_comments[j]),
                         "row_label": row_lbl,
                     })
         
@@ -3324,7 +3801,7 @@ def main():
             msgs: List[str] = []
             # まず元ファイルから読み出す
             try:
-                full_df = read_csv_any(stream_key)
+                full_df = read_chat_csv(stream_key, usecols=["message"])
                 if "message" in full_df.columns:
                     msgs = full_df["message"].astype(str).tolist()
             except Exception:
@@ -3392,7 +3869,7 @@ def main():
         for stream_key, sd in streams.items():
             # 元の message と timestamp を読み込み
             try:
-                df_full = read_csv_any(stream_key)
+                df_full = read_chat_csv(stream_key, usecols=["timestamp", "message"])
             except Exception:
                 df_full = sd.df_valid.copy()
             if "timestamp" not in df_full.columns or "message" not in df_full.columns:
@@ -3423,13 +3900,7 @@ def main():
             if df_tmp["emojis"].map(len).sum() == 0:
                 continue
             # 各行のbin id を決定
-            def _find_bin(t: pd.Timestamp) -> int:
-                for i, iv in enumerate(bins):
-                    if t >= iv.left and t < iv.right:
-                        return i
-                centers = np.array([iv.left.value for iv in bins], dtype=np.int64)
-                return int(np.argmin(np.abs(centers - int(t.value))))
-            df_tmp["bin_id"] = df_tmp["timestamp"].apply(_find_bin)
+            df_tmp["bin_id"] = assign_time_bins(df_tmp["timestamp"], bins)
             # 時間ラベル（HH:MM 中央）を用意
             time_labels: Dict[int, str] = {}
             for i, iv in enumerate(bins):
@@ -3469,9 +3940,8 @@ def main():
     
     try:
         # N×N類似度行列とペアデータを生成
-        sim_matrix_df, event_pairs_df = generate_event_similarity_matrix(
-            events_by_sim_id, streams, args.peak_pad
-        )
+        # [similarity]
+        sim_matrix_df, event_pairs_df = run_similarity_stage(match_key, events_by_sim_id, streams, args.peak_pad)
         
         if not sim_matrix_df.empty:
             # 類似度行列CSV・ヒートマップを保存
@@ -3481,7 +3951,7 @@ def main():
             
             # ペアデータをCSVで保存
             event_pairs_csv = os.path.join(OUT_DIR, "event_to_event_pairs.csv")
-            event_pairs_df.to_csv(event_pairs_csv, index=False, encoding="utf-8-sig")
+            save_table(event_pairs_df, event_pairs_csv)
             print(f"Saved event pairs: {event_pairs_csv}")
             
             # 新機能: 時間的相関と信頼度スコアの視覚化
@@ -3520,6 +3990,10 @@ def main():
     print("\n" + "="*60)
     print("All processing complete!")
     print("="*60)
+    if STAGE_CACHE.enabled:
+        # report（CSV/PNG 出力）はファイルを書き出すため毎回実行し、それ以前のステージの再利用状況を表示
+        for stage, st in STAGE_CACHE.get_stats().items():
+            print(f"[Stage Cache] {stage}: reused={st['hits']}, computed={st['misses']}")
     
     # ========================================
     # 【新機能】最終結果サマリーの表示
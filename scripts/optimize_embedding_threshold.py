@@ -7,12 +7,12 @@ Embedding Threshold Optimization Script (Ground Truth不要版)
 3. Cluster Separation (Silhouette Score)
 """
 
-import subprocess
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
+import os
 import sys
 import io
 
@@ -21,50 +21,79 @@ if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
 
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+sys.path.append(str(Path(__file__).resolve().parent))
+from utils.table_store import load_table
+
+# 指標計算に使う列だけを読み込む（Parquet があれば列単位で読み込み）
+EVENT_DETAIL_COLUMNS = ['sim_event_id', 'top_words']
+EVENT_PAIR_COLUMNS = ['embedding_similarity', 'topic_jaccard', 'combined_score',
+                      'temporal_correlation', 'confidence_score']
+
 
 class EmbeddingThresholdOptimizer:
-    def __init__(self, data_folder='data/chat', pattern='*', output_dir='output/optimization'):
+    def __init__(self, data_folder='data/chat', pattern='*', output_dir='output/optimization', workers=1):
         self.data_folder = data_folder
         self.pattern = pattern
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
-        
+        self.workers = workers  # グリッド点を並列評価するプロセス数
+        self._embedding_model = None  # 埋め込みモデルは1回だけロードして使い回す
+
+    def run_sweep(self, threshold_candidates, time_bins=50, n_events=12):
+        """
+        event_comparison をプロセス内で実行し、全閾値をまとめて評価
+
+        埋め込み・BERTopic・時系列・イベント抽出は1回だけ計算し、閾値ごとの照合結果は
+        output_dir/sweep/<グリッド点> に分けて保存する。
+
+        Returns:
+            dict: {embedding_th: load_results() の結果}
+        """
+        import event_comparison as ec  # 重い依存（BERTopic等）は実行時に読み込む
+
+        if self._embedding_model is None:
+            self._embedding_model = ec.SentenceTransformer(ec.EMB_NAME)
+        args = ec.parse_args(['--folder', self.data_folder, '--pattern', self.pattern,
+                              '--time-bins', str(time_bins), '--n-events', str(n_events)])
+        summary = ec.run_parameter_sweep(
+            args.files,
+            {'embedding_match_th': list(threshold_candidates), 'n_events': [n_events]},
+            out_root=str(self.output_dir / 'sweep'),
+            workers=self.workers,
+            args=args,
+            embedding_model=self._embedding_model,
+        )
+        if summary.empty:
+            return {th: None for th in threshold_candidates}
+        return {row['embedding_match_th']: self.load_results(row['out_dir'])
+                for _, row in summary.iterrows()}
+
     def run_event_comparison(self, embedding_th, time_bins=50, n_events=12):
-        """event_comparison.pyを指定したembedding閾値で実行"""
+        """event_comparison を指定したembedding閾値で実行（プロセス内、結果は閾値ごとのディレクトリ）"""
         print(f"\n{'='*60}")
         print(f"Testing embedding_threshold={embedding_th:.2f}")
         print(f"{'='*60}")
-        
-        cmd = [
-            'python', 'scripts/event_comparison.py',
-            '--folder', self.data_folder,
-            '--pattern', self.pattern,
-            '--n-events', str(n_events),
-            '--time-bins', str(time_bins),
-            '--embedding-match-th', str(embedding_th),
-        ]
-        
-        # UTF-8対応: Windows環境でのエンコーディング問題を回避
-        result = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8', errors='replace')
-        
-        if result.returncode != 0:
-            print(f"⚠️ Error running event_comparison.py with embedding_th={embedding_th}")
+
+        try:
+            return self.run_sweep([embedding_th], time_bins, n_events)[embedding_th]
+        except Exception as e:
+            print(f"⚠️ Error running event_comparison with embedding_th={embedding_th}: {e}")
             return None
-        
-        return self.load_results()
-    
-    def load_results(self):
+
+    def load_results(self, result_dir='output'):
         """実行結果をロード"""
         results = {}
-        
-        event_details_path = Path('output/similar_event_details.csv')
+        result_dir = Path(result_dir)
+
+        event_details_path = result_dir / 'similar_event_details.csv'
         if event_details_path.exists():
-            results['event_details'] = pd.read_csv(event_details_path)
-        
-        event_pairs_path = Path('output/event_to_event_pairs.csv')
+            results['event_details'] = load_table(str(event_details_path), columns=EVENT_DETAIL_COLUMNS)
+
+        event_pairs_path = result_dir / 'event_to_event_pairs.csv'
         if event_pairs_path.exists():
-            results['event_pairs'] = pd.read_csv(event_pairs_path)
-        
+            results['event_pairs'] = load_table(str(event_pairs_path), columns=EVENT_PAIR_COLUMNS)
+
         return results
     
     def compute_internal_metrics(self, results, embedding_th):
@@ -168,9 +197,12 @@ class EmbeddingThresholdOptimizer:
         
         all_metrics = []
         
+        # 全閾値をまとめて実行（重いステージは1回だけ）
+        # スイープ自体の失敗は全候補の評価失敗として扱わず、そのまま中断する
+        results_by_th = self.run_sweep(threshold_candidates, time_bins, n_events)
+        
         for th in threshold_candidates:
-            # 実行
-            results = self.run_event_comparison(th, time_bins, n_events)
+            results = results_by_th.get(th)
             
             # 評価
             metrics = self.compute_internal_metrics(results, th)
@@ -325,7 +357,8 @@ def main():
     optimizer = EmbeddingThresholdOptimizer(
         data_folder='data/chat',
         pattern='*',
-        output_dir='output/optimization'
+        output_dir='output/optimization',
+        workers=min(6, os.cpu_count() or 1)
     )
     
     # 最適化実行
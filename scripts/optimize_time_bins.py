@@ -8,13 +8,13 @@ Time Binning Optimization Script (Ground Truth不要版)
 4. Silhouette Score (クラスタリング品質)
 """
 
-import subprocess
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
 import json
+import os
 import sys
 import io
 
@@ -23,55 +23,83 @@ if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
 
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+sys.path.append(str(Path(__file__).resolve().parent))
+from utils.table_store import load_table
+
+# 指標計算に使う列だけを読み込む（Parquet があれば列単位で読み込み）
+EVENT_DETAIL_COLUMNS = ['sim_event_id', 'top_words']
+EVENT_PAIR_COLUMNS = ['embedding_similarity', 'topic_jaccard', 'combined_score',
+                      'temporal_correlation', 'confidence_score']
+
 class TimeBinningOptimizer:
-    def __init__(self, data_folder='data/chat', pattern='*', output_dir='output/optimization'):
+    def __init__(self, data_folder='data/chat', pattern='*', output_dir='output/optimization', workers=1):
         self.data_folder = data_folder
         self.pattern = pattern
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.workers = workers  # グリッド点を並列評価するプロセス数
+        self._embedding_model = None  # 埋め込みモデルは1回だけロードして使い回す
         
+    def run_sweep(self, bin_candidates, n_events=12):
+        """
+        event_comparison をプロセス内で実行し、全bin数をまとめて評価
+
+        BERTopic の学習は1回だけで、bin数ごとの時系列はキャッシュ済みのトピック割り当てから
+        再ビン化する。bin数ごとの結果は output_dir/sweep/<グリッド点> に分けて保存する。
+
+        Returns:
+            dict: {n_bins: load_results() の結果}
+        """
+        import event_comparison as ec  # 重い依存（BERTopic等）は実行時に読み込む
+
+        if self._embedding_model is None:
+            self._embedding_model = ec.SentenceTransformer(ec.EMB_NAME)
+        args = ec.parse_args(['--folder', self.data_folder, '--pattern', self.pattern,
+                              '--n-events', str(n_events), '--time-bins', str(bin_candidates[0])])
+        summary = ec.run_parameter_sweep(
+            args.files,
+            {'time_bins': list(bin_candidates), 'n_events': [n_events]},
+            out_root=str(self.output_dir / 'sweep'),
+            workers=self.workers,
+            args=args,
+            embedding_model=self._embedding_model,
+        )
+        if summary.empty:
+            return {n_bins: None for n_bins in bin_candidates}
+        return {int(row['time_bins']): self.load_results(row['out_dir']) for _, row in summary.iterrows()}
+
     def run_event_comparison(self, n_bins, n_events=12):
-        """event_comparison.pyを指定したbin数で実行"""
+        """event_comparison を指定したbin数で実行（プロセス内、結果はbin数ごとのディレクトリ）"""
         print(f"\n{'='*60}")
         print(f"Testing n_bins={n_bins}")
         print(f"{'='*60}")
         
-        cmd = [
-            'python', 'scripts/event_comparison.py',
-            '--folder', self.data_folder,
-            '--pattern', self.pattern,
-            '--n-events', str(n_events),
-            '--time-bins', str(n_bins),
-        ]
-        
-        # UTF-8対応: Windows環境でのエンコーディング問題を回避
-        result = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8', errors='replace')
-        
-        if result.returncode != 0:
-            print(f"⚠️ Error running event_comparison.py with n_bins={n_bins}")
-            print(result.stderr)
+        try:
+            return self.run_sweep([n_bins], n_events)[n_bins]
+        except Exception as e:
+            print(f"⚠️ Error running event_comparison with n_bins={n_bins}: {e}")
             return None
-        
-        return self.load_results()
     
-    def load_results(self):
+    def load_results(self, result_dir='output'):
         """実行結果をロード"""
         results = {}
+        result_dir = Path(result_dir)
         
         # Event details
-        event_details_path = Path('output/similar_event_details.csv')
+        event_details_path = result_dir / 'similar_event_details.csv'
         if event_details_path.exists():
-            results['event_details'] = pd.read_csv(event_details_path)
+            results['event_details'] = load_table(str(event_details_path), columns=EVENT_DETAIL_COLUMNS)
         
         # Event pairs
-        event_pairs_path = Path('output/event_to_event_pairs.csv')
+        event_pairs_path = result_dir / 'event_to_event_pairs.csv'
         if event_pairs_path.exists():
-            results['event_pairs'] = pd.read_csv(event_pairs_path)
+            results['event_pairs'] = load_table(str(event_pairs_path), columns=EVENT_PAIR_COLUMNS)
         
         # Event comparison
-        event_comparison_path = Path('output/event_comparison_results.csv')
+        event_comparison_path = result_dir / 'event_comparison_results.csv'
         if event_comparison_path.exists():
-            results['event_comparison'] = pd.read_csv(event_comparison_path)
+            results['event_comparison'] = load_table(str(event_comparison_path))
         
         return results
     
@@ -177,9 +205,12 @@ class TimeBinningOptimizer:
         
         all_metrics = []
         
+        # 全bin数をまとめて実行（BERTopic の学習は1回だけ）
+        # スイープ自体の失敗は全候補の評価失敗として扱わず、そのまま中断する
+        results_by_bins = self.run_sweep(bin_candidates, n_events)
+        
         for n_bins in bin_candidates:
-            # 実行
-            results = self.run_event_comparison(n_bins, n_events)
+            results = results_by_bins.get(n_bins)
             
             # 評価
             metrics = self.compute_internal_metrics(results, n_bins)
@@ -385,13 +416,14 @@ def main():
     optimizer = TimeBinningOptimizer(
         data_folder='data/chat',
         pattern='*',
-        output_dir='output/optimization'
+        output_dir='output/optimization',
+        workers=min(6, os.cpu_count() or 1)
     )
     
     # 最適化実行
-    # 候補: 20, 30, 50, 75, 100
+    # 候補: 20〜500（BERTopic は1回だけ学習し、bin数ごとに再ビン化）
     results = optimizer.optimize(
-        bin_candidates=[20, 30, 50, 75, 100],
+        bin_candidates=[20, 30, 50, 75, 100, 150, 200, 300, 500],
         n_events=12
     )
     
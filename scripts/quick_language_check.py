@@ -17,15 +17,19 @@ if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
 
-# langdetectをインポート
-try:
-    from langdetect import detect, DetectorFactory
-    DetectorFactory.seed = 0
-    LANGDETECT_AVAILABLE = True
-except ImportError:
-    LANGDETECT_AVAILABLE = False
+# 共通の言語検出サービス（langdetect + キャッシュ + 文字種による高速判定）
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from utils.csv_reader import read_chat_csv, ANALYSIS_COLUMNS
+from utils.language_id import LANGDETECT_AVAILABLE, get_language_identifier
+if not LANGDETECT_AVAILABLE:
     print("⚠️ langdetectがインストールされていません")
 
+LANG_NAMES = {
+    'ja': '日本語', 'en': '英語', 'es': 'スペイン語',
+    'pt': 'ポルトガル語', 'hi': 'ヒンディー語', 
+    'ar': 'アラビア語', 'fr': 'フランス語'
+}
+
 # データディレクトリ
 DATA_DIR = Path(r"G:\マイドライブ\大学\4年\ゼミ\watching_style_analysis\data\football")
 OUTPUT_DIR = Path(r"G:\マイドライブ\大学\4年\ゼミ\watching_style_analysis\output\language_quick_check")
@@ -43,18 +47,18 @@ MATCHES = {
 
 def detect_language(text):
     """言語検出"""
-    if not LANGDETECT_AVAILABLE or pd.isna(text) or len(str(text).strip()) < 3:
-        return 'unknown'
-    try:
-        detected = detect(str(text))
-        lang_map = {
-            'ja': '日本語', 'en': '英語', 'es': 'スペイン語',
-            'pt': 'ポルトガル語', 'hi': 'ヒンディー語', 
-            'ar': 'アラビア語', 'fr': 'フランス語'
-        }
-        return lang_map.get(detected, detected)
-    except:
-        return 'unknown'
+    return detect_languages([text])[0]
+
+def detect_languages(texts):
+    """言語検出（一括）"""
+    if not LANGDETECT_AVAILABLE:
+        return ['unknown'] * len(texts)
+    targets = [i for i, t in enumerate(texts) if not pd.isna(t) and len(str(t).strip()) >= 3]
+    detected = get_language_identifier(seed=0).detect_many([str(texts[i]) for i in targets])
+    results = ['unknown'] * len(texts)
+    for i, lang in zip(targets, detected):
+        results[i] = 'unknown' if lang == 'unk' else LANG_NAMES.get(lang, lang)
+    return results
 
 def quick_language_check(match_jp, sample_size=1000):
     """高速言語チェック（サンプリング）"""
@@ -68,7 +72,7 @@ def quick_language_check(match_jp, sample_size=1000):
     
     for csv_file in csv_files:
         try:
-            df = pd.read_csv(csv_file, encoding='utf-8')
+            df = read_chat_csv(csv_file, usecols=ANALYSIS_COLUMNS)
             
             if 'message' in df.columns:
                 df.rename(columns={'message': 'comment'}, inplace=True)
@@ -82,7 +86,7 @@ def quick_language_check(match_jp, sample_size=1000):
             
             # 言語検出
             print(f"  🔍 {csv_file.stem}: {len(df):,}件中{n_sample}件をサンプリング")
-            sampled['language'] = sampled['comment'].apply(detect_language)
+            sampled['language'] = detect_languages(sampled['comment'].tolist())
             
             # 言語分布
             lang_dist = sampled['language'].value_counts()
@@ -17,9 +17,13 @@ from pathlib import Path
 import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime
+import sys
 import warnings
 warnings.filterwarnings('ignore')
 
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from utils.csv_reader import read_chat_csv, ANALYSIS_COLUMNS
+
 # 日本語フォント設定
 plt.rcParams['font.sans-serif'] = ['Yu Gothic', 'Meiryo', 'MS Gothic']
 plt.rcParams['axes.unicode_minus'] = False
@@ -97,7 +101,7 @@ def validate_single_match(match_folder):
     
     for csv_file in csv_files:
         try:
-            df = pd.read_csv(csv_file, encoding='utf-8-sig')
+            df = read_chat_csv(csv_file, usecols=ANALYSIS_COLUMNS)
             
             # 基本統計
             validation_result['total_comments'] += len(df)
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+CSV Reader Test Script
+
+utils/csv_reader.py の文字コード判定・読み直し・列指定付き読み込みを確認
+"""
+
+import codecs
+import glob
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.csv_reader import sniff_encoding, read_csv_any, read_chat_csv, iter_csv_chunks
+
+CSV_TEXT = "timestamp,message,author,extra\n0:01,ゴール！,山田,x\n0:02,123,taro,y\n"
+
+
+def _write(tmp, name, data: bytes) -> str:
+    path = os.path.join(tmp, name)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def test_sniff_encoding():
+    with tempfile.TemporaryDirectory() as tmp:
+        assert sniff_encoding(_write(tmp, "u8.csv", CSV_TEXT.encode("utf-8"))) == "utf-8"
+        assert sniff_encoding(_write(tmp, "bom.csv", codecs.BOM_UTF8 + CSV_TEXT.encode("utf-8"))) == "utf-8-sig"
+        assert sniff_encoding(_write(tmp, "sjis.csv", CSV_TEXT.encode("cp932"))) == "cp932"
+        # 判定範囲の末尾で多バイト文字が切れていても utf-8
+        data = ("timestamp,message\n0:01," + "ゴール" * 10 + "\n").encode("utf-8")
+        assert sniff_encoding(_write(tmp, "cut.csv", data), n_bytes=len(b"timestamp,message\n0:01,") + 1) == "utf-8"
+
+
+def test_read_bom_and_cp932():
+    with tempfile.TemporaryDirectory() as tmp:
+        bom = read_chat_csv(_write(tmp, "bom.csv", codecs.BOM_UTF8 + CSV_TEXT.encode("utf-8")))
+        assert list(bom.columns) == ["timestamp", "message", "author"]
+        sjis = read_chat_csv(_write(tmp, "sjis.csv", CSV_TEXT.encode("cp932")))
+        assert sjis["message"].tolist() == ["ゴール！", "123"]
+        assert sjis["author"].tolist() == ["山田", "taro"]
+
+
+def test_fallback_after_sniff_window():
+    with tempfile.TemporaryDirectory() as tmp:
+        # 先頭は ASCII のみ（utf-8 と判定）、後半に cp932 の文字
+        lines = ["timestamp,message"] + [f"{i},goal" for i in range(10000)] + ["9999,ゴール"]
+        path = _write(tmp, "late.csv", ("\n".join(lines) + "\n").encode("cp932"))
+        assert sniff_encoding(path) == "utf-8"
+        df = read_chat_csv(path, chunksize=3000)
+        assert len(df) == 10001 and df["message"].iloc[-1] == "ゴール"
+
+
+def test_usecols_and_dtypes():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = _write(tmp, "u8.csv", CSV_TEXT.encode("utf-8"))
+        # 存在しない列は無視、数字だけのコメントも文字列のまま
+        df = read_chat_csv(path, usecols=["message", "text", "timestamp"])
+        assert set(df.columns) == {"timestamp", "message"}
+        assert df["message"].tolist() == ["ゴール！", "123"]
+        assert read_csv_any(path).shape == (2, 4)
+        chunks = list(iter_csv_chunks(path, usecols=["message"], chunksize=1))
+        assert [len(c) for c in chunks] == [1, 1]
+
+
+def test_empty_files():
+    with tempfile.TemporaryDirectory() as tmp:
+        assert read_chat_csv(_write(tmp, "empty.csv", b"")).empty
+        header_only = read_chat_csv(_write(tmp, "header.csv", b"timestamp,message,author\n"))
+        assert header_only.empty and list(header_only.columns) == ["timestamp", "message", "author"]
+
+
+def test_matches_read_csv_on_chat_data():
+    data_dir = Path(__file__).parent.parent / "data" / "chat"
+    for path in sorted(glob.glob(str(data_dir / "*.csv")))[:5]:
+        expected = pd.read_csv(path, encoding="utf-8", dtype=str)
+        actual = read_csv_any(path, dtype={c: str for c in expected.columns})
+        pd.testing.assert_frame_equal(actual, expected)
+
+
+if __name__ == '__main__':
+    test_sniff_encoding()
+    test_read_bom_and_cp932()
+    test_fallback_after_sniff_window()
+    test_usecols_and_dtypes()
+    test_empty_files()
+    test_matches_read_csv_on_chat_data()
+    print("✓ CSV reader tests passed")
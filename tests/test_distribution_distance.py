@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+Distribution Distance Test Script
+
+utils/distribution_distance.py の一括計算がペアごとの JS 距離と一致するか確認
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.distribution_distance import js_distance_matrix, abs_diff_matrix
+
+
+def _js_distance(p, q):
+    """event_comparison.js_distance と同じ計算（参照実装）"""
+    p = p.astype(float); q = q.astype(float)
+    if p.sum() == 0 or q.sum() == 0:
+        return 1.0
+    s = 1e-10
+    p = (p + s) / (p.sum() + s * len(p))
+    q = (q + s) / (q.sum() + s * len(q))
+    m = 0.5 * (p + q)
+    kl_pm = np.sum(np.where(p > 0, p * np.log(p / m), 0.0))
+    kl_qm = np.sum(np.where(q > 0, q * np.log(q / m), 0.0))
+    js = max(0.5 * (kl_pm + kl_qm), 0.0)
+    return float(min(np.sqrt(js), 1.0))
+
+
+def _pair_distance(a, b):
+    """js_distance_distribution と同じく、どちらかで出現したカテゴリのみで比較"""
+    keys = (a > 0) | (b > 0)
+    return _js_distance(a[keys], b[keys])
+
+
+def test_matches_pairwise():
+    rng = np.random.default_rng(3)
+    H = rng.integers(0, 6, size=(7, 12)) * (rng.random((7, 12)) < 0.4)
+    H[4] = 0  # 空の配信
+    D = js_distance_matrix(H)
+    for i in range(len(H)):
+        assert D[i, i] == 0.0
+        for j in range(len(H)):
+            if i != j:
+                assert abs(D[i, j] - _pair_distance(H[i], H[j])) < 1e-12
+    assert np.allclose(D, D.T)
+
+
+def test_abs_diff_matrix():
+    assert abs_diff_matrix([0.1, 0.4]).tolist() == [[0.0, 0.30000000000000004], [0.30000000000000004, 0.0]]
+
+
+if __name__ == '__main__':
+    test_matches_pairwise()
+    test_abs_diff_matrix()
+    print("✓ Distribution distance tests passed")
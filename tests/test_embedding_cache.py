@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+Embedding Cache Test Script
+
+utils/embedding_cache.py の動作確認テスト（ダミーモデルを使用）
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.embedding_cache import EmbeddingCache
+
+
+class DummyModel:
+    """SentenceTransformer 互換のダミーモデル（呼び出し回数を記録）"""
+
+    def __init__(self, dim=8):
+        self.dim = dim
+        self.encoded = []
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def encode(self, texts, batch_size=32, show_progress_bar=False, normalize_embeddings=True):
+        self.encoded.extend(texts)
+        vecs = np.array([[hash((t, i)) % 997 + 1 for i in range(self.dim)] for t in texts], dtype=float)
+        if normalize_embeddings:
+            vecs = vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+        return vecs
+
+
+def test_cache_roundtrip(tmp_path):
+    """再実行時にエンコーダを呼ばずに同じ行列を返す"""
+    texts = ["gol", "ゴール", "gol", "allez"]
+
+    model = DummyModel()
+    cache = EmbeddingCache("dummy", cache_dir=str(tmp_path))
+    first = cache.encode(model, texts)
+    assert first.shape == (4, 8)
+    # 重複テキストは1回だけエンコード
+    assert sorted(model.encoded) == sorted(["gol", "ゴール", "allez"])
+    assert np.allclose(first[0], first[2])
+    cache.flush()  # プロセス終了時（atexit）と同じ
+
+    # 新しいインスタンス（= 再実行）ではディスクから読み込む
+    model2 = DummyModel()
+    cache2 = EmbeddingCache("dummy", cache_dir=str(tmp_path))
+    second = cache2.encode(model2, texts)
+    assert model2.encoded == []
+    assert np.array_equal(first, second)
+    assert cache2.get_stats()['hits'] == 4
+
+
+def test_cache_partial_miss_and_float16(tmp_path):
+    """一部だけ未キャッシュの場合はミス分のみエンコード"""
+    model = DummyModel()
+    cache = EmbeddingCache("dummy", cache_dir=str(tmp_path), dtype='float16')
+    cache.encode(model, ["a1", "b2"])
+    model.encoded.clear()
+
+    out = cache.encode(model, ["b2", "c3", "a1"])
+    assert model.encoded == ["c3"]
+    assert out.dtype == np.float32
+    assert cache.get_stats()['misses'] == 3
+
+
+def _shard_files(path):
+    return sorted(p.name for p in Path(path).rglob("*.keys.npy"))
+
+
+def test_misses_buffered_into_one_shard(tmp_path):
+    """少しずつ encode してもシャードは flush 時に1つだけ"""
+    model = DummyModel()
+    cache = EmbeddingCache("dummy", cache_dir=str(tmp_path))
+    for i in range(20):
+        cache.encode(model, [f"w{i}", f"v{i}"])
+    assert _shard_files(tmp_path) == []
+    # 未保存分もキャッシュとして使われる
+    model.encoded.clear()
+    first = cache.encode(model, ["w3", "v7"])
+    assert model.encoded == [] and len(cache) == 40
+    cache.flush()
+    cache.flush()
+    assert len(_shard_files(tmp_path)) == 1
+
+    cache2 = EmbeddingCache("dummy", cache_dir=str(tmp_path))
+    assert np.array_equal(cache2.encode(DummyModel(), ["w3", "v7"]), first)
+
+    # flush_rows に達したら自動で書き出す
+    cache3 = EmbeddingCache("dummy", cache_dir=str(tmp_path), flush_rows=5)
+    cache3.encode(model, [f"x{i}" for i in range(6)])
+    assert len(_shard_files(tmp_path)) == 2
+
+
+def test_small_shards_compacted_on_load(tmp_path):
+    """小さいシャードが増えたら読み込み時に1つにまとめる"""
+    model = DummyModel()
+    expected = {}
+    for i in range(6):
+        cache = EmbeddingCache("dummy", cache_dir=str(tmp_path))
+        texts = [f"t{i}", f"u{i}", "shared"]
+        for t, v in zip(texts, cache.encode(model, texts)):
+            expected[t] = v
+        cache.flush()
+    assert len(_shard_files(tmp_path)) == 6
+
+    cache = EmbeddingCache("dummy", cache_dir=str(tmp_path), max_small_shards=4)
+    assert len(_shard_files(tmp_path)) == 1 and len(cache) == 13
+    assert len(list(Path(tmp_path).rglob("*.vec.npy"))) == 1
+    model2 = DummyModel()
+    out = cache.encode(model2, list(expected))
+    assert model2.encoded == []
+    assert np.array_equal(out, np.stack(list(expected.values())))
+
+
+def test_orphans_removed_and_compaction_locked(tmp_path):
+    """キーファイルのないベクトルファイルは古ければ削除し、ロック中は他プロセスがまとめない"""
+    model = DummyModel()
+    for i in range(6):
+        cache = EmbeddingCache("dummy", cache_dir=str(tmp_path))
+        cache.encode(model, [f"t{i}"])
+        cache.flush()
+    cache_dir = Path(cache.cache_dir)
+    # まとめた後に削除できなかったベクトルファイル（Windows で memmap 中など）
+    orphan = cache_dir / "shard_orphan.vec.npy"
+    np.save(orphan, np.zeros((1, 4), dtype=np.float32))
+    fresh = cache_dir / "shard_writing.vec.npy"
+    np.save(fresh, np.zeros((1, 4), dtype=np.float32))
+    old = os.path.getmtime(orphan) - 3600
+    os.utime(orphan, (old, old))
+
+    # 他プロセスがまとめている間はまとめない
+    lock = cache_dir / "compact.lock"
+    lock.write_text("1")
+    cache = EmbeddingCache("dummy", cache_dir=str(tmp_path), max_small_shards=4)
+    assert len(_shard_files(tmp_path)) == 6 and len(cache) == 6
+    # 古いものだけ削除（書き込み中かもしれない新しいファイルは残す）
+    assert not orphan.exists() and fresh.exists()
+
+    lock.unlink()
+    cache = EmbeddingCache("dummy", cache_dir=str(tmp_path), max_small_shards=4, orphan_age=0)
+    assert len(_shard_files(tmp_path)) == 1 and len(cache) == 6
+    assert not lock.exists() and not fresh.exists()
+    assert len(list(cache_dir.glob("*.vec.npy"))) == 1
+
+
+if __name__ == '__main__':
+    import tempfile
+    with tempfile.TemporaryDirectory() as d:
+        test_cache_roundtrip(Path(d) / "a")
+        test_cache_partial_miss_and_float16(Path(d) / "b")
+        test_misses_buffered_into_one_shard(Path(d) / "c")
+        test_small_shards_compacted_on_load(Path(d) / "d")
+        test_orphans_removed_and_compaction_locked(Path(d) / "e")
+    print("✓ Embedding cache tests passed")
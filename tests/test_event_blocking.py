@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+Event Blocking Test Script
+
+utils/event_blocking.py の候補ペアが総当たり比較と一致するか確認
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.event_blocking import blocked_candidate_pairs
+
+
+def _brute_force(bin_ids, stream_ids, time_th):
+    pairs = []
+    for a in range(len(bin_ids)):
+        for b in range(a + 1, len(bin_ids)):
+            if stream_ids[a] == stream_ids[b]:
+                continue
+            if abs(bin_ids[a] - bin_ids[b]) > time_th:
+                continue
+            pairs.append((a, b))
+    return pairs
+
+
+def test_pairs_match_brute_force():
+    rng = np.random.default_rng(1)
+    bin_ids = rng.integers(-1, 120, 80)
+    stream_ids = rng.integers(0, 5, 80)
+    emb = rng.normal(size=(80, 16))
+    emb /= np.linalg.norm(emb, axis=1, keepdims=True)
+    for time_th in (0, 1, 3, 10, 200):
+        i, j, sims = blocked_candidate_pairs(bin_ids, stream_ids, time_th, embeddings=emb)
+        assert list(zip(i.tolist(), j.tolist())) == _brute_force(bin_ids, stream_ids, time_th)
+        expected = np.array([np.dot(emb[a], emb[b]) for a, b in zip(i, j)])
+        assert np.allclose(sims, expected)
+
+
+def test_no_pairs():
+    i, j, sims = blocked_candidate_pairs([3, 4], [0, 0], 5)
+    assert len(i) == 0 and sims is None
+    i, j, sims = blocked_candidate_pairs([3], [0], 5, embeddings=np.ones((1, 2)))
+    assert len(i) == 0 and len(sims) == 0
+
+
+if __name__ == '__main__':
+    test_pairs_match_brute_force()
+    test_no_pairs()
+    print("✓ Event blocking tests passed")
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Event Comment Store Test Script
+
+utils/event_comments.py のコメント抽出が行ごとの走査と一致し、1回だけ作られることを確認
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.event_comments import EventCommentStore, term_languages
+from utils.time_bins import TimeBinIndex
+
+
+def _reference(group_ids, bin_ids, messages, langs, group_id, bin_id, peak_pad, nr_bins):
+    """従来の行ごとの走査"""
+    low, high = max(0, bin_id - peak_pad), min(nr_bins - 1, bin_id + peak_pad)
+    rows = [i for i in range(len(messages)) if group_ids[i] == group_id and low <= bin_ids[i] <= high]
+    return rows, [messages[i] for i in rows], [langs[i] if isinstance(langs[i], str) else "unk" for i in rows]
+
+
+def test_matches_row_scan():
+    rng = np.random.default_rng(0)
+    n, nr_bins = 500, 20
+    group_ids = rng.integers(-1, 4, n)
+    bin_ids = rng.integers(0, nr_bins, n)
+    messages = [f"msg{i}" for i in range(n)]
+    langs = [rng.choice(["ja", "en", None]) for _ in range(n)]
+    store = EventCommentStore(TimeBinIndex(group_ids, bin_ids), messages, langs, nr_bins)
+
+    for gid, b, pad in [(0, 5, 1), (3, 0, 2), (2, 19, 3), (1, 10, 0)]:
+        rows, comments, lang_codes = _reference(group_ids, bin_ids, messages, langs, gid, b, pad, nr_bins)
+        entry = store.get(gid, b, pad)
+        assert entry.rows.tolist() == rows
+        assert entry.comments == comments
+        assert entry.langs == lang_codes
+
+
+def test_build_once_and_no_langs():
+    group_ids = np.array([0, 0, 1, 0, -1])
+    bin_ids = np.array([0, 1, 1, 2, 1])
+    store = EventCommentStore(TimeBinIndex(group_ids, bin_ids), ["a", "b", "c", "d", "e"], None, nr_bins=3)
+    events = [{"group_id": 0, "bin_id": 1}, {"group_id": 1, "bin_id": 1}, {"group_id": 0, "bin_id": 1}]
+    assert store.build(events, peak_pad=1) == 2
+    assert (0, 1, 1) in store and len(store) == 2
+
+    # 2回目以降は同じオブジェクトを返す
+    entry = store.get(0, 1, 1)
+    assert store.get(np.int64(0), np.int64(1), 1) is entry
+    assert entry.comments == ["a", "b", "d"] and entry.langs == ["unk"] * 3
+    assert store.get(2, 0, 1).comments == []
+
+
+def test_term_languages():
+    comments = ["GOL de Messi", "gol gol", "ゴール", "messi goat", "???"]
+    langs = ["es", "es", "ja", "en", "unk"]
+    event_lang, term_langs = term_languages(["gol", "ゴール", "messi", "offside"], comments, langs)
+    # 語を含むコメントの最頻言語、どのコメントにもない語はイベントの最頻言語
+    assert event_lang == "es"
+    assert term_langs == ["es", "ja", "es", "es"]
+    assert term_languages(["gol"], ["gol"], ["unk"]) == ("unk", ["unk"])
+    assert term_languages([], [], []) == ("unk", [])
+
+
+if __name__ == '__main__':
+    test_matches_row_scan()
+    test_build_once_and_no_langs()
+    test_term_languages()
+    print("✓ Event comment store tests passed")
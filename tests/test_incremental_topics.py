@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+Incremental Topic Assignment Test Script
+
+utils/incremental_topics.py のウォームアップ学習・transform による割り当て・ドリフト時だけの再学習と
+再学習をまたいだ安定IDを確認（BERTopic の代わりに最近傍重心のモデルを使う）
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.incremental_topics import IncrementalTopicModel
+
+DIM = 8
+WORDS = {0: "goal", 1: "penalty", 2: "offside", 3: "var"}
+
+
+class NearestCentroidModel:
+    """コメントの真のクラスタを重心とする簡易モデル（重心から遠いコメントは -1）"""
+
+    def __init__(self, centroids, words):
+        self.centroids = centroids
+        self.words = words
+
+    def transform(self, texts, embeddings=None):
+        sims = embeddings @ self.centroids.T
+        topics = np.where(sims.max(axis=1) >= 0.8, sims.argmax(axis=1), -1)
+        return topics, None
+
+    def get_topic(self, tid):
+        return [(self.words[tid], 1.0)] if tid in self.words else False
+
+    def get_topics(self):
+        return {tid: self.get_topic(tid) for tid in self.words}
+
+
+def _make_fit_fn(calls):
+    def fit_fn(texts, emb):
+        # 学習データに出てくるクラスタだけをトピックにし、学習ごとにトピックIDの順序を変える
+        present = sorted({int(t.split(":")[0]) for t in texts}, reverse=len(calls) % 2 == 1)
+        cents = np.stack([_basis(c) for c in present])
+        model = NearestCentroidModel(cents, {tid: WORDS[c] for tid, c in enumerate(present)})
+        calls.append(len(texts))
+        return model, model.transform(texts, emb)[0]
+    return fit_fn
+
+
+def _basis(cluster):
+    v = np.zeros(DIM, dtype=np.float32)
+    v[cluster] = 1.0
+    return v
+
+
+def _comments(clusters, rng):
+    emb = np.stack([_basis(c) for c in clusters]) + rng.normal(0, 0.05, (len(clusters), DIM)).astype(np.float32)
+    return [f"{c}:{WORDS[c]}" for c in clusters], emb
+
+
+def test_warmup_then_transform():
+    rng = np.random.default_rng(0)
+    calls = []
+    itm = IncrementalTopicModel(_make_fit_fn(calls), warmup=200, drift_window=100)
+    texts, emb = _comments(rng.integers(0, 2, 150), rng)
+    assert (itm.assign(texts, emb) == -1).all()  # ウォームアップ中
+    texts, emb = _comments(rng.integers(0, 2, 100), rng)
+    ids = itm.assign(texts, emb)
+    assert calls == [200] and (ids >= 0).all()  # 直近 warmup 件で学習
+    goal_id = int(ids[texts.index("0:goal")])
+    # 同じ分布なら再学習しない
+    for _ in range(10):
+        texts, emb = _comments(rng.integers(0, 2, 100), rng)
+        ids = itm.assign(texts, emb)
+    assert calls == [200] and itm.get_stats()["refits"] == 0
+    assert int(ids[texts.index("0:goal")]) == goal_id and itm.label(goal_id) == "goal"
+
+
+def test_refit_on_drift_keeps_stable_ids():
+    rng = np.random.default_rng(1)
+    calls = []
+    itm = IncrementalTopicModel(_make_fit_fn(calls), warmup=200, drift_window=100, refit_size=200)
+    texts, emb = _comments(rng.integers(0, 2, 200), rng)
+    first = itm.fit(texts, emb)
+    ids_before = {t.split(":")[1]: int(g) for t, g in zip(texts, first)}
+    # 新しい話題（offside）が増えると外れ値の割合が上がり、再学習される
+    for _ in range(4):
+        texts, emb = _comments(rng.choice([0, 1, 2], 100, p=[0.3, 0.2, 0.5]), rng)
+        itm.assign(texts, emb)
+    assert len(calls) == 2 and itm.get_stats()["refits"] == 1
+    texts, emb = _comments([0, 1, 2], rng)
+    ids = itm.assign(texts, emb)
+    # 既存トピックは学習し直してもIDが変わらず、新しいトピックには新しいID
+    assert ids[0] == ids_before["goal"] and ids[1] == ids_before["penalty"]
+    assert ids[2] not in ids_before.values() and itm.label(int(ids[2])) == "offside"
+    assert set(itm.words_by_tid()) == {0, 1, 2}
+
+
+def test_retired_ids_dropped_after_refit():
+    rng = np.random.default_rng(4)
+    calls = []
+    itm = IncrementalTopicModel(_make_fit_fn(calls), warmup=100, drift_window=100, refit_size=100)
+    texts, emb = _comments(rng.integers(0, 3, 100), rng)
+    first = itm.fit(texts, emb)
+    retired_goal = int(first[texts.index("0:goal")])
+    # goal・penalty が消えて offside と var だけになる → 再学習で goal・penalty のIDは引退
+    for _ in range(4):
+        texts, emb = _comments(rng.choice([2, 3], 100), rng)
+        itm.assign(texts, emb)
+    assert itm.get_stats()["refits"] >= 1
+    live = set(itm.stable_of.values())
+    assert set(itm.words_by_tid()) == live == set(itm.words)
+    assert retired_goal not in live and itm.label(retired_goal) == f"group_{retired_goal}"
+    assert {itm.label(g) for g in live} == {"offside", "var"}
+
+
+def test_bounded_ids_are_recycled():
+    rng = np.random.default_rng(2)
+    calls = []
+    itm = IncrementalTopicModel(_make_fit_fn(calls), warmup=100, drift_window=100, refit_size=100,
+                                max_groups=2)
+    texts, emb = _comments(rng.integers(0, 2, 100), rng)
+    itm.fit(texts, emb)
+    # penalty が消えて var が出てきた → penalty のIDを var に再利用
+    for _ in range(3):
+        texts, emb = _comments(rng.choice([0, 3], 100), rng)
+        ids = itm.assign(texts, emb)
+    assert itm.get_stats()["refits"] >= 1
+    replaced = itm.pop_replaced()
+    assert len(replaced) == 1 and itm.label(replaced[0]) == "var"
+    texts, emb = _comments([0, 3], rng)
+    assert itm.assign(texts, emb).tolist() == [0, replaced[0]] and itm.pop_replaced() == []
+
+
+def test_saved_model_without_refit():
+    rng = np.random.default_rng(3)
+    model = NearestCentroidModel(np.stack([_basis(0), _basis(1)]), {0: "goal", 1: "penalty"})
+    itm = IncrementalTopicModel(model=model, drift_window=50)
+    texts, emb = _comments(rng.integers(0, 2, 60), rng)
+    ids = itm.assign(texts, emb)
+    assert ids.tolist() == [int(t[0]) for t in texts]
+    # fit_fn がなければドリフトしても再学習しない（基準は最初の drift_window 件）
+    texts, emb = _comments([2] * 100, rng)
+    assert (itm.assign(texts, emb) == -1).all() and itm.get_stats()["refits"] == 0
+    assert itm.baseline is not None and itm.baseline[0] == 0.0
+
+
+if __name__ == '__main__':
+    test_warmup_then_transform()
+    test_refit_on_drift_keeps_stable_ids()
+    test_retired_ids_dropped_after_refit()
+    test_bounded_ids_are_recycled()
+    test_saved_model_without_refit()
+    print("✓ Incremental topic assignment tests passed")
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""
+Language ID Test Script
+
+utils/language_id.py の文字種判定・キャッシュの動作確認
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.language_id import LanguageIdentifier, script_language, LANGDETECT_AVAILABLE
+
+
+def test_script_language():
+    assert script_language("すごいゴール") == "ja"
+    assert script_language("久保すごい") == "ja"
+    assert script_language("대박") == "ko"
+    assert script_language("555 !!!") == "unk"
+    # 漢字のみ・ラテン文字は langdetect に回す
+    assert script_language("中国") is None
+    assert script_language("golazo") is None
+    assert script_language("kubo すごい") is None
+
+
+def test_detect_many_cache(tmp_path):
+    cache = str(tmp_path / "lang.sqlite")
+    lid = LanguageIdentifier(cache_path=cache)
+    texts = ["ゴール", "what a goal by the home team", "ゴール", "😂😂"]
+    langs = lid.detect_many(texts)
+    assert langs[0] == langs[2] == "ja"
+    assert langs[3] == "unk"
+    assert lid.get_stats()['fast_path_hits'] == 2
+    if LANGDETECT_AVAILABLE:
+        assert langs[1] == "en"
+    lid.close()
+
+    # 再実行ではディスクキャッシュから返り、langdetect を呼ばない
+    lid2 = LanguageIdentifier(cache_path=cache)
+    assert lid2.detect_many(texts) == langs
+    assert lid2.get_stats()['langdetect_calls'] == 0
+
+
+if __name__ == '__main__':
+    import tempfile
+    test_script_language()
+    with tempfile.TemporaryDirectory() as d:
+        test_detect_many_cache(Path(d))
+    print("✓ Language ID tests passed")
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+Lexical Engine Test Script
+
+utils/lexical_engine.py の距離が Counter ベースの compute_lexical_distance と一致するか確認
+"""
+
+import sys
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.distribution_distance import js_distance
+from utils.lexical_engine import LexicalEngine
+
+
+def _normalize(word):
+    w = word.lower().strip(".,!?")
+    return w if len(w) >= 2 else ""
+
+
+def _reference(comments_a, comments_b, top_n):
+    """旧 compute_lexical_distance と同じ計算（参照実装）"""
+    ca, cb = Counter(), Counter()
+    for comments, counter in ((comments_a, ca), (comments_b, cb)):
+        for txt in comments:
+            if not isinstance(txt, str):
+                continue
+            for w in txt.split():
+                norm = _normalize(w)
+                if norm:
+                    counter[norm] += 1
+    if len(ca) < 7 or len(cb) < 7:
+        return 1.0
+    vocab = [w for w, _ in (ca + cb).most_common(top_n) if w]
+    if len(vocab) < 5:
+        return 1.0
+    va = np.array([ca.get(w, 0) for w in vocab], dtype=float)
+    vb = np.array([cb.get(w, 0) for w in vocab], dtype=float)
+    return js_distance(va, vb)
+
+
+def _random_comments(rng, words, n):
+    return [" ".join(rng.choice(words, size=rng.integers(1, 6))) for _ in range(n)]
+
+
+def test_matches_reference():
+    rng = np.random.default_rng(0)
+    words = [f"w{i}" for i in range(40)] + ["GOAL", "goal!", "a", "ok"]
+    docs = [_random_comments(rng, words, int(rng.integers(0, 30))) for _ in range(8)]
+    docs.append(["short text", None, 3])  # 語数不足・非文字列
+    for top_n in (6, 1000):  # 6 は上位語の同数打ち切りを含む
+        engine = LexicalEngine(_normalize, top_n=top_n)
+        D = engine.distance_matrix(docs)
+        for i in range(len(docs)):
+            assert D[i, i] == 0.0
+            for j in range(i + 1, len(docs)):
+                ref = _reference(docs[i], docs[j], top_n)
+                assert D[i, j] == ref and D[j, i] == ref
+                assert engine.distance(docs[i], docs[j]) == ref
+
+
+def test_documents_are_shared():
+    engine = LexicalEngine(_normalize)
+    a = ["alpha beta gamma delta", "epsilon zeta eta theta"]
+    b = ["alpha beta iota kappa", "lambda zeta eta theta"]
+    engine.distance(a, b)
+    engine.distance_matrix([a, b, list(a)])
+    stats = engine.get_stats()
+    assert stats['documents'] == 2
+    assert stats['cached_pairs'] == 3  # (a, b), (a, a), (b, a)
+    indptr, indices, data = engine.csr_arrays()
+    assert indptr.tolist() == [0, 8, 16]
+    assert data.sum() == 16
+
+
+def test_caches_are_bounded():
+    rng = np.random.default_rng(1)
+    words = [f"w{i}" for i in range(30)]
+    docs = [_random_comments(rng, words, 20) for _ in range(6)]
+    engine = LexicalEngine(_normalize, top_n=10, max_documents=3, max_pairs=2)
+    for i in range(len(docs) - 1):
+        # 文書キャッシュを作り直しても距離は変わらない
+        assert engine.distance(docs[i], docs[i + 1]) == _reference(docs[i], docs[i + 1], 10)
+        assert engine.n_documents <= 3 and engine.get_stats()['cached_pairs'] <= 2
+    assert engine.get_stats()['resets'] == 2  # 文書 0-2, 2-4, 4-5 の3世代
+    # 登録済みの文書だけなら作り直さない
+    engine.distance(docs[5], docs[4])
+    assert engine.get_stats()['resets'] == 2
+
+    # ペア距離は LRU（最も長く使われていないペアから破棄）
+    engine = LexicalEngine(_normalize, top_n=10, max_pairs=2)
+    ids = [engine.add_document(d) for d in docs[:3]]
+    engine.distance_between(ids[0], ids[1])
+    engine.distance_between(ids[0], ids[2])
+    engine.distance_between(ids[0], ids[1])
+    engine.distance_between(ids[1], ids[2])
+    assert list(engine._pair_cache) == [(ids[0], ids[1]), (ids[1], ids[2])]
+
+    # 語彙が上限を超えたら文書キャッシュと一緒に作り直す（距離は変わらない）
+    engine = LexicalEngine(_normalize, top_n=10, max_vocab=5)
+    engine.distance(docs[0], docs[1])
+    assert len(engine.vocab) > 5
+    assert engine.distance(docs[2], docs[3]) == _reference(docs[2], docs[3], 10)
+    assert engine.get_stats()['resets'] == 1 and engine.n_documents == 2
+
+    # 1回の distance_matrix は上限を超えても全文書を保持
+    engine = LexicalEngine(_normalize, top_n=10, max_documents=2)
+    D = engine.distance_matrix(docs[:4])
+    assert engine.n_documents == 4 and D[0, 3] == _reference(docs[0], docs[3], 10)
+
+
+if __name__ == '__main__':
+    test_matches_reference()
+    test_documents_are_shared()
+    test_caches_are_bounded()
+    print("✓ Lexical engine tests passed")
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+Noise Filter Test Script
+
+utils/noise_filter.py の一括判定 noise_mask が is_noise と一致するか、
+get_statistics のルール別集計が正しいかを確認
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.noise_filter import NoiseFilter
+
+TEXTS = [
+    "Great goal!", "kkkkkkkk", "wwwwwwww", "laugh laugh laugh", "Nice play", "!!!!!", "12345",
+    "Brasil vs Japan", "...", "ゴール!", "草草草草", "emoji_fire", "-----", ",", "a", "",
+    "   ", None, 3.5, "JAJA jaja", "goooooal", "ab", "ok!!!!", "hmm....", "lol lol",
+]
+
+
+def test_noise_mask_matches_is_noise():
+    nf = NoiseFilter()
+    expected = [nf.is_noise(t) for t in TEXTS]
+    mask = nf.noise_mask(TEXTS)
+    assert mask.dtype == bool
+    assert mask.tolist() == expected
+    assert nf.noise_mask(pd.Series(TEXTS, index=range(100, 100 + len(TEXTS)))).tolist() == expected
+    assert nf.noise_mask([]).tolist() == []
+
+
+def test_max_char_ratio():
+    ratio = NoiseFilter.max_char_ratio(["aaab", "", "ゴール", "😂😂"])
+    assert np.allclose(ratio, [0.75, 0.0, 1 / 3, 1.0])
+
+
+def test_rule_hits():
+    nf = NoiseFilter()
+    stats = nf.get_statistics(TEXTS)
+    assert stats['noise'] == sum(nf.is_noise(t) for t in TEXTS)
+    assert sum(stats['rule_hits'].values()) == stats['noise']
+    hits = stats['rule_hits']
+    assert hits['non_string'] == 2
+    assert hits['empty'] == 2
+    assert hits['pattern:^k{3,}$'] == 1
+    assert hits['pattern:^jaja( jaja)*$'] == 1  # 小文字化してから判定
+    assert hits['single_char'] == 1
+    assert hits['repeated_char'] == 1  # goooooal は 80% 未満、草草草草 のみ
+    assert hits['substring:!!!!'] == 1
+
+
+if __name__ == '__main__':
+    test_noise_mask_matches_is_noise()
+    test_max_char_ratio()
+    test_rule_hits()
+    print("✓ Noise filter tests passed")
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+Online Event Detection Test Script
+
+utils/online_events.py の追記CSVの追従・キュー入力・リングバッファ・オンラインのピーク検出を確認
+"""
+
+import os
+import queue
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.online_events import (follow_csv, queue_batches, TermGrouper, RollingGroupCounts,
+                                  OnlineEventDetector)
+from utils.peak_detection import smooth_series, local_peaks
+
+T0 = pd.Timestamp("2024-01-01 20:00:00")
+
+
+def _synthetic_stream(n_bins=400, seed=0):
+    """ビンごとのコメント数と、それに対応するコメントのバッチ（1ビン = 30秒）"""
+    rng = np.random.default_rng(seed)
+    lam = np.full(n_bins, 2.0)
+    lam[[100, 101, 250]] = [40, 25, 30]
+    counts = rng.poisson(lam)
+    batches = []
+    for b, c in enumerate(counts):
+        ts = [T0 + pd.Timedelta(seconds=b * 30 + s) for s in np.sort(rng.uniform(0, 30, c))]
+        batches.append(pd.DataFrame({"timestamp": ts, "message_clean": ["goal golazo"] * c}))
+    return counts, batches
+
+
+def test_follow_csv_partial_lines():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "live.csv")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write('timestamp,message,author\n2024-01-01 20:00:01,ゴール,a\n2024-01-01 20:00:02,"multi\nli')
+        stream = follow_csv(path, poll_seconds=0.01, idle_timeout=0.1)
+        first = next(stream)
+        assert first["message"].tolist() == ["ゴール"]
+        with open(path, "a", encoding="utf-8") as f:
+            f.write('ne",b\n2024-01-01 20:00:03,123,c\n')
+        second = next(stream)
+        assert second["message"].tolist() == ["multi\nline", "123"]
+        assert list(second.columns) == ["timestamp", "message", "author"]
+        assert list(stream) == []  # 増えなくなったら終了
+
+
+def test_follow_csv_bounded_blocks():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "live.csv")
+        rows = [("2024-01-01 20:00:%02d" % i, f"ゴール{i}", "a") for i in range(40)]
+        rows[7] = (rows[7][0], "複数\n行, のコメント", "b")
+        pd.DataFrame(rows, columns=["timestamp", "message", "author"]).to_csv(path, index=False,
+                                                                                encoding="utf-8-sig")
+        # 既存分が大きくても block_bytes ずつ読む（マルチバイト文字・引用符内の改行がブロック境界を跨いでもよい）
+        batches = list(follow_csv(path, poll_seconds=0.01, idle_timeout=0.05, block_bytes=37))
+        assert len(batches) > 10
+        got = pd.concat(batches, ignore_index=True)
+        assert got["message"].tolist() == [r[1] for r in rows]
+        assert list(got.columns) == ["timestamp", "message", "author"]
+
+
+def test_queue_batches():
+    q = queue.Queue()
+    for i in range(5):
+        q.put({"timestamp": T0, "message": f"m{i}"})
+    q.put(None)
+    batches = list(queue_batches(q, max_rows=2, timeout=0.05))
+    assert [len(b) for b in batches] == [2, 2, 1]
+
+
+def test_term_grouper_is_bounded():
+    grouper = TermGrouper(max_groups=2)
+    gids = grouper.assign(["goal goal gol", "penalty", "x", "offside"])
+    assert gids.tolist()[:3] == [0, 1, -1]
+    # 語彙が一杯なら件数の最も少ない語を置き換える
+    assert gids[3] in (0, 1) and grouper.label(int(gids[3])) == "offside"
+    assert len(grouper.term_to_gid) == 2 and grouper.pop_replaced() == [int(gids[3])]
+
+
+def test_rolling_counts_constant_memory():
+    counts = RollingGroupCounts(max_groups=3, window_bins=10)
+    counts.add(np.array([0, 0, 1]), np.array([0, 0, 2]))
+    counts.add(np.array([25]), np.array([1]))
+    assert counts.counts.shape == (3, 10)
+    # 窓から外れたビンは消えている
+    assert counts.window(16, 25).sum() == 1.0
+    # 窓より古いコメントは捨てる
+    assert counts.add(np.array([3]), np.array([0])) == 0
+
+
+def test_online_events_match_offline_peaks():
+    counts, batches = _synthetic_stream()
+    detector = OnlineEventDetector(bin_seconds=30, window_bins=60, max_groups=4, start_time=T0)
+    events = []
+    for batch in batches:
+        events += detector.ingest(batch)
+    events += detector.flush()
+
+    offline = set(local_peaks(smooth_series(counts.astype(float), k=5), n_keep=len(counts)))
+    bins = [e["bin_id"] for e in events]
+    assert all(b in offline for b in bins)
+    # 2つのバーストを検出し、遅延は smooth_k // 2 + 2 ビン以内
+    assert any(abs(b - 100) <= 2 for b in bins) and any(abs(b - 250) <= 2 for b in bins)
+    assert all(e["latency_sec"] <= detector.latency_bins * 30 for e in events)
+    assert events[0]["label"] == "goal" and events[0]["comments"]
+    assert detector.counts.counts.shape == (4, 60)
+
+
+if __name__ == '__main__':
+    test_follow_csv_partial_lines()
+    test_follow_csv_bounded_blocks()
+    test_queue_batches()
+    test_term_grouper_is_bounded()
+    test_rolling_counts_constant_memory()
+    test_online_events_match_offline_peaks()
+    print("✓ Online event detection tests passed")
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+Parameter Sweep Test Script
+
+utils/param_sweep.py のグリッド展開・グリッド点ごとの出力先・並列評価時のグリッド順の回収・集計表を確認
+（event_comparison のストリーム・イベントの代わりにグリッド点だけを見る評価関数を使う）
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pandas as pd
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.param_sweep import (SWEEP_PARAMS, expand_sweep_grid, sweep_point_name, call_with_buffered_log,
+                               evaluate_sweep_points)
+from utils.table_store import load_table
+
+DEFAULTS = SimpleNamespace(time_bins=100, embedding_match_th=0.7, time_match_th=15, word_match_th=0.05,
+                           n_events=5)
+
+
+def _evaluate(point, out_dir):
+    """グリッド点の値から決まる集計行を返し、out_dir に結果ファイルを書く（evaluate_sweep_point の代わり）"""
+    os.makedirs(out_dir, exist_ok=True)
+    pd.DataFrame({"time_bins": [point["time_bins"]]}).to_csv(os.path.join(out_dir, "similar_event_details.csv"),
+                                                              index=False)
+    summary = dict(point)
+    summary.update({"n_pairs": point["time_bins"] // 10, "out_dir": out_dir})
+    return summary
+
+
+def _slow_first_worker(point, out_dir):
+    """先のグリッド点ほど遅く終わるワーカー（完了順がグリッド順と逆になる）"""
+    time.sleep(0.3 if point["time_bins"] == 20 else 0.0)
+    return call_with_buffered_log(lambda: (print(f"point {point['time_bins']}"), _evaluate(point, out_dir))[1])
+
+
+def test_expand_grid():
+    points = expand_sweep_grid({"time_bins": [20, 50], "embedding_match_th": [None, 0.6]}, DEFAULTS)
+    assert len(points) == 4
+    assert [(p["time_bins"], p["embedding_match_th"]) for p in points] == [(20, None), (20, 0.6),
+                                                                           (50, None), (50, 0.6)]
+    # grid にない引数は既定値で固定
+    assert all(p["n_events"] == 5 and p["time_match_th"] == 15 for p in points)
+    assert all(list(p) == list(SWEEP_PARAMS) for p in points)
+    assert expand_sweep_grid({}, DEFAULTS) == [vars(DEFAULTS)]
+    try:
+        expand_sweep_grid({"time_bins": [20], "jaccard_th": [0.5]}, DEFAULTS)
+        assert False, "unknown sweep parameter must raise"
+    except ValueError as e:
+        assert "jaccard_th" in str(e)
+
+
+def test_point_names_are_unique_dirs():
+    points = expand_sweep_grid({"time_bins": [20, 50], "embedding_match_th": [None, 0.6],
+                                "word_match_th": [0.05, 0.1]}, DEFAULTS)
+    names = [sweep_point_name(p) for p in points]
+    assert len(set(names)) == len(points)
+    assert names[0] == "bins20_embnone_time15_word0.05_n5"
+    with tempfile.TemporaryDirectory() as tmp:
+        summary = evaluate_sweep_points(points, tmp, _evaluate)
+        # グリッド点ごとに別ディレクトリへ出力し、共有ファイルは集計表だけ
+        assert sorted(os.listdir(tmp)) == sorted(names + ["sweep_summary.csv"])
+        for p, d in zip(points, summary["out_dir"]):
+            assert d == os.path.join(tmp, sweep_point_name(p))
+            assert pd.read_csv(os.path.join(d, "similar_event_details.csv"))["time_bins"].tolist() == [p["time_bins"]]
+
+
+def test_summary_contents():
+    points = expand_sweep_grid({"time_bins": [20, 50, 100]}, DEFAULTS)
+    with tempfile.TemporaryDirectory() as tmp:
+        summary = evaluate_sweep_points(points, tmp, _evaluate)
+        saved = load_table(os.path.join(tmp, "sweep_summary.csv"))
+        assert list(saved.columns) == list(SWEEP_PARAMS) + ["n_pairs", "out_dir"]
+        assert saved["time_bins"].tolist() == [20, 50, 100]
+        assert saved["n_pairs"].tolist() == [2, 5, 10]
+        assert summary["out_dir"].tolist() == saved["out_dir"].tolist()
+        assert evaluate_sweep_points([], os.path.join(tmp, "empty"), _evaluate).empty
+
+
+def test_pool_collects_in_grid_order():
+    points = expand_sweep_grid({"time_bins": [20, 50, 100]}, DEFAULTS)
+    buf = io.StringIO()
+    with tempfile.TemporaryDirectory() as tmp:
+        seq = evaluate_sweep_points(points, os.path.join(tmp, "seq"), _evaluate)
+        with contextlib.redirect_stdout(buf):
+            pooled = evaluate_sweep_points(points, os.path.join(tmp, "pool"), _evaluate, workers=3,
+                                           worker=_slow_first_worker)
+        # 最初の点が最後に終わってもグリッド順
+        assert pooled["time_bins"].tolist() == [20, 50, 100]
+        assert pooled["n_pairs"].tolist() == seq["n_pairs"].tolist()
+        assert all(os.path.isdir(d) for d in pooled["out_dir"])
+    # ワーカーのログもグリッド順
+    out = buf.getvalue()
+    assert out.index("point 20") < out.index("point 50") < out.index("point 100")
+
+
+if __name__ == '__main__':
+    test_expand_grid()
+    test_point_names_are_unique_dirs()
+    test_summary_contents()
+    test_pool_collects_in_grid_order()
+    print("✓ Parameter sweep tests passed")
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Peak Detection Test Script
+
+utils/peak_detection.py の行列版の平滑化・ピーク抽出がグループごとのループと一致することを確認
+"""
+
+import sys
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.peak_detection import timeseries_matrix, smooth_series, local_peaks, peak_prominences
+
+
+def _smooth_reference(y: np.ndarray, k: int) -> np.ndarray:
+    """従来の1系列ずつの平滑化"""
+    pad = k // 2
+    ypad = np.pad(y, (pad, pad), mode="reflect")
+    return np.convolve(ypad, np.ones(k) / k, mode="valid")
+
+
+def _peaks_reference(y: np.ndarray, n_keep: int) -> List[int]:
+    """従来の1系列ずつのピーク抽出"""
+    idxs = []
+    for i in range(len(y)):
+        l = y[i-1] if i-1 >= 0 else -np.inf
+        r = y[i+1] if i+1 < len(y) else -np.inf
+        if y[i] >= l and y[i] >= r:
+            idxs.append(i)
+    idxs.sort(key=lambda i: y[i], reverse=True)
+    return idxs[:n_keep]
+
+
+def _prominence_reference(y: np.ndarray, i: int) -> float:
+    """左右に自分より高い点まで探索した区間の最小値のうち高い方からの高さ"""
+    lo = i
+    while lo - 1 >= 0 and y[lo - 1] <= y[i]:
+        lo -= 1
+    hi = i
+    while hi + 1 < len(y) and y[hi + 1] <= y[i]:
+        hi += 1
+    return y[i] - max(y[lo:i + 1].min(), y[i:hi + 1].min())
+
+
+def _filtered_reference(y: np.ndarray, n_keep: int, prominence: float, min_distance: int) -> List[int]:
+    """プロミネンスで除外 → 強い順に min_distance 未満のピークを除外"""
+    out: List[int] = []
+    for i in _peaks_reference(y, len(y)):
+        if _prominence_reference(y, i) < prominence:
+            continue
+        if all(abs(i - j) >= min_distance for j in out):
+            out.append(i)
+    return out[:n_keep]
+
+
+def test_timeseries_matrix():
+    mat = timeseries_matrix([0, 1, 1, 0], [2, 0, 0, 1], [3, 1, 2, 5], n_groups=3, n_bins=4)
+    assert mat.tolist() == [[0, 5, 3, 0], [3, 0, 0, 0], [0, 0, 0, 0]]
+
+
+def test_smooth_matches_convolve():
+    rng = np.random.default_rng(1)
+    mat = rng.poisson(3.0, size=(20, 50)).astype(float)
+    out = smooth_series(mat, k=5)
+    assert out.shape == mat.shape
+    # 同値判定が変わらないよう np.convolve とビット単位で一致
+    for row, ref in zip(out, mat):
+        assert np.array_equal(row, _smooth_reference(ref, 5))
+    assert np.array_equal(smooth_series(mat[0], k=3), _smooth_reference(mat[0], 3))
+    assert np.array_equal(smooth_series(mat, k=1), mat)
+
+
+def test_peaks_match_loop():
+    rng = np.random.default_rng(2)
+    counts = rng.poisson(2.0, size=(200, 300)).astype(float)
+    peaks = local_peaks(smooth_series(counts, k=5), n_keep=5)
+    for row, got in zip(counts, peaks):
+        assert got == _peaks_reference(_smooth_reference(row, 5), 5)
+    # 1次元・同値（平坦）・短い系列
+    assert local_peaks(np.array([1.0, 3.0, 2.0, 3.0]), n_keep=3) == [1, 3]
+    assert local_peaks(np.zeros(4), n_keep=2) == [0, 1]
+    assert local_peaks(np.array([4.0]), n_keep=3) == [0]
+    assert local_peaks(np.zeros((2, 0)), n_keep=3) == [[], []]
+
+
+def test_prominence_and_min_distance():
+    rng = np.random.default_rng(3)
+    smoothed = smooth_series(rng.poisson(3.0, size=(30, 120)).astype(float), k=5)
+    prom = peak_prominences(smoothed)
+    for row, got in zip(smoothed, prom):
+        assert np.allclose(got, [_prominence_reference(row, i) for i in range(len(row))])
+
+    for p, d in [(1.0, 1), (0.0, 8), (1.0, 8)]:
+        peaks = local_peaks(smoothed, n_keep=5, prominence=p, min_distance=d)
+        for row, got in zip(smoothed, peaks):
+            assert got == _filtered_reference(row, 5, p, d)
+
+    y = np.array([0.0, 5.0, 4.9, 4.95, 0.0, 2.0, 0.0])
+    assert local_peaks(y, n_keep=3) == [1, 3, 5]
+    assert local_peaks(y, n_keep=3, prominence=1.0) == [1, 5]  # 3 は 1 との谷が浅い
+    assert local_peaks(y, n_keep=3, min_distance=3) == [1, 5]
+
+
+if __name__ == '__main__':
+    test_timeseries_matrix()
+    test_smooth_matches_convolve()
+    test_peaks_match_loop()
+    test_prominence_and_min_distance()
+    print("✓ Peak detection tests passed")
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Stage Cache Test Script
+
+utils/stage_cache.py のキー計算・保存/読み込み・externals の差し戻しを確認
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.stage_cache import StageCache, stage_key, file_digest
+
+
+class _HeavyModel:
+    """保存したくない巨大オブジェクトの代役"""
+
+
+def test_stage_key():
+    base = stage_key("match", {"th": 0.7, "time": 15}, ["abc"])
+    assert base == stage_key("match", {"time": 15, "th": 0.7}, ["abc"])  # 引数の順序は無関係
+    assert base != stage_key("match", {"th": 0.75, "time": 15}, ["abc"])
+    assert base != stage_key("match", {"th": 0.7, "time": 15}, ["abd"])
+    assert base != stage_key("similarity", {"th": 0.7, "time": 15}, ["abc"])
+
+
+def test_run_reuses_saved_output():
+    with tempfile.TemporaryDirectory() as tmp:
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return {"values": np.arange(5)}
+
+        cache = StageCache(tmp)
+        key1, out1 = cache.run("events", {"n": 5}, compute, parents=["p"])
+        # 別インスタンス（再実行相当）でもディスクから読み込む
+        cache2 = StageCache(tmp)
+        key2, out2 = cache2.run("events", {"n": 5}, compute, parents=["p"])
+        assert key1 == key2 and len(calls) == 1
+        assert np.array_equal(out1["values"], out2["values"])
+        assert cache2.get_stats() == {"events": {"hits": 1, "misses": 0}}
+        # 引数が変われば再計算
+        cache2.run("events", {"n": 6}, compute, parents=["p"])
+        assert len(calls) == 2
+
+        disabled = StageCache(tmp, enabled=False)
+        disabled.run("events", {"n": 5}, compute, parents=["p"])
+        assert len(calls) == 3
+
+
+def test_externals_are_not_pickled():
+    with tempfile.TemporaryDirectory() as tmp:
+        model = _HeavyModel()
+        obj = {"topic_model": {"embedding_model": model, "topics": [0, 1, -1]}}
+        StageCache(tmp).run("topic", {}, lambda: obj, externals={"embedding_model": model})
+
+        other = _HeavyModel()
+        _, loaded = StageCache(tmp).run("topic", {}, lambda: None, externals={"embedding_model": other})
+        assert loaded["topic_model"]["embedding_model"] is other
+        assert loaded["topic_model"]["topics"] == [0, 1, -1]
+
+
+def test_file_digest():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "a.csv"
+        path.write_text("timestamp,message\n1,goal\n", encoding="utf-8")
+        d1 = file_digest(str(path))
+        path.write_text("timestamp,message\n1,gol\n", encoding="utf-8")
+        assert file_digest(str(path)) != d1
+
+
+def test_memo_is_bounded():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = StageCache(tmp, memo_size=2)
+        for n in range(4):
+            cache.run("events", {"n": n}, lambda: [n])
+        # プロセス内メモは直近2件だけ、古い出力はディスクから読み直す
+        assert len(cache._memo) == 2
+        key0 = stage_key("events", {"n": 0})
+        assert ("events", key0) not in cache._memo
+        assert cache.run("events", {"n": 0}, lambda: None)[1] == [0]
+        assert StageCache(tmp, memo_size=0).run("events", {"n": 1}, lambda: None)[1] == [1]
+
+
+def test_prune_removes_least_recently_used():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = StageCache(tmp)
+        keys = [cache.run("match", {"n": n}, lambda: list(range(1000)))[0] for n in range(3)]
+        size = os.path.getsize(cache.path("match", keys[0]))
+        # 使用時刻: 1 → 0 → 2 の順に古い
+        for key, t in zip(keys, (2000, 1000, 3000)):
+            os.utime(cache.path("match", key), (t, t))
+        assert cache.prune(2 * size) == 1
+        assert [os.path.exists(cache.path("match", k)) for k in keys] == [True, False, True]
+        # 起動時にも上限を適用
+        StageCache(tmp, max_bytes=size)
+        assert [os.path.exists(cache.path("match", k)) for k in keys] == [False, False, True]
+
+
+if __name__ == '__main__':
+    test_stage_key()
+    test_run_reuses_saved_output()
+    test_externals_are_not_pickled()
+    test_file_digest()
+    test_memo_is_bounded()
+    test_prune_removes_least_recently_used()
+    print("✓ Stage cache tests passed")
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+Table Store Test Script
+
+utils/table_store.py の保存・列射影付き読み込み・Parquet 用の型揃えを確認
+（pyarrow / fastparquet がない環境では CSV 経由で確認）
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.table_store import (save_table, load_table, table_columns, table_paths,
+                               to_columnar, PARQUET_AVAILABLE)
+
+
+def _pairs_df():
+    return pd.DataFrame({
+        "event1_id": [1, 2, 3],
+        "event2_id": [4, 5, 6],
+        "combined_score": [0.8, 0.55, 0.3],
+        "topic_jaccard": [0.5, 0.0, 0.25],
+        "label": ["ゴール・goal", "PK", "foul"],
+    })
+
+
+def test_table_paths():
+    assert table_paths("out/a.csv") == ("out/a.csv", "out/a.parquet")
+    assert table_paths("out/a.parquet") == ("out/a.csv", "out/a.parquet")
+    assert table_paths("out/a") == ("out/a.csv", "out/a.parquet")
+
+
+def test_save_and_load_with_projection():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "event_to_event_pairs.csv")
+        df = _pairs_df()
+        written = save_table(df, path)
+        assert written[0] == path and os.path.exists(path)
+        assert (len(written) == 2) == PARQUET_AVAILABLE
+
+        pd.testing.assert_frame_equal(load_table(path), df)
+        assert table_columns(path) == list(df.columns)
+
+        # 指定順で、存在しない列は無視
+        part = load_table(path, columns=["topic_jaccard", "missing", "combined_score"])
+        assert list(part.columns) == ["topic_jaccard", "combined_score"]
+        assert np.allclose(part["combined_score"], df["combined_score"])
+
+        # 従来どおり CSV は utf-8-sig で読める
+        assert pd.read_csv(path, encoding="utf-8-sig")["label"].tolist() == df["label"].tolist()
+
+
+def test_index_saved_as_column():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "event_to_event_similarity_matrix.csv")
+        mat = pd.DataFrame([[1.0, 0.4], [0.4, 1.0]], index=["Event_1", "Event_2"],
+                           columns=["Event_1", "Event_2"])
+        save_table(mat, path, index=True)
+        # CSV / Parquet のどちらから読んでもインデックスは "index" 列（"Unnamed: 0" にならない）
+        loaded = load_table(path)
+        pd.testing.assert_frame_equal(loaded, mat.reset_index())
+        assert table_columns(path) == ["index", "Event_1", "Event_2"]
+        assert load_table(path, columns=["index", "Event_2"])["Event_2"].tolist() == [0.4, 1.0]
+        os.remove(path)
+        if PARQUET_AVAILABLE:
+            pd.testing.assert_frame_equal(load_table(path), mat.reset_index())
+
+
+def test_to_columnar():
+    df = pd.DataFrame({
+        "sim_event_id": [1, 2],
+        "bin_start_sec": [12.5, ""],  # 未検出行は空文字
+        "top_words": [["goal", "gol"], "foul"],
+        "label": ["a", None],
+        0: [1, 2],
+    })
+    out = to_columnar(df)
+    assert list(out.columns) == ["sim_event_id", "bin_start_sec", "top_words", "label", "0"]
+    assert out["bin_start_sec"].dtype.kind == "f" and np.isnan(out["bin_start_sec"][1])
+    assert out["top_words"].tolist() == ["['goal', 'gol']", "foul"]
+    assert out["label"][0] == "a" and pd.isna(out["label"][1])
+    # 元のテーブルは変更しない
+    assert df["bin_start_sec"].tolist() == [12.5, ""]
+
+
+if __name__ == '__main__':
+    test_table_paths()
+    test_save_and_load_with_projection()
+    test_index_saved_as_column()
+    test_to_columnar()
+    print("✓ Table store tests passed")
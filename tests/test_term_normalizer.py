@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Term Normalizer Test Script
+
+utils/term_normalizer.py が従来の normalize_term / normalize_with_synonyms と同じ結果を返すか確認
+"""
+
+import re
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.term_normalizer import TermNormalizer
+
+TERM_MAP = {"ホームラン": "home_run", "本塁打": "home_run", "referee": "umpire", "árbitro": "umpire"}
+SYNONYMS = {
+    "goal": {"goal", "gol", "ゴール", "得点", "scored"},
+    "homerun": {"homerun", "home", "本塁打"},
+    "score": {"score", "得点"},  # "得点" は先に出現する goal を採用
+    "referee": {"referee", "ref", "árbitro"},
+}
+
+
+def _synonym(word):
+    """従来の normalize_with_synonyms（線形探索）"""
+    word_lower = word.lower().strip()
+    for canonical, synonyms in SYNONYMS.items():
+        if word_lower in synonyms:
+            return canonical
+    return word_lower
+
+
+def _reference(word):
+    """従来の normalize_term"""
+    if not isinstance(word, str):
+        return word
+    w = word.lower().strip()
+    if not w:
+        return ""
+    if w.isdigit():
+        return ""
+    if re.match(r'^[^\w\s]+$', w) and not any(ord(c) > 0x1F600 for c in w):
+        return ""
+    w = re.sub(r'(.)\1{2,}', r'\1\1', w)
+    if len(w) == 1:
+        if not (0x3040 <= ord(w) <= 0x309F or 0x30A0 <= ord(w) <= 0x30FF or 0x4E00 <= ord(w) <= 0x9FFF):
+            return ""
+    w = TERM_MAP.get(w, w)
+    w = _synonym(w)
+    if len(w) < 2 and not any(0x3040 <= ord(c) <= 0x9FFF for c in w):
+        return ""
+    return w
+
+
+WORDS = ["GOAL", "gollll", "Gol", " ゴール ", "得点", "ホームラン", "本塁打", "Referee", "árbitro",
+         "123", "!!!", "😀😀", "x", "あ", "kkkkkk", "", "  ", "home", "scored", "wwww", "草", None, 3.5]
+
+
+def test_matches_reference():
+    tn = TermNormalizer(TERM_MAP, SYNONYMS)
+    for w in WORDS:
+        assert tn.normalize(w) == _reference(w), w
+        if isinstance(w, str):
+            assert tn.synonym(w) == _synonym(w), w
+    assert tn.normalize_many(WORDS) == [_reference(w) for w in WORDS]
+    assert tn.normalize("得点") == "goal"
+    assert tn.normalize("本塁打") == "home_run"
+
+
+def test_cache_stats():
+    tn = TermNormalizer(TERM_MAP, SYNONYMS, cache_size=4)
+    tn.normalize_many(["goal", "goal", "gol", "goal"])
+    stats = tn.get_stats()
+    assert stats['misses'] == 2 and stats['hits'] == 2
+    tn.normalize_many([f"word{i}" for i in range(10)])
+    assert tn.get_stats()['cache_entries'] == 4
+
+
+if __name__ == '__main__':
+    test_matches_reference()
+    test_cache_stats()
+    print("✓ Term normalizer tests passed")
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Text Preprocess Regression Test Script
+
+utils/text_preprocess.py の一括前処理が、従来の preprocess_text / segment_text を
+1件ずつ適用した結果と完全に一致するかを data/chat の全ファイルで確認
+"""
+
+import re
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import utils.text_preprocess as text_preprocess
+from utils.text_preprocess import preprocess_text, preprocess_texts, segment_text, _preprocess_chunk
+
+CHAT_DIR = Path(__file__).parent.parent / "data" / "chat"
+
+
+def _segment_text(text):
+    """従来の segment_text（文字ループ）"""
+    result = []
+    prev_jp = None
+    for ch in text:
+        is_jp = ('\u3040' <= ch <= '\u30ff') or ('\u4e00' <= ch <= '\u9fff')
+        if prev_jp is not None and is_jp != prev_jp:
+            result.append(' ')
+        result.append(ch)
+        prev_jp = is_jp
+    return ''.join(result)
+
+
+def _reference(text, segment=True):
+    """従来の preprocess_text（segment=False は utils/topic.py 版）"""
+    if not isinstance(text, str):
+        return ""
+    text = re.sub(r"http\S+|www\.\S+", " ", text)
+    text = re.sub(r"@\w+", " ", text)
+    text = re.sub(r"#\w+", " ", text)
+    text = (text.replace("😂", " laugh ").replace("😭", " cry ")
+                .replace("👏", " clap ").replace("🔥", " fire "))
+    text = re.sub(r"[^\w\s\u4E00-\u9FFF\u3040-\u30FF\uAC00-\uD7AF]", " ", text)
+    if segment:
+        text = _segment_text(text)
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def _read_messages(path):
+    for enc in ["utf-8", "utf-8-sig", "cp932", "iso-8859-1"]:
+        try:
+            df = pd.read_csv(path, encoding=enc)
+            break
+        except Exception:
+            continue
+    else:
+        return []
+    if "message" not in df.columns:
+        return []
+    return df["message"].dropna().astype(str).tolist()
+
+
+EDGE_CASES = [
+    "@http://example.com/x", "#www.example.com", "#tag@user", "@user#tag", "abc😂def🔥",
+    "ゴール!!GOAL😭👏", "見てhttp://t.co/abc見て", "ΑΣ ΟΔΟΣ", "  spaced\tout\n", "", "😀",
+    "日本語とEnglishの混在123テスト", "wwwww", "http", "a\x00b", "한국어 테스트#태그",
+]
+
+
+def test_edge_cases():
+    for segment in (True, False):
+        expected = [_reference(t, segment) for t in EDGE_CASES]
+        assert preprocess_texts(EDGE_CASES, segment=segment) == expected
+        assert [preprocess_text(t, segment) for t in EDGE_CASES] == expected
+    assert _preprocess_chunk(["a", None, 1.5], True) == ["a", "", ""]
+    for t in EDGE_CASES:
+        assert segment_text(t) == _segment_text(t)
+
+
+def test_matches_reference_on_chat_data():
+    files = sorted(CHAT_DIR.glob("*.csv"))
+    assert files, "data/chat に CSV がありません"
+    for path in files:
+        messages = _read_messages(path)
+        for segment in (True, False):
+            got = preprocess_texts(messages, segment=segment, chunk_size=5000)
+            expected = [_reference(t, segment) for t in messages]
+            assert got == expected, path.name
+
+
+def test_process_pool_matches_sequential():
+    texts = [f"{t} {i}" if isinstance(t, str) else t for i in range(50) for t in EDGE_CASES]
+    expected = preprocess_texts(texts, segment=True, chunk_size=64)
+    saved = text_preprocess.POOL_THRESHOLD
+    text_preprocess.POOL_THRESHOLD = 100  # 小さなデータでもプロセスプールを使う
+    try:
+        assert preprocess_texts(texts, segment=True, workers=2, chunk_size=64) == expected
+    finally:
+        text_preprocess.POOL_THRESHOLD = saved
+
+
+if __name__ == '__main__':
+    test_edge_cases()
+    test_matches_reference_on_chat_data()
+    test_process_pool_matches_sequential()
+    print("✓ Text preprocess tests passed")
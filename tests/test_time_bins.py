@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+Time Bin Test Script
+
+utils/time_bins.py のベクトル化割り当てが従来のループ実装と一致するか、
+topic_bin_counts が BERTopic.topics_over_time と同じ件数を返すかを確認
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.time_bins import build_relative_time_bins, assign_time_bins, TimeBinIndex, topic_bin_counts
+
+
+def _loop_assign(ts, bins):
+    """従来実装（区間を線形探索し、見つからなければ左端が最も近いビン）"""
+    out = []
+    for t in ts:
+        b = None
+        for bi, iv in enumerate(bins):
+            if t >= iv.left and t < iv.right:
+                b = bi
+                break
+        if b is None:
+            centers = np.array([iv.left.value for iv in bins], dtype=np.int64)
+            b = int(np.argmin(np.abs(centers - int(t.value))))
+        out.append(b)
+    return np.array(out)
+
+
+def test_assign_matches_loop():
+    rng = np.random.default_rng(0)
+    base = pd.Timestamp("2024-01-01 18:00:00")
+    ts = pd.Series(base + pd.to_timedelta(np.sort(rng.integers(0, 7200, 500)), unit="s"))
+    for nr_bins in (1, 7, 60, 300):
+        bins = build_relative_time_bins(ts, nr_bins)
+        assert np.array_equal(assign_time_bins(ts, bins), _loop_assign(ts, bins))
+    # ビン外の時刻（前後）も従来と一致
+    outside = pd.Series([base - pd.Timedelta(minutes=5), base + pd.Timedelta(hours=3)])
+    bins = build_relative_time_bins(ts, 30)
+    assert np.array_equal(assign_time_bins(outside, bins), _loop_assign(outside, bins))
+
+
+def test_bin_index_rows():
+    group_ids = np.array([0, 1, 0, -1, 0, 1, 0])
+    bin_ids = np.array([0, 0, 1, 1, 2, 2, 0])
+    index = TimeBinIndex(group_ids, bin_ids)
+    assert index.rows(0, 0).tolist() == [0, 6]
+    assert index.rows(2, 0).tolist() == []
+    assert index.rows_in_range(0, 0, 1).tolist() == [0, 2, 6]
+    assert index.rows_in_range(1, 0, 2).tolist() == [1, 5]
+
+
+def _topics_over_time_counts(topics, timestamps, nr_bins):
+    """BERTopic.topics_over_time の件数集計部分（pd.cut → ビン左端 → 時刻順にトピック別件数）"""
+    documents = pd.DataFrame({"Topic": topics, "Timestamps": timestamps})
+    documents["Bins"] = pd.cut(documents.Timestamps, bins=nr_bins)
+    documents["Timestamps"] = documents.apply(lambda row: row.Bins.left, 1)
+    documents = documents.sort_values("Timestamps")
+    rows = []
+    for timestamp in documents.Timestamps.unique():
+        selection = documents.loc[documents.Timestamps == timestamp, :]
+        per_topic = selection.groupby(["Topic"], as_index=False).agg({"Timestamps": "count"})
+        rows.extend((t, f, timestamp) for t, f in zip(per_topic.Topic, per_topic.Timestamps))
+    return pd.DataFrame(rows, columns=["Topic", "Frequency", "Timestamp"])
+
+
+def test_topic_bin_counts_matches_topics_over_time():
+    rng = np.random.default_rng(1)
+    base = pd.Timestamp("2024-01-01 18:00:00")
+    ts = list(base + pd.to_timedelta(np.sort(rng.integers(0, 7200, 800)), unit="s"))
+    topics = rng.integers(0, 9, 800)
+    for nr_bins in (1, 7, 50, 300):
+        got = topic_bin_counts(topics, ts, nr_bins)
+        expected = _topics_over_time_counts(topics, ts, nr_bins)
+        assert got["Topic"].tolist() == expected["Topic"].tolist()
+        assert got["Frequency"].tolist() == expected["Frequency"].tolist()
+        assert list(pd.to_datetime(got["Timestamp"])) == list(pd.to_datetime(expected["Timestamp"]))
+    assert topic_bin_counts([], [], 10).empty
+
+
+if __name__ == '__main__':
+    test_assign_matches_loop()
+    test_bin_index_rows()
+    test_topic_bin_counts_matches_topics_over_time()
+    print("✓ Time bin tests passed")
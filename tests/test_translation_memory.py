@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+Translation Memory Test Script
+
+utils/translation_memory.py の永続化・LRU・統計の動作確認
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.translation_memory import TranslationMemory, normalize_source_text
+
+
+def test_memory_persists_across_instances(tmp_path):
+    db = str(tmp_path / "tm.sqlite")
+    memory = TranslationMemory(db)
+    assert memory.get_many("opus-mt-ja-en", ["ゴール"]) == {}
+    memory.put_many("opus-mt-ja-en", [("ゴール", "Goal"), ("すごい", "Great")])
+    memory.close()
+
+    memory2 = TranslationMemory(db)
+    found = memory2.get_many("opus-mt-ja-en", ["ゴール", "すごい", "ゴール", "やった"])
+    assert found == {"ゴール": "Goal", "すごい": "Great"}
+    # モデル名が異なれば別エントリ
+    assert memory2.get_many("opus-mt-es-en", ["ゴール"]) == {}
+
+    stats = memory2.get_stats()
+    assert stats['disk_hits'] == 2 and stats['misses'] == 2
+
+    # 2回目は LRU から返る
+    memory2.get_many("opus-mt-ja-en", ["ゴール"])
+    assert memory2.get_stats()['lru_hits'] == 1
+
+
+def test_lru_capacity(tmp_path):
+    memory = TranslationMemory(str(tmp_path / "tm.sqlite"), lru_size=2)
+    memory.put_many("m", [("a", "A"), ("b", "B"), ("c", "C")])
+    assert len(memory._lru) == 2
+    assert len(memory) == 3
+
+
+def test_normalize_source_text():
+    assert normalize_source_text("  gol ") == "gol"
+    assert normalize_source_text(None) == ""
+
+
+if __name__ == '__main__':
+    import tempfile
+    with tempfile.TemporaryDirectory() as d:
+        test_memory_persists_across_instances(Path(d) / "a")
+        test_lru_capacity(Path(d) / "b")
+    test_normalize_source_text()
+    print("✓ Translation memory tests passed")
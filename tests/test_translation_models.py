@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+Translation Model Loading / Routing Test Script
+
+utils/translation_bridge.py の翻訳モデルの遅延ロードと max_resident_models による LRU 解放、
+コメントごとの言語の振り分けと元の順序への復元を確認
+（MarianTokenizer / MarianMTModel の from_pretrained をスタブに差し替え、モデルはダウンロードしない）
+"""
+
+import contextlib
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import utils.translation_bridge as tb
+from utils.translation_bridge import TranslationBridge
+
+
+class _FakeBatch:
+    """トークナイザ出力の代わり（.to() は自身を返す）"""
+
+    def __init__(self, texts):
+        self.texts = texts
+
+    def to(self, device):
+        return self
+
+
+class FakeTokenizer:
+    def __init__(self, lang):
+        self.lang = lang
+
+    def __call__(self, batch, **kwargs):
+        return {"input_ids": _FakeBatch(list(batch))}
+
+    def batch_decode(self, outputs, skip_special_tokens=True):
+        return outputs
+
+
+class FakeModel:
+    """原文に '<言語>>' を付けて返すだけの翻訳モデル"""
+
+    def __init__(self, lang):
+        self.lang = lang
+        self.generated = []
+
+    def to(self, device):
+        return self
+
+    def eval(self):
+        return self
+
+    def generate(self, input_ids, max_length=512):
+        self.generated.append(list(input_ids.texts))
+        return [f"{self.lang}>{t}" for t in input_ids.texts]
+
+
+class FakeLoader:
+    """from_pretrained の呼び出しを記録するスタブ"""
+
+    def __init__(self, factory, fail=()):
+        self.factory = factory
+        self.fail = set(fail)
+        self.loaded = []
+
+    def from_pretrained(self, model_name, cache_dir=None):
+        lang = model_name.split("opus-mt-")[1].split("-")[-2]
+        if lang in self.fail:
+            raise OSError(f"cannot load {model_name}")
+        self.loaded.append(lang)
+        return self.factory(lang)
+
+
+@contextlib.contextmanager
+def stub_marian(fail=()):
+    """translation_bridge の MarianTokenizer / MarianMTModel をスタブに差し替える"""
+    saved = (tb.MarianTokenizer, tb.MarianMTModel)
+    tokenizers, models = FakeLoader(FakeTokenizer, fail), FakeLoader(FakeModel, fail)
+    tb.MarianTokenizer, tb.MarianMTModel = tokenizers, models
+    try:
+        yield tokenizers, models
+    finally:
+        tb.MarianTokenizer, tb.MarianMTModel = saved
+
+
+def test_models_load_lazily(tmp_path):
+    with stub_marian() as (tokenizers, models):
+        bridge = TranslationBridge(cache_dir=str(tmp_path), device="cpu")
+        # 起動時には何もロードしない
+        assert models.loaded == [] and len(bridge.models) == 0
+        assert bridge.translate_to_english(["ゴール"], "ja") == ["ja>ゴール"]
+        assert bridge.translate_to_english(["すごい", "ゴール"], "ja") == ["ja>すごい", "ja>ゴール"]
+        # 2回目は同じモデルを再利用（ロードは1回、翻訳メモリにある原文は生成しない）
+        assert models.loaded == ["ja"] and tokenizers.loaded == ["ja"]
+        assert bridge.models["ja"].generated == [["ゴール"], ["すごい"]]
+        # 英語・未サポート言語ではモデルをロードしない
+        assert bridge.translate_to_english(["goal"], "en") == ["goal"]
+        assert bridge.translate_to_english(["gol"], "it") == ["gol"]
+        assert models.loaded == ["ja"]
+
+
+def test_preload_loads_all_languages(tmp_path):
+    with stub_marian() as (tokenizers, models):
+        bridge = TranslationBridge(cache_dir=str(tmp_path), device="cpu", preload=True)
+        assert models.loaded == list(bridge.model_names)
+        assert list(bridge.models) == list(bridge.model_names)
+
+
+def test_lru_eviction_order(tmp_path):
+    with stub_marian() as (tokenizers, models):
+        bridge = TranslationBridge(cache_dir=str(tmp_path), device="cpu", max_resident_models=2)
+        bridge._get_model("ja")
+        bridge._get_model("es")
+        bridge._get_model("ja")  # ja を最近使用に
+        bridge._get_model("fr")  # 最も長く使われていない es を解放
+        assert list(bridge.models) == ["ja", "fr"] and set(bridge.tokenizers) == {"ja", "fr"}
+        bridge._get_model("de")  # 次は ja
+        assert list(bridge.models) == ["fr", "de"]
+        # 解放したモデルは次の使用時に再ロード
+        bridge._get_model("es")
+        assert models.loaded == ["ja", "es", "fr", "de", "es"]
+        assert list(bridge.models) == ["de", "es"]
+
+
+def test_failed_language_not_retried(tmp_path):
+    with stub_marian(fail={"ko"}) as (tokenizers, models):
+        bridge = TranslationBridge(cache_dir=str(tmp_path), device="cpu")
+        assert bridge._get_model("ko") == (None, None)
+        assert bridge.translate_to_english(["골"], "ko") == ["골"]
+        assert bridge._get_model("ko") == (None, None)
+        assert "ko" in bridge.failed_langs and len(bridge.models) == 0
+        # 失敗した言語は上限の枠を使わない
+        assert bridge._get_model("ja")[0] is not None and models.loaded == ["ja"]
+
+
+def _record_detection(bridge, detected):
+    """detect_language を呼び出し記録付きのスタブに差し替える（'ゴ' を含めば ja、それ以外は en）"""
+    def detect_language(text):
+        detected.append(text)
+        return "ja" if "ゴ" in text else "en"
+    bridge.detect_language = detect_language
+
+
+def test_route_languages(tmp_path):
+    with stub_marian():
+        bridge = TranslationBridge(cache_dir=str(tmp_path), device="cpu")
+        detected = []
+        _record_detection(bridge, detected)
+        texts = ["gol", "进球", "ゴール", "gol!", "goal", "ゴール!!"]
+        langs = ["es", "zh-cn", "unk", "it", None]
+        # 既知の言語はそのまま（zh-cn → zh、未サポートは en）、'unk'・欠損・範囲外だけ自動検出
+        assert bridge.route_languages(texts, langs) == ["es", "zh", "ja", "en", "en", "ja"]
+        assert detected == ["ゴール", "goal", "ゴール!!"]
+        assert bridge.route_languages(["ゴール", "goal"]) == ["ja", "en"]
+
+
+def test_per_comment_buckets_keep_order(tmp_path):
+    with stub_marian() as (tokenizers, models):
+        bridge = TranslationBridge(cache_dir=str(tmp_path), device="cpu")
+        detected = []
+        _record_detection(bridge, detected)
+        texts = ["gol", "ゴール", "goal", "golazo", "すごい", "but", "ゴール"]
+        langs = ["es", "ja", "en", "es", "ja", "fr", "unk"]
+        out = bridge.translate_to_english(texts, langs=langs)
+        # 言語別に翻訳して入力と同じ順に戻す（英語はそのまま）
+        assert out == ["es>gol", "ja>ゴール", "goal", "es>golazo", "ja>すごい", "fr>but", "ja>ゴール"]
+        assert detected == ["ゴール"]
+        # 言語ごとにモデルを1回ロードし、バケット内の重複原文は1回だけ生成
+        assert sorted(models.loaded) == ["es", "fr", "ja"]
+        assert bridge.models["ja"].generated == [["ゴール", "すごい"]]
+        assert bridge.models["es"].generated == [["gol", "golazo"]]
+        # per_comment=True なら言語列なしでもコメントごとに判定
+        assert bridge.translate_to_english(["goal", "ゴール"], per_comment=True) == ["goal", "ja>ゴール"]
+        # 先頭テキストの言語でバッチ全体を翻訳する従来の動作
+        assert bridge.translate_to_english(["goal", "ゴール"]) == ["goal", "ゴール"]
+
+
+class FakeEncoder:
+    """英訳の文字数を1次元目に持つ埋め込み（SentenceTransformer.encode の代わり）"""
+
+    def encode(self, texts, show_progress_bar=False):
+        return np.array([[len(t), 1.0] for t in texts])
+
+
+def test_prepared_events_use_known_languages(tmp_path):
+    with stub_marian():
+        bridge = TranslationBridge(cache_dir=str(tmp_path), device="cpu")
+        detected = []
+        _record_detection(bridge, detected)
+        events = [
+            {'comments': ["gol", "ゴール"], 'topics': ["gol", "ゴール"], 'languages': ["es", "ja"]},
+            {'comments': ["goal"], 'topics': ["goal"], 'languages': ["unk"]},
+            {'comments': [], 'topics': []},
+        ]
+        prepared = bridge.prepare_event_translations(events, FakeEncoder())
+        # イベントの言語は先頭コメントの既知の言語、コメントはそれぞれの言語で翻訳
+        assert prepared[0]['original_language'] == "es" and prepared[0]['translated']
+        assert prepared[0]['comments'] == ["es>gol", "ja>ゴール"]
+        assert prepared[1]['original_language'] == "en" and prepared[1]['comments'] == ["goal"]
+        assert prepared[2] is None
+        # 'unk' のコメントだけ自動検出
+        assert detected == ["goal", "goal"]
+
+
+if __name__ == '__main__':
+    import tempfile
+    with tempfile.TemporaryDirectory() as d:
+        test_models_load_lazily(Path(d) / "a")
+        test_preload_loads_all_languages(Path(d) / "b")
+        test_lru_eviction_order(Path(d) / "c")
+        test_failed_language_not_retried(Path(d) / "d")
+        test_route_languages(Path(d) / "e")
+        test_per_comment_buckets_keep_order(Path(d) / "f")
+        test_prepared_events_use_known_languages(Path(d) / "g")
+    print("✓ Translation model loading / routing tests passed")
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+CSV Reader Utility
+
+チャットCSVの読み込みを1か所にまとめる
+- 文字コードは先頭数KBだけを読んで判定（BOM → 各候補でデコードできるか）
+  全体を4通りの文字コードで読み直す従来方式と違い、判定を誤った場合だけ次の候補で読み直す
+- 必要な列（usecols）だけを明示的な dtype でチャンクごとに読み込む
+- 列が存在しない場合は無視（ファイルによって列構成が異なるため）
+"""
+
+import codecs
+from typing import Dict, Iterator, Optional, Sequence
+
+import pandas as pd
+
+# 判定候補（この順に試す。iso-8859-1 は必ずデコードできるので最後）
+ENCODINGS = ("utf-8", "cp932", "iso-8859-1")
+# 文字コード判定に読むバイト数
+SNIFF_BYTES = 64 * 1024
+# 1チャンクの行数
+CHUNK_SIZE = 100000
+
+# チャットCSVの基本列
+CHAT_COLUMNS = ("timestamp", "message", "author")
+# 分析スクリプトが探すコメント本文・時刻の列名
+TEXT_COLUMNS = ("message", "text", "comment", "body")
+TIME_COLUMNS = ("timestamp", "time_in_seconds", "time_seconds", "elapsed_time", "time", "seconds",
+                "created_at", "date")
+# 分析スクリプトの load_* 関数で読み込む列
+ANALYSIS_COLUMNS = tuple(dict.fromkeys(CHAT_COLUMNS + TEXT_COLUMNS + TIME_COLUMNS))
+# 文字列として読む列（数値だけのコメントやタイムスタンプを型推論させない）
+CHAT_DTYPES: Dict[str, type] = {c: str for c in ("timestamp", "author", "authorChannelId") + TEXT_COLUMNS}
+
+
+def sniff_encoding(path: str, n_bytes: int = SNIFF_BYTES, candidates: Sequence[str] = ENCODINGS) -> str:
+    """
+    ファイル先頭 n_bytes だけで文字コードを判定
+
+    Args:
+        path (str): CSVファイル
+        n_bytes (int): 判定に使うバイト数
+        candidates: 試す文字コード（先にデコードできたものを採用）
+
+    Returns:
+        str: 文字コード名（UTF-8 BOM 付きは "utf-8-sig"）
+    """
+    with open(path, "rb") as f:
+        sample = f.read(n_bytes)
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    for enc in candidates:
+        try:
+            # 末尾で多バイト文字が切れていてもエラーにしない
+            codecs.getincrementaldecoder(enc)().decode(sample, final=False)
+            return enc
+        except UnicodeDecodeError:
+            continue
+    return candidates[-1]
+
+
+def _usecols(columns: Optional[Sequence[str]]):
+    if columns is None:
+        return None
+    wanted = set(columns)
+    return lambda c: c in wanted
+
+
+def iter_csv_chunks(path: str, usecols: Optional[Sequence[str]] = None, dtype: Optional[Dict[str, type]] = None,
+                    chunksize: int = CHUNK_SIZE, encoding: Optional[str] = None) -> Iterator[pd.DataFrame]:
+    """
+    CSVをチャンクごとに読み込む（ストリーミング処理用）
+
+    Args:
+        path (str): CSVファイル
+        usecols: 読み込む列（存在しない列は無視、None なら全列）
+        dtype (dict): 列ごとの型（存在しない列は無視）
+        chunksize (int): 1チャンクの行数
+        encoding (str): 文字コード（None なら sniff_encoding で判定）
+
+    Yields:
+        DataFrame: chunksize 行ずつのテーブル
+    """
+    yield from pd.read_csv(path, encoding=encoding or sniff_encoding(path), usecols=_usecols(usecols),
+                           dtype=dtype, chunksize=chunksize)
+
+
+def read_csv_any(path: str, usecols: Optional[Sequence[str]] = None, dtype: Optional[Dict[str, type]] = None,
+                 chunksize: int = CHUNK_SIZE) -> pd.DataFrame:
+    """
+    文字コードを判定して CSV を読み込む
+
+    判定した文字コードで読めなかった場合（先頭以降に別の文字コードの文字がある等）のみ残りの候補で読み直し、
+    それでも読めない場合は壊れた行を飛ばして読み込む。
+
+    Args:
+        path (str): CSVファイル
+        usecols: 読み込む列（存在しない列は無視、None なら全列）
+        dtype (dict): 列ごとの型（存在しない列は無視）
+        chunksize (int): 1チャンクの行数
+
+    Returns:
+        DataFrame: 読み込んだテーブル（空ファイルなら空の DataFrame）
+    """
+    sniffed = sniff_encoding(path)
+    # utf-8-sig と判定した場合は utf-8 を再試行しない
+    tried = [sniffed] + [enc for enc in ENCODINGS if not sniffed.startswith(enc)]
+    for enc in tried:
+        try:
+            chunks = list(iter_csv_chunks(path, usecols, dtype, chunksize, encoding=enc))
+        except UnicodeDecodeError:
+            continue
+        except pd.errors.EmptyDataError:
+            return pd.DataFrame()
+        except pd.errors.ParserError:
+            break
+        if not chunks:
+            # ヘッダーのみ
+            return pd.read_csv(path, encoding=enc, usecols=_usecols(usecols), dtype=dtype, nrows=0)
+        return pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+    return pd.read_csv(path, encoding=sniffed, encoding_errors="replace", usecols=_usecols(usecols),
+                       dtype=dtype, engine="python", on_bad_lines="skip")
+
+
+def read_chat_csv(path: str, usecols: Optional[Sequence[str]] = CHAT_COLUMNS,
+                  chunksize: int = CHUNK_SIZE) -> pd.DataFrame:
+    """
+    チャットCSVを読み込む（既定は timestamp / message / author のみ、文字列列は str で読み込む）
+
+    Args:
+        path (str): CSVファイル
+        usecols: 読み込む列（None なら全列）
+        chunksize (int): 1チャンクの行数
+
+    Returns:
+        DataFrame: 読み込んだテーブル
+    """
+    return read_csv_any(path, usecols=usecols, dtype=CHAT_DTYPES, chunksize=chunksize)
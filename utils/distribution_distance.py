@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+Distribution Distance Utility
+
+積み上げたヒストグラム（行 = 配信/イベント）から距離行列を一括計算する
+- js_distance: 2つのカウントベクトルの JS 距離（event_comparison から共用）
+- js_distance_matrix: js_distance をペアごとに呼ぶのと同じ値を1回の配列演算で
+- abs_diff_matrix: スカラー特徴量の絶対差行列
+"""
+
+import numpy as np
+
+
+def js_distance(p: np.ndarray, q: np.ndarray) -> float:
+    """
+    Jensen-Shannon距離を計算（精度向上版）
+    
+    改善内容：
+    1. NaN/Inf チェック
+    2. ゼロベクトル処理
+    3. Laplace smoothing
+    """
+    p = p.astype(float)
+    q = q.astype(float)
+    
+    # ゼロベクトルチェック
+    p_sum = p.sum()
+    q_sum = q.sum()
+    
+    if p_sum == 0 or q_sum == 0:
+        # どちらかが空の場合は最大距離を返す
+        return 1.0
+    
+    # 正規化（Laplace smoothing適用）
+    smoothing = 1e-10
+    p = (p + smoothing) / (p_sum + smoothing * len(p))
+    q = (q + smoothing) / (q_sum + smoothing * len(q))
+    
+    # 中点分布
+    m = 0.5 * (p + q)
+    
+    # KLダイバージェンス計算（数値安定性向上）
+    with np.errstate(divide='ignore', invalid='ignore'):
+        kl_pm = np.sum(np.where(p > 0, p * np.log(p / m), 0.0))
+        kl_qm = np.sum(np.where(q > 0, q * np.log(q / m), 0.0))
+    
+    # NaN/Infチェック
+    if np.isnan(kl_pm) or np.isinf(kl_pm):
+        kl_pm = 0.0
+    if np.isnan(kl_qm) or np.isinf(kl_qm):
+        kl_qm = 0.0
+    
+    # JS距離
+    js_div = 0.5 * (kl_pm + kl_qm)
+    
+    # 負の値やNaNの処理
+    if js_div < 0 or np.isnan(js_div):
+        return 0.0
+    
+    js_dist = np.sqrt(js_div)
+    
+    # 最終チェック
+    if np.isnan(js_dist) or np.isinf(js_dist):
+        return 1.0
+    
+    return float(min(js_dist, 1.0))  # [0, 1]に制限
+
+
+def js_distance_matrix(H: np.ndarray, smoothing: float = 1e-10) -> np.ndarray:
+    """
+    ヒストグラム行列の全ペア Jensen-Shannon 距離
+
+    ペア (i, j) ごとに「どちらかで出現したカテゴリ」だけを使って Laplace smoothing
+    するため、Counter 同士の js_distance_distribution と同じ結果になる。
+
+    Args:
+        H (np.ndarray): (n, k) の非負カウント行列
+        smoothing (float): Laplace smoothing 量
+
+    Returns:
+        np.ndarray: (n, n) の対称距離行列（対角は 0、どちらかが空なら 1.0）
+    """
+    H = np.asarray(H, dtype=float)
+    n = H.shape[0]
+    if n == 0:
+        return np.zeros((0, 0), dtype=float)
+    if H.ndim != 2 or H.shape[1] == 0:
+        out = np.ones((n, n), dtype=float)
+        np.fill_diagonal(out, 0.0)
+        return out
+
+    sums = H.sum(axis=1)
+    support = H > 0
+    nnz = support.sum(axis=1).astype(float)
+    sup_f = support.astype(float)
+    # ペアごとの和集合サイズ（smoothing の分母に使う）
+    k_pair = nnz[:, None] + nnz[None, :] - sup_f @ sup_f.T
+
+    mask = support[:, None, :] | support[None, :, :]
+
+    # 空の行同士は 0/0 になるが、最後に距離 1.0 で上書きする
+    with np.errstate(divide='ignore', invalid='ignore'):
+        P = (H[:, None, :] + smoothing) / (sums[:, None, None] + smoothing * k_pair[:, :, None])
+        Q = (H[None, :, :] + smoothing) / (sums[None, :, None] + smoothing * k_pair[:, :, None])
+        M = 0.5 * (P + Q)
+        kl_pm = np.sum(np.where(mask & (P > 0), P * np.log(P / M), 0.0), axis=2)
+        kl_qm = np.sum(np.where(mask & (Q > 0), Q * np.log(Q / M), 0.0), axis=2)
+    kl_pm[~np.isfinite(kl_pm)] = 0.0
+    kl_qm[~np.isfinite(kl_qm)] = 0.0
+
+    js_div = 0.5 * (kl_pm + kl_qm)
+    js_div[(js_div < 0) | np.isnan(js_div)] = 0.0
+    dist = np.sqrt(js_div)
+    dist[~np.isfinite(dist)] = 1.0
+    dist = np.minimum(dist, 1.0)
+
+    # どちらかが空の場合は最大距離
+    empty = (sums[:, None] == 0) | (sums[None, :] == 0)
+    dist[empty] = 1.0
+    np.fill_diagonal(dist, 0.0)
+    return dist
+
+
+def abs_diff_matrix(values) -> np.ndarray:
+    """スカラー特徴量の全ペア絶対差 |x_i - x_j|"""
+    x = np.asarray(values, dtype=float)
+    return np.abs(x[:, None] - x[None, :])
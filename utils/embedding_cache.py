@@ -0,0 +1,332 @@
+# -*- coding: utf-8 -*-
+"""
+Embedding Cache Utility
+
+SentenceTransformer の埋め込みをディスクに永続化し、再実行時のエンコードを省略する
+- キー: (モデル名, 正規化テキストのハッシュ)
+- 保存形式: シャード単位の .npy（np.load(mmap_mode='r') でメモリマップ可能）
+- 閾値スイープなどの再実行では、既出コメントに対してエンコーダを一切呼ばない
+- 新しい埋め込みはメモリに溜めて flush_rows 件ごと（または flush() / 終了時）に1シャードとして書き出す
+- 読み込み時に小さいシャードが増えていれば1つにまとめる（シャード数・memmap 数を抑える）
+  まとめる処理はロックファイルで1プロセスに限り、削除できなかったベクトルファイルは次回の読み込み時に消す
+"""
+
+import atexit
+import os
+import re
+import time
+import uuid
+import hashlib
+import unicodedata
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def normalize_cache_text(text: str) -> str:
+    """キャッシュキー用にテキストを正規化（NFC + 前後空白除去）"""
+    if not isinstance(text, str):
+        text = "" if text is None else str(text)
+    return unicodedata.normalize("NFC", text).strip()
+
+
+def text_hash(text: str) -> str:
+    """正規化テキストの SHA-1 ハッシュ（16進40文字）"""
+    return hashlib.sha1(normalize_cache_text(text).encode("utf-8")).hexdigest()
+
+
+def _remove_file(path: str, retries: int = 3, wait: float = 0.1) -> bool:
+    """ファイルを削除（Windows で他プロセスが memmap 中などの場合は少し待って再試行）"""
+    for attempt in range(retries):
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return True
+        except OSError:
+            if attempt + 1 < retries:
+                time.sleep(wait)
+    return False
+
+
+class EmbeddingCache:
+    """モデル別のオンディスク埋め込みストア"""
+
+    def __init__(self, model_name: str, cache_dir: str = './cache/embeddings',
+                 dtype: str = 'float32', normalize_embeddings: bool = True,
+                 flush_rows: int = 50000, compact_rows: int = 20000, max_small_shards: int = 8,
+                 orphan_age: float = 600.0):
+        """
+        Args:
+            model_name (str): 埋め込みモデル名（キャッシュの名前空間）
+            cache_dir (str): キャッシュのルートディレクトリ
+            dtype (str): 保存精度 'float16' or 'float32'
+            normalize_embeddings (bool): 単位長に正規化した埋め込みを保存するか
+            flush_rows (int): 未保存の埋め込みがこの件数に達したらシャードとして書き出す
+            compact_rows (int): これ未満の行数のシャードを「小さいシャード」とみなす
+            max_small_shards (int): 読み込み時に小さいシャードがこの数を超えていれば1つにまとめる
+            orphan_age (float): キーファイルのないベクトルファイル・一時ファイルをこの秒数より古ければ削除
+                （書き込み中の他プロセスのファイルを消さないため）
+        """
+        if dtype not in ('float16', 'float32'):
+            raise ValueError(f"Unsupported dtype: {dtype}")
+        self.model_name = model_name
+        self.dtype = np.dtype(dtype)
+        self.normalize_embeddings = normalize_embeddings
+
+        # 名前空間: モデル名 + 正規化有無 + 保存精度
+        slug = re.sub(r"[^0-9A-Za-z._-]+", "_", model_name)
+        suffix = "norm" if normalize_embeddings else "raw"
+        self.cache_dir = os.path.join(cache_dir, f"{slug}__{suffix}__{dtype}")
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # key -> (shard_id, row)
+        self._index: Dict[str, Tuple[str, int]] = {}
+        # shard_id -> memmap された行列
+        self._shards: Dict[str, np.ndarray] = {}
+        self.dim = None
+        # まだディスクに書いていない埋め込み（key -> 保存精度のベクトル）
+        self._pending: Dict[str, np.ndarray] = {}
+        self.flush_rows = flush_rows
+        self.compact_rows = compact_rows
+        self.max_small_shards = max_small_shards
+        self.orphan_age = orphan_age
+
+        self.hits = 0
+        self.misses = 0
+
+        self._load_index()
+        # 途中で flush されなかった分も終了時に書き出す
+        atexit.register(self._flush_at_exit)
+
+    def _remove_orphans(self, fnames: List[str]) -> int:
+        """キーファイルのないベクトルファイルと書きかけの一時ファイルを削除（古いものだけ）"""
+        key_ids = {f[:-len(".keys.npy")] for f in fnames if f.endswith(".keys.npy")}
+        now = time.time()
+        removed = 0
+        for fname in fnames:
+            orphan = fname.endswith(".tmp.npy") or (
+                fname.endswith(".vec.npy") and fname[:-len(".vec.npy")] not in key_ids)
+            if not orphan:
+                continue
+            path = os.path.join(self.cache_dir, fname)
+            try:
+                if now - os.path.getmtime(path) < self.orphan_age:
+                    continue
+            except OSError:
+                continue
+            if _remove_file(path):
+                removed += 1
+        if removed:
+            print(f"[Embedding Cache] Removed {removed} orphaned files")
+        return removed
+
+    def _lock_compaction(self) -> Optional[str]:
+        """まとめる処理のロックを取得（他プロセスが処理中なら None）"""
+        lock_path = os.path.join(self.cache_dir, "compact.lock")
+        try:
+            # 異常終了で残った古いロックは無視する
+            if time.time() - os.path.getmtime(lock_path) > self.orphan_age:
+                _remove_file(lock_path)
+        except OSError:
+            pass
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return None
+        os.write(fd, str(os.getpid()).encode("ascii"))
+        os.close(fd)
+        return lock_path
+
+    def _load_index(self):
+        """既存シャードのキー一覧を読み込み、インデックスを構築（小さいシャードが多ければまとめる）"""
+        shards: List[Tuple[str, np.ndarray, np.ndarray]] = []
+        fnames = sorted(os.listdir(self.cache_dir))
+        self._remove_orphans(fnames)
+        for fname in fnames:
+            if not fname.endswith(".keys.npy"):
+                continue
+            shard_id = fname[:-len(".keys.npy")]
+            vec_path = os.path.join(self.cache_dir, f"{shard_id}.vec.npy")
+            if not os.path.exists(vec_path):
+                continue
+            try:
+                keys = np.load(os.path.join(self.cache_dir, fname))
+                vecs = np.load(vec_path, mmap_mode='r')
+            except Exception as e:
+                print(f"[Embedding Cache] Skipping broken shard {shard_id}: {e}")
+                continue
+            if len(keys) != len(vecs):
+                continue
+            shards.append((shard_id, keys, vecs))
+
+        small = [sh for sh in shards if len(sh[1]) < self.compact_rows]
+        lock_path = self._lock_compaction() if len(small) > self.max_small_shards else None
+        if lock_path is not None:
+            # まとめる側の memmap は small だけが持つようにしてから削除する
+            keys = vecs = None
+            shards = [sh for sh in shards if len(sh[1]) >= self.compact_rows]
+            try:
+                shards.append(self._compact(small))
+            finally:
+                _remove_file(lock_path)
+
+        for shard_id, keys, vecs in shards:
+            self._shards[shard_id] = vecs
+            if self.dim is None and vecs.ndim == 2:
+                self.dim = int(vecs.shape[1])
+            for row, key in enumerate(keys):
+                self._index[key.decode("ascii")] = (shard_id, row)
+
+    def _compact(self, shards: List[Tuple[str, np.ndarray, np.ndarray]]) -> Tuple[str, np.ndarray, np.ndarray]:
+        """小さいシャードを1つにまとめて書き出し、元のシャードを削除する"""
+        keys = np.concatenate([sh[1] for sh in shards])
+        vecs = np.concatenate([np.asarray(sh[2]) for sh in shards])
+        # 同じキーが複数シャードにある場合（並列実行時など）は1つだけ残す
+        keys, first = np.unique(keys, return_index=True)
+        vecs = vecs[first]
+        old_ids = [sh[0] for sh in shards]
+        shards.clear()  # 削除前に memmap を手放す
+        shard_id = self._save_shard(keys, vecs)
+        for old in old_ids:
+            # キーを先に消せば、ベクトルの削除に失敗しても（他プロセスが使用中など）シャードとしては読まれない
+            # （残ったベクトルファイルは次回以降の _remove_orphans で削除）
+            if _remove_file(os.path.join(self.cache_dir, f"{old}.keys.npy")):
+                _remove_file(os.path.join(self.cache_dir, f"{old}.vec.npy"))
+        print(f"[Embedding Cache] Compacted {len(old_ids)} shards into {shard_id} ({len(keys)} entries)")
+        return shard_id, keys, np.load(os.path.join(self.cache_dir, f"{shard_id}.vec.npy"), mmap_mode='r')
+
+    def __len__(self) -> int:
+        return len(self._index) + len(self._pending)
+
+    def __contains__(self, text: str) -> bool:
+        key = text_hash(text)
+        return key in self._index or key in self._pending
+
+    def _save_shard(self, keys: Sequence, vecs: np.ndarray) -> str:
+        """シャードを書き出してIDを返す（一時ファイル経由で原子的に配置）"""
+        shard_id = f"shard_{uuid.uuid4().hex[:12]}"
+        vec_path = os.path.join(self.cache_dir, f"{shard_id}.vec.npy")
+        key_path = os.path.join(self.cache_dir, f"{shard_id}.keys.npy")
+        tmp_vec = vec_path + ".tmp.npy"
+        tmp_key = key_path + ".tmp.npy"
+        np.save(tmp_vec, np.ascontiguousarray(vecs, dtype=self.dtype))
+        np.save(tmp_key, np.array(keys, dtype="S40"))
+        # ベクトルを先に配置し、キーの出現をもってシャード完成とみなす
+        os.replace(tmp_vec, vec_path)
+        os.replace(tmp_key, key_path)
+        return shard_id
+
+    def _write_shard(self, keys: List[str], vecs: np.ndarray):
+        """新しいシャードを書き出してインデックスに登録"""
+        shard_id = self._save_shard(keys, vecs)
+        self._shards[shard_id] = np.load(os.path.join(self.cache_dir, f"{shard_id}.vec.npy"), mmap_mode='r')
+        for row, key in enumerate(keys):
+            self._index[key] = (shard_id, row)
+
+    def flush(self):
+        """未保存の埋め込みを1シャードとして書き出す"""
+        if not self._pending:
+            return
+        keys = list(self._pending)
+        vecs = np.stack([self._pending[k] for k in keys])
+        self._write_shard(keys, vecs)
+        self._pending.clear()
+
+    def _flush_at_exit(self):
+        try:
+            self.flush()
+        except OSError as e:
+            # キャッシュディレクトリが消えている等。キャッシュなので失っても再計算できる
+            print(f"[Embedding Cache] Could not flush {len(self._pending)} embeddings: {e}")
+
+    def _get(self, key: str) -> Optional[np.ndarray]:
+        loc = self._index.get(key)
+        if loc is not None:
+            shard_id, row = loc
+            return self._shards[shard_id][row]
+        return self._pending.get(key)
+
+    def lookup(self, texts: Sequence[str]) -> Tuple[np.ndarray, List[int]]:
+        """
+        キャッシュ済みの埋め込みを取得
+
+        Args:
+            texts: テキストのリスト
+
+        Returns:
+            tuple: (埋め込み行列 float32, 未キャッシュの行インデックス)
+                未キャッシュ行はゼロベクトルのまま返す
+        """
+        n = len(texts)
+        out = np.zeros((n, self.dim or 0), dtype=np.float32)
+        missing: List[int] = []
+        for i, text in enumerate(texts):
+            vec = self._get(text_hash(text))
+            if vec is None:
+                missing.append(i)
+                continue
+            out[i] = vec
+        return out, missing
+
+    def encode(self, model, texts: Sequence[str], batch_size: int = 64) -> np.ndarray:
+        """
+        キャッシュを経由して埋め込みを計算（SentenceTransformer.encode の代替）
+
+        Args:
+            model: SentenceTransformer モデル
+            texts: テキストのリスト
+            batch_size (int): ミス分をエンコードするときのバッチサイズ
+
+        Returns:
+            np.ndarray: (len(texts), dim) の float32 行列
+        """
+        texts = list(texts)
+        if not texts:
+            dim = self.dim or model.get_sentence_embedding_dimension()
+            return np.zeros((0, dim), dtype=np.float32)
+
+        keys = [text_hash(t) for t in texts]
+
+        # ミスしたキーはユニーク化してからエンコード（チャットは重複が多い）
+        miss_keys: List[str] = []
+        miss_texts: List[str] = []
+        seen = set()
+        for key, text in zip(keys, texts):
+            if key in self._index or key in self._pending:
+                self.hits += 1
+                continue
+            self.misses += 1
+            if key in seen:
+                continue
+            seen.add(key)
+            miss_keys.append(key)
+            miss_texts.append(normalize_cache_text(text))
+
+        if miss_texts:
+            vecs = model.encode(miss_texts, batch_size=batch_size, show_progress_bar=False,
+                                normalize_embeddings=self.normalize_embeddings)
+            vecs = np.asarray(vecs)
+            if self.dim is None:
+                self.dim = int(vecs.shape[1])
+            # 返却値は常に保存精度を経由させる（初回と再実行で結果を一致させるため）
+            for key, vec in zip(miss_keys, vecs.astype(self.dtype)):
+                self._pending[key] = vec
+            if len(self._pending) >= self.flush_rows:
+                self.flush()
+
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        for i, key in enumerate(keys):
+            out[i] = self._get(key)
+        return out
+
+    def get_stats(self) -> Dict:
+        """キャッシュ統計を取得"""
+        total = self.hits + self.misses
+        return {
+            'entries': len(self),
+            'shards': len(self._shards),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / total if total > 0 else 0.0,
+        }
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+Event Blocking Utility
+
+イベント照合の候補ペア生成（ブロッキング）
+- イベントを bin_id でブロック分割し、時間差 time_th 以内のペアのみを候補にする
+- コサイン類似度はブロックごとに1回の行列積でまとめて計算
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+def blocked_candidate_pairs(bin_ids, stream_ids, time_th: int,
+                            embeddings: Optional[np.ndarray] = None
+                            ) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+    """
+    時間差 time_th 以内かつ異なるストリーム間のイベントペアを列挙
+
+    幅 (time_th + 1) のブロックに分けると、条件を満たすペアは
+    同一ブロック内か隣接ブロック間にしか存在しない。
+
+    Args:
+        bin_ids: 各イベントの bin_id
+        stream_ids: 各イベントのストリーム番号（同一ストリーム同士は除外）
+        time_th (int): 許容する bin 差
+        embeddings (np.ndarray, optional): (n_events, dim) の正規化済み埋め込み
+
+    Returns:
+        tuple: (i, j, sims)
+            i < j のペアを (i, j) の昇順で返す。sims は embeddings 指定時のみ
+            各ペアの内積、未指定時は None
+    """
+    bin_ids = np.asarray(bin_ids, dtype=np.int64)
+    stream_ids = np.asarray(stream_ids, dtype=np.int64)
+    n = len(bin_ids)
+    empty = np.zeros(0, dtype=np.int64)
+    if n < 2 or time_th < 0:
+        return empty, empty, (np.zeros(0) if embeddings is not None else None)
+
+    if embeddings is not None:
+        embeddings = np.asarray(embeddings, dtype=np.float64)
+
+    width = int(time_th) + 1
+    blk = (bin_ids - bin_ids.min()) // width
+    order = np.argsort(blk, kind="stable")
+    blk_sorted = blk[order]
+    uniq, starts = np.unique(blk_sorted, return_index=True)
+    ends = np.r_[starts[1:], n]
+    block_rows = {int(b): order[s:e] for b, s, e in zip(uniq, starts, ends)}
+
+    out_i, out_j, out_s = [], [], []
+    for b, rows_a in block_rows.items():
+        rows_next = block_rows.get(b + 1, empty)
+        rows_c = np.concatenate([rows_a, rows_next])
+
+        mask = np.abs(bin_ids[rows_a][:, None] - bin_ids[rows_c][None, :]) <= time_th
+        mask &= stream_ids[rows_a][:, None] != stream_ids[rows_c][None, :]
+        # 同一ブロック内は片側（元のインデックス順で a < c）のみ
+        in_block = np.zeros(len(rows_c), dtype=bool)
+        in_block[:len(rows_a)] = True
+        mask &= ~in_block[None, :] | (rows_a[:, None] < rows_c[None, :])
+
+        ia, ic = np.nonzero(mask)
+        if len(ia) == 0:
+            continue
+        out_i.append(rows_a[ia])
+        out_j.append(rows_c[ic])
+        if embeddings is not None:
+            sims = embeddings[rows_a] @ embeddings[rows_c].T
+            out_s.append(sims[ia, ic])
+
+    if not out_i:
+        return empty, empty, (np.zeros(0) if embeddings is not None else None)
+
+    i = np.concatenate(out_i)
+    j = np.concatenate(out_j)
+    lo, hi = np.minimum(i, j), np.maximum(i, j)
+    sort = np.lexsort((hi, lo))
+    sims = np.concatenate(out_s)[sort] if embeddings is not None else None
+    return lo[sort], hi[sort], sims
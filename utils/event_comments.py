@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+Event Comment Store Utility
+
+イベントごとのコメント抽出結果（行インデックス・前処理済みコメント・言語コード）を1回だけ作って共有する
+- イベントは (group_id, bin_id, peak_pad) で識別し、ストリームごとに1つのストアを持つ
+- detect_events の直後に build() でまとめて作り、以降のステージ（埋め込み・距離・集約・レポート）は get() で参照する
+- build() していないイベントも初回の get() で作ってメモする
+- term_languages() はキャッシュ済みの言語コードから上位語の言語を決める（翻訳の振り分けで再検出しないため）
+"""
+
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.time_bins import TimeBinIndex
+
+
+class EventComments(NamedTuple):
+    """1イベント分のコメント（rows と comments / langs は同じ順序）"""
+    rows: np.ndarray
+    comments: List[str]
+    langs: List[str]
+
+
+class EventCommentStore:
+    """ストリーム1本分のイベントコメントストア"""
+
+    def __init__(self, bin_index: TimeBinIndex, messages: Sequence[str], langs: Optional[Sequence[object]],
+                 nr_bins: int):
+        """
+        Args:
+            bin_index (TimeBinIndex): (group_id, bin_id) -> 行 の転置インデックス
+            messages: 各行の前処理済みコメント
+            langs: 各行の言語コード（None なら全て "unk"）
+            nr_bins (int): ビン数（peak_pad の範囲を切り詰めるため）
+        """
+        self.bin_index = bin_index
+        self.messages = np.asarray(messages, dtype=object)
+        self.langs = None if langs is None else np.asarray(
+            [lang if isinstance(lang, str) else "unk" for lang in langs], dtype=object)
+        self.nr_bins = nr_bins
+        self._events: Dict[Tuple[int, int, int], EventComments] = {}
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def __contains__(self, key: Tuple[int, int, int]) -> bool:
+        return key in self._events
+
+    def _extract(self, group_id: int, bin_id: int, peak_pad: int) -> EventComments:
+        low, high = max(0, bin_id - peak_pad), min(self.nr_bins - 1, bin_id + peak_pad)
+        rows = self.bin_index.rows_in_range(group_id, low, high)
+        comments = self.messages[rows].tolist()
+        langs = self.langs[rows].tolist() if self.langs is not None else ["unk"] * len(rows)
+        return EventComments(rows, comments, langs)
+
+    def get(self, group_id: int, bin_id: int, peak_pad: int) -> EventComments:
+        """
+        イベントのコメントを取得（未作成なら作ってメモ）
+
+        Args:
+            group_id (int): イベントのグループID
+            bin_id (int): イベントのピークビン
+            peak_pad (int): ピーク前後に含めるビン数
+
+        Returns:
+            EventComments: (rows, comments, langs)
+        """
+        key = (int(group_id), int(bin_id), int(peak_pad))
+        entry = self._events.get(key)
+        if entry is None:
+            entry = self._extract(*key)
+            self._events[key] = entry
+        return entry
+
+    def build(self, events: Iterable[Dict[str, object]], peak_pad: int) -> int:
+        """
+        イベントのリストについてまとめてコメントを作る（detect_events の直後に呼ぶ）
+
+        Returns:
+            int: ストアに入っているイベント数
+        """
+        for evt in events:
+            self.get(int(evt["group_id"]), int(evt["bin_id"]), peak_pad)
+        return len(self._events)
+
+
+def term_languages(terms: Sequence[str], comments: Sequence[str], langs: Sequence[str]) -> Tuple[str, List[str]]:
+    """
+    イベントの上位語ごとの言語をコメントの言語コードから決める
+
+    Args:
+        terms: イベントの上位語
+        comments: イベントのコメント（EventComments.comments）
+        langs: コメントの言語コード（EventComments.langs、"unk" は数えない）
+
+    Returns:
+        tuple: (イベントの最頻言語, 上位語ごとの言語)
+            上位語の言語はその語を含むコメントの最頻言語、含むコメントがなければイベントの最頻言語
+            （言語コードが1つもなければ "unk"）
+    """
+    known = [(str(c).lower(), lang) for c, lang in zip(comments, langs) if lang != "unk"]
+    overall = Counter(lang for _, lang in known)
+    event_lang = overall.most_common(1)[0][0] if overall else "unk"
+    term_langs = []
+    for term in terms:
+        term = str(term).lower()
+        counts = Counter(lang for c, lang in known if term in c)
+        term_langs.append(counts.most_common(1)[0][0] if counts else event_lang)
+    return event_lang, term_langs
@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+"""
+Incremental Topic Assignment Utility
+
+トピックモデル（BERTopic 等）をウォームアップ区間で1回だけ学習（または保存済みモデルを使い）、
+以降のコメントは transform（HDBSCAN の approximate_predict）で割り当てる
+- 学習は fit_fn(texts, embeddings) -> (model, topics) に任せる（BERTopic 以外でも可）
+- モデルのトピックIDは学習ごとに変わるため、外側には安定ID（再学習をまたいで同じトピックは同じID）を返す
+  再学習時は新旧トピックの重心（埋め込みの平均）のコサイン類似度で対応付ける
+- ドリフト（外れ値 -1 の割合の増加、または割り当てトピック重心との類似度の低下）を検出したときだけ、
+  直近 refit_size 件で再学習する
+- 直近コメント・ドリフト判定用の履歴はすべて上限付き（長時間の配信でもメモリは一定）
+- OnlineEventDetector のグループ割り当て（assign / label / pop_replaced / max_groups）としても使える
+"""
+
+from collections import deque
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def _normalize_rows(emb: np.ndarray) -> np.ndarray:
+    emb = np.asarray(emb, dtype=np.float32)
+    norms = np.linalg.norm(emb, axis=1, keepdims=True)
+    return emb / np.maximum(norms, 1e-12)
+
+
+def _topic_words(model, tid: int) -> List[Tuple[str, float]]:
+    """model.get_topic(tid) の上位語（空や文字列以外の語は除く）"""
+    items = model.get_topic(tid) or []
+    return [(str(w), float(s)) for w, s in items if isinstance(w, str) and str(w).strip()]
+
+
+class IncrementalTopicModel:
+    """ウォームアップで学習したトピックモデルで新しいコメントを割り当て、ドリフト時だけ再学習する"""
+
+    def __init__(self, fit_fn: Optional[Callable] = None, encode: Optional[Callable] = None, model=None,
+                 warmup: int = 2000, drift_window: int = 500, drift_threshold: float = 0.15,
+                 refit_size: Optional[int] = None, match_threshold: float = 0.8,
+                 max_groups: Optional[int] = None):
+        """
+        Args:
+            fit_fn (callable): fit_fn(texts, embeddings) -> (model, topics)。None なら再学習しない
+            encode (callable): encode(texts) -> 埋め込み行列（assign に埋め込みを渡さない場合に使う）
+            model: 学習済みモデル（transform(texts, embeddings=...) と get_topic(tid) を持つ）。
+                   None なら最初の warmup 件が集まった時点で fit_fn で学習
+            warmup (int): 最初の学習に使うコメント数
+            drift_window (int): ドリフト判定に使う直近のコメント数（再学習の最小間隔も兼ねる）
+            drift_threshold (float): 外れ値の割合の増加、または重心との平均類似度の低下がこれを超えたら再学習
+            refit_size (int): 再学習に使う直近のコメント数（既定は warmup）
+            match_threshold (float): 再学習前後のトピックを同じ安定IDとみなす重心のコサイン類似度
+            max_groups (int): 安定IDの上限（None なら上限なし）。上限ありの場合は消えたトピックのIDを再利用し、
+                              pop_replaced() で知らせる
+        """
+        self.fit_fn = fit_fn
+        self.encode = encode
+        self.model = None
+        self.warmup = warmup
+        self.drift_window = drift_window
+        self.drift_threshold = drift_threshold
+        self.match_threshold = match_threshold
+        self.max_groups = max_groups
+        self.buffer: deque = deque(maxlen=max(refit_size or warmup, warmup))
+
+        self.stable_of: Dict[int, int] = {}           # モデルのトピックID -> 安定ID
+        self.words: Dict[int, List[Tuple[str, float]]] = {}
+        self.centroid_sum: Dict[int, np.ndarray] = {}
+        self.centroid_n: Dict[int, int] = {}
+        self.next_id = 0
+        self.free: List[int] = []                     # max_groups ありの場合の再利用可能なID
+        self.replaced: List[int] = []
+
+        # ドリフト判定（直近 drift_window 件の外れ値フラグと重心との類似度）
+        self.recent_outlier: deque = deque(maxlen=drift_window)
+        self.recent_sim: deque = deque(maxlen=drift_window)
+        self.baseline: Optional[Tuple[float, float]] = None
+        self.since_fit = 0
+
+        self.n_comments = 0
+        self.n_refits = 0
+        if model is not None:
+            self._adopt_model(model)
+
+    # -------------------------
+    # 安定IDの管理
+    # -------------------------
+    def _new_id(self) -> int:
+        if self.max_groups is None:
+            gid, self.next_id = self.next_id, self.next_id + 1
+            return gid
+        if self.next_id < self.max_groups:
+            gid, self.next_id = self.next_id, self.next_id + 1
+            return gid
+        if self.free:
+            gid = self.free.pop(0)
+            self.replaced.append(gid)
+            return gid
+        return -1
+
+    def _to_stable(self, topics: np.ndarray) -> np.ndarray:
+        return np.array([self.stable_of.get(int(t), -1) for t in topics], dtype=np.int64)
+
+    def _centroid(self, gid: int) -> Optional[np.ndarray]:
+        n = self.centroid_n.get(gid, 0)
+        if n == 0:
+            return None
+        c = self.centroid_sum[gid]
+        return c / max(float(np.linalg.norm(c)), 1e-12)
+
+    def _adopt_model(self, model):
+        """保存済みモデルをそのまま使う: モデルのトピックIDの順に安定IDを振る（重心は割り当てながら作る）"""
+        self.model = model
+        topics = model.get_topics() if hasattr(model, "get_topics") else {}
+        for tid in sorted(int(t) for t in topics if int(t) != -1):
+            gid = self._new_id()
+            if gid < 0:
+                break
+            self.stable_of[tid] = gid
+            self.words[gid] = _topic_words(model, tid)
+        # 基準値は最初の drift_window 件で決める
+        self.baseline = None
+        self.since_fit = 0
+
+    def _match_topics(self, cents: Dict[int, np.ndarray]) -> Dict[int, int]:
+        """新しいトピックの重心を既存の安定IDの重心に類似度の高い順に1対1で対応付ける"""
+        old = [(gid, self._centroid(gid)) for gid in sorted(self.centroid_n)]
+        old = [(gid, c) for gid, c in old if c is not None]
+        pairs = []
+        for tid, c in cents.items():
+            for gid, oc in old:
+                sim = float(c @ oc)
+                if sim >= self.match_threshold:
+                    pairs.append((sim, tid, gid))
+        mapping: Dict[int, int] = {}
+        used = set()
+        for sim, tid, gid in sorted(pairs, key=lambda p: (-p[0], p[1], p[2])):
+            if tid not in mapping and gid not in used:
+                mapping[tid] = gid
+                used.add(gid)
+        return mapping
+
+    # -------------------------
+    # 学習・割り当て
+    # -------------------------
+    def fit(self, texts: Sequence[str], embeddings: np.ndarray) -> np.ndarray:
+        """
+        texts で（再）学習し、texts の安定IDを返す
+
+        新しいトピックは重心が近い既存トピックの安定IDを引き継ぎ、対応のないものには新しいIDを振る。
+        """
+        if self.fit_fn is None:
+            raise ValueError("fit_fn is required to fit the topic model")
+        emb = _normalize_rows(embeddings)
+        model, topics = self.fit_fn(list(texts), emb)
+        topics = np.asarray(topics, dtype=np.int64)
+
+        cents: Dict[int, np.ndarray] = {}
+        sums: Dict[int, Tuple[np.ndarray, int]] = {}
+        for tid in sorted(set(topics.tolist()) - {-1}):
+            members = emb[topics == tid]
+            s = members.sum(axis=0)
+            cents[tid] = s / max(float(np.linalg.norm(s)), 1e-12)
+            sums[tid] = (s, len(members))
+
+        mapping = self._match_topics(cents)
+        # 対応の取れなかった既存IDは引退（上限ありなら再利用候補へ）
+        retired = sorted((set(self.centroid_n) | set(self.stable_of.values())) - set(mapping.values()))
+        if self.max_groups is not None:
+            self.free.extend(g for g in retired if g not in self.free)
+        for tid in sorted(cents):
+            if tid not in mapping:
+                gid = self._new_id()
+                if gid >= 0:
+                    mapping[tid] = gid
+
+        self.model = model
+        self.stable_of = mapping
+        self.centroid_sum = {gid: sums[tid][0] for tid, gid in mapping.items()}
+        self.centroid_n = {gid: sums[tid][1] for tid, gid in mapping.items()}
+        # 引退したIDの上位語は残さない（merge_topics に行のないトピックを渡さないため）
+        self.words = {gid: _topic_words(model, tid) for tid, gid in mapping.items()}
+
+        ids = self._to_stable(topics)
+        sims = [float(emb[i] @ cents[t]) for i, t in enumerate(topics) if t != -1]
+        self.baseline = (float(np.mean(topics == -1)) if len(topics) else 0.0,
+                         float(np.mean(sims)) if sims else 0.0)
+        self.recent_outlier.clear()
+        self.recent_sim.clear()
+        self.since_fit = 0
+        # 次の再学習はこの学習データの続きから（上限を超えた古いものは落ちる）
+        self.buffer.clear()
+        self.buffer.extend(zip(texts, emb))
+        return ids
+
+    def _embed(self, texts: Sequence[str], embeddings: Optional[np.ndarray]) -> np.ndarray:
+        if embeddings is None:
+            if self.encode is None:
+                raise ValueError("embeddings or an encode function is required")
+            embeddings = self.encode(list(texts))
+        return _normalize_rows(embeddings)
+
+    def assign(self, texts: Sequence[str], embeddings: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        コメントのバッチに安定IDを割り当てる（外れ値・ウォームアップ中は -1）
+
+        モデルがまだない場合はバッファに貯め、warmup 件に達したバッチで学習して
+        そのバッチの割り当てを返す（それ以前のバッチは -1 のまま）。
+        """
+        self.n_comments += len(texts)
+        if len(texts) == 0:
+            return np.zeros(0, dtype=np.int64)
+        emb = self._embed(texts, embeddings)
+        if self.model is None:
+            self.buffer.extend(zip(texts, emb))
+            if len(self.buffer) < self.warmup:
+                return np.full(len(texts), -1, dtype=np.int64)
+            buffered = list(self.buffer)
+            ids = self.fit([t for t, _ in buffered], np.stack([e for _, e in buffered]))
+            return ids[-len(texts):]
+
+        topics, _ = self.model.transform(list(texts), embeddings=emb)
+        ids = self._to_stable(np.asarray(topics, dtype=np.int64))
+        self._observe(ids, emb)
+        self.buffer.extend(zip(texts, emb))
+        if self.drifted():
+            self.n_refits += 1
+            print(f"  [Topic Drift] outlier rate {np.mean(self.recent_outlier):.1%}, "
+                  f"centroid similarity {self._recent_similarity():.3f} -> refit on {len(self.buffer)} comments")
+            buffered = list(self.buffer)
+            self.fit([t for t, _ in buffered], np.stack([e for _, e in buffered]))
+        return ids
+
+    def _observe(self, ids: np.ndarray, emb: np.ndarray):
+        """割り当て結果をドリフト判定の履歴と安定IDの重心に反映"""
+        for gid, row in zip(ids, emb):
+            gid = int(gid)
+            self.recent_outlier.append(gid < 0)
+            if gid < 0:
+                continue
+            c = self._centroid(gid)
+            if c is not None:
+                self.recent_sim.append(float(row @ c))
+            self.centroid_sum[gid] = self.centroid_sum.get(gid, 0) + row
+            self.centroid_n[gid] = self.centroid_n.get(gid, 0) + 1
+        self.since_fit += len(ids)
+
+    def _recent_similarity(self) -> float:
+        return float(np.mean(self.recent_sim)) if self.recent_sim else 0.0
+
+    def drifted(self) -> bool:
+        """直近 drift_window 件が基準（学習時の値）から drift_threshold 以上悪化したか"""
+        if self.since_fit < self.drift_window or len(self.recent_outlier) < self.drift_window:
+            return False
+        rate, sim = float(np.mean(self.recent_outlier)), self._recent_similarity()
+        if self.baseline is None:
+            # 保存済みモデル: 最初の drift_window 件を基準にする
+            self.baseline = (rate, sim)
+            return False
+        if self.fit_fn is None:
+            return False
+        base_rate, base_sim = self.baseline
+        return rate - base_rate > self.drift_threshold or (
+            bool(self.recent_sim) and base_sim - sim > self.drift_threshold)
+
+    # -------------------------
+    # 参照
+    # -------------------------
+    def words_by_tid(self) -> Dict[int, List[Tuple[str, float]]]:
+        """現在の安定IDごとの上位語（merge_topics にそのまま渡せる形）"""
+        return {gid: self.words[gid] for gid in sorted(set(self.stable_of.values())) if gid in self.words}
+
+    def label(self, gid: int) -> str:
+        tops = [w for w, _ in self.words.get(gid, [])[:3]]
+        return "・".join(tops) if tops else f"group_{gid}"
+
+    def pop_replaced(self) -> List[int]:
+        """前回の呼び出し以降に別のトピックへ再利用された安定ID"""
+        out, self.replaced = self.replaced, []
+        return out
+
+    def get_stats(self) -> Dict[str, object]:
+        return {
+            "comments": self.n_comments,
+            "refits": self.n_refits,
+            "topics": len(self.stable_of),
+            "outlier_rate": float(np.mean(self.recent_outlier)) if self.recent_outlier else 0.0,
+        }
@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+"""
+Language ID Utility
+
+パイプライン共通の言語検出サービス
+- langdetect の結果をテキストハッシュ -> 言語コードで SQLite に永続化
+- 文字種（Unicode ブロック）だけで言語が決まる短文は langdetect を呼ばずに判定
+- 未キャッシュが多い場合はプロセスプールで並列検出
+- detect_many(texts) で一括検出（重複テキストは1回だけ判定）
+"""
+
+import os
+import sqlite3
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+try:
+    from langdetect import detect, DetectorFactory
+    LANGDETECT_AVAILABLE = True
+except ImportError:
+    LANGDETECT_AVAILABLE = False
+
+# 文字種 -> 言語コード（その文字種の文字しか含まない場合のみ採用）
+SCRIPT_LANGS = {
+    'hangul': 'ko',
+    'thai': 'th',
+    'hebrew': 'he',
+    'greek': 'el',
+}
+
+
+def _char_script(ch: str) -> str:
+    """1文字の文字種を返す（文字以外は ''）"""
+    cp = ord(ch)
+    if 0x3040 <= cp <= 0x30FF or 0x31F0 <= cp <= 0x31FF or 0xFF66 <= cp <= 0xFF9F:
+        return 'kana'
+    if 0x4E00 <= cp <= 0x9FFF or 0x3400 <= cp <= 0x4DBF:
+        return 'han'
+    if 0xAC00 <= cp <= 0xD7AF or 0x1100 <= cp <= 0x11FF or 0x3130 <= cp <= 0x318F:
+        return 'hangul'
+    if 0x0E00 <= cp <= 0x0E7F:
+        return 'thai'
+    if 0x0590 <= cp <= 0x05FF:
+        return 'hebrew'
+    if 0x0370 <= cp <= 0x03FF:
+        return 'greek'
+    if ch.isalpha():
+        return 'other'
+    return ''
+
+
+def script_language(text: str) -> Optional[str]:
+    """
+    文字種だけで言語が確定する場合にその言語コードを返す
+
+    Args:
+        text (str): 判定対象テキスト
+
+    Returns:
+        str or None: 'ja' / 'ko' / 'th' / 'he' / 'el'、文字を含まない場合は 'unk'、
+            判定できない場合は None（langdetect に回す）
+    """
+    scripts = {_char_script(ch) for ch in text}
+    scripts.discard('')
+    if not scripts:
+        # 文字を含まないテキストは langdetect でも検出できない
+        return 'unk'
+    # かなを含み、かな・漢字のみ → 日本語
+    if 'kana' in scripts and scripts <= {'kana', 'han'}:
+        return 'ja'
+    if len(scripts) == 1:
+        return SCRIPT_LANGS.get(next(iter(scripts)))
+    return None
+
+
+def _detect_one(text: str) -> str:
+    """langdetect の例外を握りつぶして言語コードを返す"""
+    if not LANGDETECT_AVAILABLE:
+        return 'unk'
+    try:
+        return detect(text)
+    except Exception:
+        return 'unk'
+
+
+def _detect_chunk(texts: List[str], seed: int) -> List[str]:
+    """プロセスプール用: ワーカー内で seed を設定して一括検出"""
+    if LANGDETECT_AVAILABLE:
+        DetectorFactory.seed = seed
+    return [_detect_one(t) for t in texts]
+
+
+def lang_text_hash(text: str) -> str:
+    """言語キャッシュのキー（テキストの SHA-1）"""
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class LanguageIdentifier:
+    """キャッシュ付き言語検出サービス"""
+
+    def __init__(self, cache_path: Optional[str] = './cache/language/lang_cache.sqlite',
+                 seed: int = 42, workers: int = 1, pool_threshold: int = 2000,
+                 fast_path: bool = True):
+        """
+        Args:
+            cache_path (str): SQLite キャッシュのパス（None でメモリ内のみ）
+            seed (int): langdetect の乱数シード（結果の再現性確保）
+            workers (int): 未キャッシュ分の検出に使うプロセス数
+            pool_threshold (int): この件数以上の未キャッシュがあるときだけプールを使う
+            fast_path (bool): 文字種による判定を使うか
+        """
+        self.seed = seed
+        self.workers = max(1, int(workers))
+        self.pool_threshold = pool_threshold
+        self.fast_path = fast_path
+        if LANGDETECT_AVAILABLE:
+            DetectorFactory.seed = seed
+
+        self._memo: Dict[str, str] = {}
+        self._conn = None
+        if cache_path:
+            cache_dir = os.path.dirname(cache_path)
+            if cache_dir:
+                os.makedirs(cache_dir, exist_ok=True)
+            # 複数プロセス（event_comparison --workers）から同じファイルに書き込むため待ち時間を長めに
+            self._conn = sqlite3.connect(cache_path, timeout=30, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS langs ("
+                " seed INTEGER NOT NULL, hash TEXT NOT NULL, lang TEXT NOT NULL,"
+                " PRIMARY KEY (seed, hash))"
+            )
+            self._conn.commit()
+
+        self.cache_hits = 0
+        self.fast_path_hits = 0
+        self.detected = 0
+
+    def detect(self, text: str) -> str:
+        """1件の言語を検出（検出できない場合は "unk"）"""
+        return self.detect_many([text])[0]
+
+    def _lookup_disk(self, hashes: List[str]) -> Dict[str, str]:
+        found: Dict[str, str] = {}
+        if self._conn is None:
+            return found
+        for i in range(0, len(hashes), 500):
+            chunk = hashes[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT hash, lang FROM langs WHERE seed = ? AND hash IN ({placeholders})",
+                [self.seed] + chunk,
+            ).fetchall()
+            found.update(rows)
+        return found
+
+    def _store_disk(self, pairs: List):
+        if self._conn is None or not pairs:
+            return
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO langs (seed, hash, lang) VALUES (?, ?, ?)",
+            [(self.seed, h, lang) for h, lang in pairs],
+        )
+        self._conn.commit()
+
+    def _run_langdetect(self, texts: List[str]) -> List[str]:
+        """未キャッシュのテキストを langdetect で検出（件数が多ければプロセスプール）"""
+        if self.workers > 1 and len(texts) >= self.pool_threshold:
+            n_chunks = self.workers * 4
+            size = (len(texts) + n_chunks - 1) // n_chunks
+            chunks = [texts[i:i + size] for i in range(0, len(texts), size)]
+            with ProcessPoolExecutor(max_workers=self.workers) as ex:
+                results = ex.map(_detect_chunk, chunks, [self.seed] * len(chunks))
+                return [lang for part in results for lang in part]
+        return [_detect_one(t) for t in texts]
+
+    def detect_many(self, texts: Sequence[str]) -> List[str]:
+        """
+        複数テキストの言語を一括検出
+
+        Args:
+            texts: テキストのリスト（非文字列は文字列化）
+
+        Returns:
+            List[str]: texts と同じ順の言語コード（検出失敗は 'unk'）
+        """
+        texts = ["" if t is None else str(t) for t in texts]
+        unique = list(dict.fromkeys(texts))
+
+        # 1) プロセス内メモ
+        pending = [t for t in unique if t not in self._memo]
+        if pending:
+            # 2) 永続キャッシュ
+            hashes = {t: lang_text_hash(t) for t in pending}
+            disk = self._lookup_disk(list(hashes.values()))
+            to_detect: List[str] = []
+            for t in pending:
+                lang = disk.get(hashes[t])
+                if lang is not None:
+                    self._memo[t] = lang
+                    self.cache_hits += 1
+                    continue
+                # 3) 文字種による高速判定
+                lang = script_language(t) if self.fast_path else None
+                if lang is not None:
+                    self._memo[t] = lang
+                    self.fast_path_hits += 1
+                    continue
+                to_detect.append(t)
+
+            # 4) langdetect（必要ならプロセスプール）
+            if to_detect:
+                langs = self._run_langdetect(to_detect)
+                self.detected += len(to_detect)
+                for t, lang in zip(to_detect, langs):
+                    self._memo[t] = lang
+                self._store_disk([(hashes[t], lang) for t, lang in zip(to_detect, langs)])
+
+        return [self._memo[t] for t in texts]
+
+    def get_stats(self) -> Dict:
+        """検出統計を取得"""
+        return {
+            'memo_entries': len(self._memo),
+            'cache_hits': self.cache_hits,
+            'fast_path_hits': self.fast_path_hits,
+            'langdetect_calls': self.detected,
+        }
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+
+
+_DEFAULT_IDENTIFIER: Optional[LanguageIdentifier] = None
+
+
+def get_language_identifier(**kwargs) -> LanguageIdentifier:
+    """プロセス共通の LanguageIdentifier を取得（初回呼び出し時に生成）"""
+    global _DEFAULT_IDENTIFIER
+    if _DEFAULT_IDENTIFIER is None:
+        _DEFAULT_IDENTIFIER = LanguageIdentifier(**kwargs)
+    return _DEFAULT_IDENTIFIER
+
+
+def detect_many(texts: Sequence[str]) -> List[str]:
+    """共通サービスで複数テキストの言語を一括検出"""
+    return get_language_identifier().detect_many(texts)
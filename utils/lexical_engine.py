@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+"""
+Lexical Engine Utility
+
+コメント集合同士の語彙 JS 距離（compute_lexical_distance）を高速に計算する
+- 全文書で共有する語彙（term -> 列番号）。語の正規化のキャッシュは normalizer 側（TermNormalizer）に任せる
+- 文書（コメントリスト）ごとのカウントを CSR 形式（indptr / indices / data）で1回だけ構築
+- distance_matrix で n 文書の n×n 距離行列を1回の呼び出しで計算
+- 結果は Counter ベースの実装（combined.most_common(top_n) で語彙を選ぶ方式）と一致
+- 文書数・語彙数・ペア距離のキャッシュは上限付き（スイープ点・イベントをまたいで増え続けない）
+"""
+
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.distribution_distance import js_distance
+
+try:
+    from scipy import sparse
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+
+class LexicalEngine:
+    """共有語彙 + 文書ごとの疎カウントによる語彙距離エンジン"""
+
+    def __init__(self, normalizer: Callable[[str], str], top_n: int = 1000,
+                 min_terms: int = 7, min_vocab: int = 5,
+                 max_documents: Optional[int] = 4096, max_pairs: Optional[int] = 100000,
+                 max_vocab: Optional[int] = 200000):
+        """
+        Args:
+            normalizer (callable): 単語の正規化関数（空文字列を返した語は除外）
+            top_n (int): 距離計算に使う上位語数
+            min_terms (int): 各文書に必要な異なり語数（未満なら距離 1.0）
+            min_vocab (int): 上位語彙に必要な語数（未満なら距離 1.0）
+            max_documents (int): 保持する文書数の上限 (None=無制限)
+                distance / distance_matrix で上限を超える場合は文書・ペア距離のキャッシュを作り直す
+            max_pairs (int): ペア距離キャッシュ（LRU）の上限 (None=無制限)
+            max_vocab (int): 語彙数の上限 (None=無制限)。超えていれば次の distance / distance_matrix で
+                文書キャッシュと一緒に作り直す
+        """
+        self.normalizer = normalizer
+        self.top_n = top_n
+        self.min_terms = min_terms
+        self.min_vocab = min_vocab
+        self.max_documents = max_documents
+        self.max_pairs = max_pairs
+        self.max_vocab = max_vocab
+        self.resets = 0
+
+        self.vocab: Dict[str, int] = {}
+
+        # 文書キー（コメントのタプル） -> 文書番号
+        self._doc_ids: Dict[Tuple, int] = {}
+        # CSR 形式の行（語は文書内の初出順）
+        self._indptr: List[int] = [0]
+        self._indices: List[np.ndarray] = []
+        self._data: List[np.ndarray] = []
+        # 検索用に語番号でソートした行
+        self._sorted: List[Tuple[np.ndarray, np.ndarray]] = []
+        # (文書a, 文書b) -> 距離（使用順に並べたLRU）
+        self._pair_cache: OrderedDict = OrderedDict()
+
+    def add_document(self, comments: Sequence[str]) -> int:
+        """
+        コメントリストを文書として登録（同じ内容なら既存の文書番号を返す）
+
+        文書番号は次に文書キャッシュを作り直すまで（distance / distance_matrix が max_documents を超えるまで）有効。
+
+        Args:
+            comments: コメントのリスト（非文字列は無視）
+
+        Returns:
+            int: 文書番号
+        """
+        key = tuple(comments)
+        doc = self._doc_ids.get(key)
+        if doc is not None:
+            return doc
+
+        counts: Dict[int, int] = {}
+        vocab = self.vocab
+        normalize = self.normalizer
+        for txt in key:
+            if not isinstance(txt, str):
+                continue
+            for w in txt.split():
+                norm = normalize(w)
+                if not norm:
+                    continue
+                col = vocab.get(norm)
+                if col is None:
+                    col = len(vocab)
+                    vocab[norm] = col
+                counts[col] = counts.get(col, 0) + 1
+
+        idx = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        cnt = np.fromiter(counts.values(), dtype=np.int64, count=len(counts))
+        order = np.argsort(idx)
+
+        doc = len(self._indices)
+        self._doc_ids[key] = doc
+        self._indices.append(idx)
+        self._data.append(cnt)
+        self._indptr.append(self._indptr[-1] + len(idx))
+        self._sorted.append((idx[order], cnt[order]))
+        return doc
+
+    @property
+    def n_documents(self) -> int:
+        return len(self._indices)
+
+    def csr_arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """登録済み文書のカウント行列を CSR の (indptr, indices, data) で取得"""
+        indptr = np.asarray(self._indptr, dtype=np.int64)
+        if not self._indices:
+            empty = np.zeros(0, dtype=np.int64)
+            return indptr, empty, empty
+        return indptr, np.concatenate(self._indices), np.concatenate(self._data)
+
+    def to_csr(self):
+        """登録済み文書のカウント行列（scipy.sparse.csr_matrix, 文書 × 語彙）"""
+        if not SCIPY_AVAILABLE:
+            raise ImportError("scipy is required for LexicalEngine.to_csr()")
+        indptr, indices, data = self.csr_arrays()
+        return sparse.csr_matrix((data, indices, indptr),
+                                 shape=(self.n_documents, len(self.vocab)))
+
+    def _lookup(self, doc: int, terms: np.ndarray) -> np.ndarray:
+        """文書 doc における terms の出現数（無ければ 0）"""
+        s_idx, s_cnt = self._sorted[doc]
+        if len(s_idx) == 0:
+            return np.zeros(len(terms), dtype=np.int64)
+        pos = np.searchsorted(s_idx, terms)
+        pos_c = np.minimum(pos, len(s_idx) - 1)
+        hit = s_idx[pos_c] == terms
+        return np.where(hit, s_cnt[pos_c], 0)
+
+    def _pair_distance(self, a: int, b: int) -> float:
+        ia, ca = self._indices[a], self._data[a]
+        ib, cb = self._indices[b], self._data[b]
+        if len(ia) < self.min_terms or len(ib) < self.min_terms:
+            return 1.0
+
+        # Counter の ca + cb と同じ並び: a の語（初出順）→ b だけにある語
+        b_only = self._lookup(a, ib) == 0
+        terms = np.concatenate([ia, ib[b_only]])
+        va_all = np.concatenate([ca, np.zeros(int(b_only.sum()), dtype=np.int64)])
+        vb_all = np.concatenate([self._lookup(b, ia), cb[b_only]])
+
+        # most_common(top_n): 合計の降順、同数は挿入順（安定ソート）
+        combined = va_all + vb_all
+        sel = np.lexsort((np.arange(len(terms)), -combined))[:self.top_n]
+        if len(sel) < self.min_vocab:
+            return 1.0
+        return js_distance(va_all[sel].astype(float), vb_all[sel].astype(float))
+
+    def distance_between(self, a: int, b: int) -> float:
+        """登録済み文書 a, b の語彙 JS 距離（結果は max_pairs 件までキャッシュ）"""
+        key = (a, b)
+        d = self._pair_cache.get(key)
+        if d is not None:
+            self._pair_cache.move_to_end(key)
+            return d
+        d = self._pair_distance(a, b)
+        self._pair_cache[key] = d
+        if self.max_pairs is not None:
+            while len(self._pair_cache) > max(1, self.max_pairs):
+                self._pair_cache.popitem(last=False)
+        return d
+
+    def _reserve(self, documents: Sequence[Sequence[str]]):
+        """documents を登録しても max_documents を超えないよう（語彙が max_vocab を超えていれば）作り直す"""
+        if self.max_vocab is not None and len(self.vocab) > self.max_vocab:
+            self.clear_cache()
+            self.resets += 1
+            return
+        if self.max_documents is None:
+            return
+        new = {tuple(c) for c in documents}.difference(self._doc_ids)
+        if new and self.n_documents + len(new) > self.max_documents:
+            self.clear_cache()
+            self.resets += 1
+
+    def distance(self, comments_a: Sequence[str], comments_b: Sequence[str]) -> float:
+        """
+        2つのコメント集合の語彙 JS 距離
+
+        Args:
+            comments_a, comments_b: コメントのリスト
+
+        Returns:
+            float: JS 距離（データ不足の場合は 1.0）
+        """
+        self._reserve((comments_a, comments_b))
+        return self.distance_between(self.add_document(comments_a),
+                                     self.add_document(comments_b))
+
+    def distance_matrix(self, documents: Sequence[Sequence[str]]) -> np.ndarray:
+        """
+        複数のコメント集合の全ペア語彙 JS 距離
+
+        (i, j) は i < j について distance(documents[i], documents[j]) を計算し、
+        対称にコピーする（対角は 0）。documents が max_documents より多い場合も呼び出し中は全文書を保持する。
+
+        Args:
+            documents: コメントリストのリスト
+
+        Returns:
+            np.ndarray: (n, n) の距離行列
+        """
+        self._reserve(documents)
+        docs = [self.add_document(c) for c in documents]
+        n = len(docs)
+        out = np.zeros((n, n), dtype=float)
+        if n < 2:
+            return out
+
+        # 語数不足の文書を含むペアは一括で 1.0
+        sizes = np.array([len(self._indices[d]) for d in docs])
+        short = sizes < self.min_terms
+        iu, ju = np.triu_indices(n, k=1)
+        vals = np.ones(len(iu), dtype=float)
+        for k in np.flatnonzero(~(short[iu] | short[ju])):
+            vals[k] = self.distance_between(docs[iu[k]], docs[ju[k]])
+        out[iu, ju] = vals
+        out[ju, iu] = vals
+        return out
+
+    def clear_cache(self):
+        """文書・語彙・ペア距離のキャッシュを破棄（語彙の列番号は文書からしか参照されない）"""
+        self.vocab.clear()
+        self._doc_ids.clear()
+        self._indptr = [0]
+        self._indices.clear()
+        self._data.clear()
+        self._sorted.clear()
+        self._pair_cache.clear()
+
+    def get_stats(self) -> Dict:
+        """キャッシュ統計を取得"""
+        return {
+            'vocab_size': len(self.vocab),
+            'documents': self.n_documents,
+            'cached_pairs': len(self._pair_cache),
+            'resets': self.resets,
+        }
@@ -7,6 +7,10 @@ Noise Filter Utility
 import re
 from collections import Counter
 import numpy as np
+import pandas as pd
+
+# 1文字のみでノイズとみなす文字（数字・記号）
+NOISE_SINGLE_CHARS = '0123456789!?。、.,;:-_=+*/#@$%^&()[]{}'
 
 
 class NoiseFilter:
@@ -55,6 +59,20 @@ class NoiseFilter:
             '????',
             '....',
         ]
+        
+        # 一括判定用: 全パターンを1つの選択正規表現に（どれにマッチしたかは名前付きグループで判別）
+        self._noise_re = re.compile('|'.join(f'(?:{p})' for p in self.noise_patterns))
+        self._noise_groups_re = re.compile(
+            '|'.join(f'(?P<p{i}>{p})' for i, p in enumerate(self.noise_patterns))
+        )
+        self._substring_re = re.compile('|'.join(re.escape(s) for s in self.low_quality_substrings))
+        # ルール名（get_statistics の rule_hits のキー、判定順）
+        self.rule_names = (
+            ['non_string', 'empty']
+            + [f'pattern:{p}' for p in self.noise_patterns]
+            + ['single_char', 'repeated_char']
+            + [f'substring:{s}' for s in self.low_quality_substrings]
+        )
     
     def is_noise(self, text):
         """
@@ -75,15 +93,14 @@ class NoiseFilter:
         if len(text_clean) == 0:
             return True
         
-        # 正規表現マッチ
-        for pattern in self.noise_patterns:
-            if re.match(pattern, text_clean):
-                return True
+        # 正規表現マッチ（全パターンの選択）
+        if self._noise_re.match(text_clean):
+            return True
         
         # 1文字 (ただし意味のある文字は除外)
         if len(text_clean) == 1:
             # 数字、記号のみはノイズ
-            if text_clean in '0123456789!?。、.,;:-_=+*/#@$%^&()[]{}':
+            if text_clean in NOISE_SINGLE_CHARS:
                 return True
         
         # 同じ文字の繰り返し (80%以上)
@@ -100,6 +117,101 @@ class NoiseFilter:
         
         return False
     
+    @staticmethod
+    def max_char_ratio(texts):
+        """
+        各テキストで最も多い文字の割合を一括計算
+        
+        Args:
+            texts: 文字列のリスト
+            
+        Returns:
+            np.ndarray: 最頻文字の出現数 / 文字数（空文字列は 0）
+        """
+        texts = list(texts)
+        n = len(texts)
+        lens = np.fromiter((len(t) for t in texts), dtype=np.int64, count=n)
+        if n == 0 or lens.sum() == 0:
+            return np.zeros(n, dtype=float)
+        # 全テキストを連結してコードポイント配列に（コードポイントは 21 ビット以内）
+        codes = np.frombuffer(''.join(texts).encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+        seg = np.repeat(np.arange(n, dtype=np.int64), lens)
+        keys, counts = np.unique((seg << 21) | codes.astype(np.int64), return_counts=True)
+        max_counts = np.zeros(n, dtype=np.int64)
+        np.maximum.at(max_counts, keys >> 21, counts)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(lens > 0, max_counts / np.maximum(lens, 1), 0.0)
+    
+    def _noise_rules(self, texts):
+        """
+        各テキストをノイズと判定したルールの番号（self.rule_names の添字、ノイズでなければ -1）
+        
+        is_noise と同じ順にルールを適用し、最初に該当したルールを返す
+        """
+        series = pd.Series(list(texts), dtype=object)
+        n = len(series)
+        rules = np.full(n, -1, dtype=np.int64)
+        if n == 0:
+            return rules
+        
+        is_str = series.map(lambda t: isinstance(t, str)).to_numpy(dtype=bool)
+        rules[~is_str] = 0
+        clean = series[is_str].str.strip().str.lower()
+        idx = np.flatnonzero(is_str)
+        lens = clean.str.len().to_numpy(dtype=np.int64)
+        
+        def assign(mask, rule):
+            target = idx[mask]
+            free = rules[target] == -1
+            rules[target[free]] = rule
+        
+        # 空文字
+        assign(lens == 0, 1)
+        
+        # 正規表現（マッチした行だけ、どのパターンかを名前付きグループで判別）
+        matched = clean.str.match(self._noise_re).to_numpy(dtype=bool)
+        if matched.any():
+            groups = clean[matched].str.extract(self._noise_groups_re)
+            # パターン内の無名グループも列になるため、名前付きグループの列だけを見る
+            named = groups[[f'p{i}' for i in range(len(self.noise_patterns))]]
+            first = named.notna().to_numpy().argmax(axis=1)
+            sub = np.zeros(len(clean), dtype=np.int64)
+            sub[matched] = 2 + first
+            for rule in np.unique(sub[matched]):
+                assign(matched & (sub == rule), int(rule))
+        
+        # 1文字の数字・記号
+        assign((lens == 1) & clean.isin(set(NOISE_SINGLE_CHARS)).to_numpy(dtype=bool),
+               2 + len(self.noise_patterns))
+        
+        # 同じ文字の繰り返し (80%以上)
+        ratio = self.max_char_ratio(clean.tolist())
+        assign((lens > 1) & (ratio > 0.8), 3 + len(self.noise_patterns))
+        
+        # 低品質な部分文字列（リスト順で最初に含まれるもの）
+        has_sub = clean.str.contains(self._substring_re).to_numpy(dtype=bool)
+        base = 4 + len(self.noise_patterns)
+        for k, substring in enumerate(self.low_quality_substrings):
+            if not has_sub.any():
+                break
+            hit = has_sub & clean.str.contains(substring, regex=False).to_numpy(dtype=bool)
+            assign(hit, base + k)
+            has_sub = has_sub & ~hit
+        
+        return rules
+    
+    def noise_mask(self, texts):
+        """
+        テキスト列のノイズ判定を一括で行う（is_noise を各要素に適用したのと同じ結果）
+        
+        Args:
+            texts: テキストの列（Series / list）
+            
+        Returns:
+            np.ndarray: ノイズなら True の bool 配列
+        """
+        return self._noise_rules(texts) >= 0
+    
     def is_stopword(self, word, lang='en'):
         """
         単語がストップワードかどうか判定
@@ -233,8 +345,10 @@ class NoiseFilter:
         Returns:
             dict: 統計情報
         """
-        total = len(texts)
-        noise_count = sum(1 for t in texts if self.is_noise(t))
+        rules = self._noise_rules(texts)
+        total = len(rules)
+        noise_count = int((rules >= 0).sum())
+        hits = np.bincount(rules[rules >= 0], minlength=len(self.rule_names))
         
         stats = {
             'total': total,
@@ -242,6 +356,8 @@ class NoiseFilter:
             'clean': total - noise_count,
             'noise_ratio': noise_count / total if total > 0 else 0,
             'clean_ratio': (total - noise_count) / total if total > 0 else 0,
+            # ルールごとの該当数（各テキストは最初に該当したルールに数える）
+            'rule_hits': {name: int(c) for name, c in zip(self.rule_names, hits) if c > 0},
         }
         
         return stats
@@ -0,0 +1,399 @@
+# -*- coding: utf-8 -*-
+"""
+Online Event Detection Utility
+
+ライブ配信中のチャットを小さなバッチで取り込み、グループ×ビンの件数を更新しながらピークをイベントとして出す
+- 入力: 追記中の CSV（follow_csv）またはキュー（queue_batches）からの DataFrame のバッチ
+- グループ割り当ては差し替え可能（既定は TermGrouper: コメント内で最も多い語ごとのグループ）
+- 件数は直近 window_bins 個のビンだけをリングバッファ（max_groups × window_bins）で保持
+- ビン b の平滑化値が確定するのは b + smooth_k // 2 のビンが閉じた時点、ピーク判定はその隣も必要なため
+  イベントはピークのビンから最大 smooth_k // 2 + 2 ビン遅れで出る
+- メモリは配信の長さによらず一定（件数行列・語彙・グループごとの直近コメントはすべて上限付き）
+"""
+
+import codecs
+import csv
+import io
+import os
+import queue
+import time
+from collections import Counter
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.csv_reader import ENCODINGS, SNIFF_BYTES
+from utils.peak_detection import smooth_series, peak_prominences
+
+
+# -------------------------
+# 入力（追記中の CSV / キュー）
+# -------------------------
+def _split_complete_records(text: str) -> Tuple[str, str]:
+    """引用符の外にある最後の改行までを完全なレコードとして切り出す（(完全な部分, 残り)）"""
+    in_quote = False
+    last_end = -1
+    for i, ch in enumerate(text):
+        if ch == '"':
+            in_quote = not in_quote
+        elif ch == "\n" and not in_quote:
+            last_end = i
+    return text[:last_end + 1], text[last_end + 1:]
+
+
+def follow_csv(path: str, poll_seconds: float = 2.0, idle_timeout: Optional[float] = 600.0,
+               max_rows: int = 5000, stop: Optional[Callable[[], bool]] = None,
+               block_bytes: int = 1 << 20) -> Iterator[pd.DataFrame]:
+    """
+    追記中の CSV を追いかけ、新しく書かれた行を DataFrame のバッチで返す
+
+    書きかけの行（改行前、または引用符内の改行）は次の読み込みまで持ち越す。
+    1回に読むのは最大 block_bytes バイトなので、途中から追いかける場合も既存分を一度に読み込まない。
+    全列を文字列として読む（read_chat_csv と同じく数値だけのコメントも文字列のまま）。
+
+    Args:
+        path (str): CSVファイル（まだ存在しなくてもよい）
+        poll_seconds (float): 新しい行がないときの待ち時間
+        idle_timeout (float): この秒数だけ増えなければ終了（None なら stop まで待ち続ける）
+        max_rows (int): 1バッチの最大行数
+        stop (callable): True を返したら終了
+        block_bytes (int): 1回に読み込む最大バイト数
+
+    Yields:
+        DataFrame: 新しい行（ヘッダーの列名付き）
+    """
+    offset = 0
+    header: Optional[List[str]] = None
+    decoder = None
+    pending = ""
+    last_growth = time.monotonic()
+    while not (stop is not None and stop()):
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if size < offset:
+            # 書き直された（ローテーション等）場合は先頭から読み直す
+            offset, header, decoder, pending = 0, None, None, ""
+        if size > offset:
+            with open(path, "rb") as f:
+                f.seek(offset)
+                data = f.read(min(size - offset, block_bytes))
+            offset += len(data)
+            last_growth = time.monotonic()
+            if decoder is None:
+                encoding = _sniff_bytes(data[:SNIFF_BYTES])
+                decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+            complete, pending = _split_complete_records(pending + decoder.decode(data))
+            rows = list(csv.reader(io.StringIO(complete)))
+            if header is None and rows:
+                header, rows = rows[0], rows[1:]
+            rows = [r for r in rows if r]
+            for start in range(0, len(rows), max_rows):
+                part = rows[start:start + max_rows]
+                width = len(header)
+                yield pd.DataFrame([(r + [""] * width)[:width] for r in part], columns=header)
+            continue
+        if idle_timeout is not None and time.monotonic() - last_growth > idle_timeout:
+            return
+        time.sleep(poll_seconds)
+
+
+def _sniff_bytes(sample: bytes) -> str:
+    """先頭バイト列から文字コードを判定（csv_reader.sniff_encoding と同じ規則）"""
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    for enc in ENCODINGS:
+        try:
+            codecs.getincrementaldecoder(enc)().decode(sample, final=False)
+            return enc
+        except UnicodeDecodeError:
+            continue
+    return ENCODINGS[-1]
+
+
+def queue_batches(q: "queue.Queue", max_rows: int = 500, timeout: float = 2.0) -> Iterator[pd.DataFrame]:
+    """
+    キューに入るコメント（dict、終了は None）を最大 max_rows 件ずつ DataFrame にまとめて返す
+
+    timeout 秒待っても新しいコメントがなければ、それまでの分を返す（遅延の上限）。
+    """
+    done = False
+    while not done:
+        items: List[Dict[str, object]] = []
+        deadline = time.monotonic() + timeout
+        while len(items) < max_rows:
+            try:
+                item = q.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is None:
+                done = True
+                break
+            items.append(item)
+        if items:
+            yield pd.DataFrame(items)
+
+
+# -------------------------
+# グループ割り当て
+# -------------------------
+class TermGrouper:
+    """コメント内で最も多い語ごとにグループを割り当てる（語彙は max_groups 語まで、Space-Saving で入れ替え）"""
+
+    def __init__(self, max_groups: int = 64, normalize: Optional[Callable[[str], str]] = None,
+                 stopwords: Optional[Callable[[str], bool]] = None):
+        """
+        Args:
+            max_groups (int): 同時に追跡する語（グループ）の数
+            normalize (callable): 語の正規化（空文字を返した語は無視）
+            stopwords (callable): True を返した語は無視
+        """
+        self.max_groups = max_groups
+        self.normalize = normalize or (lambda w: w if len(w) > 1 and not w.isdigit() else "")
+        self.stopwords = stopwords
+        self.term_to_gid: Dict[str, int] = {}
+        self.labels: List[Optional[str]] = [None] * max_groups
+        self.counts = np.zeros(max_groups, dtype=np.int64)
+        # 入れ替えで語が変わったグループ（件数をリセットする必要がある）
+        self.replaced: List[int] = []
+
+    def _dominant_term(self, text: str) -> str:
+        terms = [self.normalize(w) for w in str(text).split()]
+        terms = [t for t in terms if t and not (self.stopwords is not None and self.stopwords(t))]
+        if not terms:
+            return ""
+        return Counter(terms).most_common(1)[0][0]
+
+    def assign(self, texts: Sequence[str]) -> np.ndarray:
+        """各コメントのグループID（語がないコメントは -1）"""
+        gids = np.full(len(texts), -1, dtype=np.int64)
+        for i, text in enumerate(texts):
+            term = self._dominant_term(text)
+            if not term:
+                continue
+            gid = self.term_to_gid.get(term)
+            if gid is None:
+                free = [g for g, label in enumerate(self.labels) if label is None]
+                if free:
+                    gid = free[0]
+                else:
+                    # 最も少ない語を置き換え、その件数を引き継ぐ（Space-Saving）
+                    gid = int(np.argmin(self.counts))
+                    del self.term_to_gid[self.labels[gid]]
+                    self.replaced.append(gid)
+                self.term_to_gid[term] = gid
+                self.labels[gid] = term
+            self.counts[gid] += 1
+            gids[i] = gid
+        return gids
+
+    def label(self, gid: int) -> str:
+        return self.labels[gid] or f"group_{gid}"
+
+    def pop_replaced(self) -> List[int]:
+        """前回の呼び出し以降に語が入れ替わったグループ"""
+        out, self.replaced = self.replaced, []
+        return out
+
+
+# -------------------------
+# 件数のリングバッファとオンラインのピーク検出
+# -------------------------
+class RollingGroupCounts:
+    """直近 window_bins 個のビンのグループ別件数（max_groups × window_bins のリングバッファ）"""
+
+    def __init__(self, max_groups: int, window_bins: int):
+        self.max_groups = max_groups
+        self.window_bins = window_bins
+        self.counts = np.zeros((max_groups, window_bins), dtype=float)
+        self.latest_bin = -1  # これまでに見た最大のビン
+
+    def advance(self, bin_id: int):
+        """最大ビンを bin_id まで進め、窓から外れたビンの列を空にする"""
+        if bin_id <= self.latest_bin:
+            return
+        start = max(self.latest_bin + 1, bin_id - self.window_bins + 1)
+        for b in range(start, bin_id + 1):
+            self.counts[:, b % self.window_bins] = 0.0
+        self.latest_bin = bin_id
+
+    def add(self, bin_ids: np.ndarray, group_ids: np.ndarray) -> int:
+        """件数を加算（窓より古いビン・対象外のグループは捨てる）。加算した件数を返す"""
+        bin_ids = np.asarray(bin_ids, dtype=np.int64)
+        group_ids = np.asarray(group_ids, dtype=np.int64)
+        if len(bin_ids):
+            self.advance(int(bin_ids.max()))
+        keep = ((bin_ids > self.latest_bin - self.window_bins) & (bin_ids >= 0) & (group_ids >= 0)
+                & (group_ids < self.max_groups))
+        np.add.at(self.counts, (group_ids[keep], bin_ids[keep] % self.window_bins), 1.0)
+        return int(keep.sum())
+
+    def window(self, first_bin: int, last_bin: int) -> np.ndarray:
+        """first_bin〜last_bin（両端含む、窓の範囲内）の件数を時間順に並べた (max_groups × n) 行列"""
+        first_bin = max(first_bin, self.latest_bin - self.window_bins + 1, 0)
+        cols = np.arange(first_bin, last_bin + 1) % self.window_bins
+        return self.counts[:, cols]
+
+    def reset_group(self, gid: int):
+        self.counts[gid] = 0.0
+
+
+class OnlineEventDetector:
+    """マイクロバッチでコメントを取り込み、確定したビンからピークイベントを出す"""
+
+    def __init__(self, bin_seconds: float = 30.0, window_bins: int = 120, smooth_k: int = 5,
+                 z_threshold: float = 3.0, min_count: float = 5.0, prominence: Optional[float] = None,
+                 min_distance: int = 5, min_history: int = 10, max_groups: int = 64, grouper=None,
+                 peak_pad: int = 1, sample_size: int = 5, start_time: Optional[pd.Timestamp] = None):
+        """
+        Args:
+            bin_seconds (float): 1ビンの秒数
+            window_bins (int): 保持するビン数（基準値の計算にもこの範囲を使う）
+            smooth_k (int): 移動平均の窓幅（オフラインの detect_events と同じ 5）
+            z_threshold (float): 平滑化値が 基準平均 + z_threshold × 基準標準偏差（下限 1）以上ならイベント
+            min_count (float): 平滑化値の下限
+            prominence (float): これ未満のプロミネンスのピークを除外（None で無効）
+            min_distance (int): 同じグループでイベントを出す最小間隔（ビン数）
+            min_history (int): 基準値の計算に必要な過去のビン数（これより前のビンではイベントを出さない）
+            max_groups (int): 追跡するグループ数
+            grouper: assign(texts) -> グループID配列 と label(gid) を持つオブジェクト（既定は TermGrouper）
+            peak_pad (int): イベントに付けるサンプルコメントの範囲（ピーク前後のビン数）
+            sample_size (int): グループ・ビンごとに保持するサンプルコメント数（先着順）
+            start_time (Timestamp): ビン0の開始時刻（None なら最初のコメントの時刻）
+        """
+        self.bin_seconds = float(bin_seconds)
+        self.smooth_k = smooth_k
+        self.half = smooth_k // 2
+        # 平滑化とピーク判定に必要な分は必ず保持する
+        self.window_bins = max(window_bins, 2 * self.half + 4, min_history + smooth_k + 2)
+        self.z_threshold = z_threshold
+        self.min_count = min_count
+        self.prominence = prominence
+        self.min_distance = min_distance
+        self.min_history = max(2, min_history)
+        self.grouper = grouper if grouper is not None else TermGrouper(max_groups)
+        self.max_groups = getattr(self.grouper, "max_groups", max_groups)
+        self.peak_pad = peak_pad
+        self.start_time = start_time
+        self.counts = RollingGroupCounts(self.max_groups, self.window_bins)
+        self.sample_size = sample_size
+        # グループ × ビン（リングバッファと同じ位置）ごとの [ビン, コメント] のサンプル
+        self.samples = [[[-1, []] for _ in range(self.window_bins)] for _ in range(self.max_groups)]
+        self.last_event_bin = np.full(self.max_groups, -np.iinfo(np.int64).max // 2, dtype=np.int64)
+        self.next_bin = 0  # 次にピーク判定するビン
+        self.n_comments = 0
+        self.n_late = 0
+
+    @property
+    def latency_bins(self) -> int:
+        """ピークのビンからイベントが出るまでの最大ビン数"""
+        return self.half + 2
+
+    def _bin_ids(self, timestamps: pd.Series) -> np.ndarray:
+        if self.start_time is None:
+            self.start_time = timestamps.min()
+        secs = (timestamps - self.start_time).dt.total_seconds().to_numpy()
+        return np.floor(secs / self.bin_seconds).astype(np.int64)
+
+    def ingest(self, batch: pd.DataFrame, text_col: str = "message_clean") -> List[Dict[str, object]]:
+        """
+        コメントのバッチを取り込み、新しく確定したイベントを返す
+
+        Args:
+            batch (DataFrame): timestamp（datetime）と text_col の列を持つバッチ
+            text_col (str): グループ割り当てに使うテキスト列
+
+        Returns:
+            List[Dict]: イベント（group_id, bin_id, peak_time, label, top_words, count, score,
+                        detected_bin, latency_sec, comments）
+        """
+        batch = batch.dropna(subset=["timestamp"])
+        if batch.empty:
+            return []
+        bins = self._bin_ids(batch["timestamp"])
+        texts = batch[text_col].astype(str).tolist()
+        gids = np.asarray(self.grouper.assign(texts), dtype=np.int64)
+        if hasattr(self.grouper, "pop_replaced"):
+            for g in self.grouper.pop_replaced():
+                self.counts.reset_group(g)
+                for slot in self.samples[g]:
+                    slot[0] = -1
+        # 判定済みのビンに遅れて届いたコメントは件数には入れるが、イベントは出し直さない
+        self.n_late += int((bins < self.next_bin).sum())
+        self.n_comments += self.counts.add(bins, gids)
+        for b, g, t in zip(bins, gids, texts):
+            if 0 <= g < self.max_groups and b >= 0 and b > self.counts.latest_bin - self.window_bins:
+                slot = self.samples[g][b % self.window_bins]
+                if slot[0] != b:
+                    slot[0], slot[1] = int(b), []
+                if len(slot[1]) < self.sample_size:
+                    slot[1].append(t)
+        return self._detect(complete_bin=self.counts.latest_bin - 1)
+
+    def flush(self) -> List[Dict[str, object]]:
+        """配信終了時: 最後のビンまで確定したものとして判定する（以降は ingest しない）"""
+        if self.counts.latest_bin < 0:
+            return []
+        return self._detect(complete_bin=self.counts.latest_bin, final=True)
+
+    def _detect(self, complete_bin: int, final: bool = False) -> List[Dict[str, object]]:
+        """complete_bin までのビンが閉じた前提で、まだ判定していないビンをすべて判定"""
+        # ビン c の判定には隣 c + 1 の平滑化値（c + 1 + half までの件数）が必要
+        last_ready = complete_bin if final else complete_bin - self.half - 1
+        lo = max(0, self.counts.latest_bin - self.window_bins + 1)
+        # 窓の左端が配信開始でない場合、左端付近の平滑化値は不正確なので判定しない
+        first = self.next_bin if lo == 0 else max(self.next_bin, lo + self.half + 1)
+        events: List[Dict[str, object]] = []
+        if last_ready < first:
+            self.next_bin = max(self.next_bin, last_ready + 1)
+            return events
+
+        raw = self.counts.window(lo, complete_bin)
+        y = smooth_series(raw, k=self.smooth_k)
+        edge = np.full((self.max_groups, 1), -np.inf)
+        left = np.concatenate([edge, y[:, :-1]], axis=1)
+        right = np.concatenate([y[:, 1:], edge], axis=1)
+        is_peak = (y >= left) & (y >= right) & (y > 0)
+        if self.prominence is not None and self.prominence > 0:
+            # 窓内で分かる範囲のプロミネンス
+            is_peak &= peak_prominences(y, is_peak) >= self.prominence
+        base_start = 0 if lo == 0 else self.half
+        for c in range(first, last_ready + 1):
+            j = c - lo
+            # 基準: ピークの平滑化窓に掛からない過去のビン
+            base = y[:, base_start:max(base_start, j - self.smooth_k + 1)]
+            if base.shape[1] < self.min_history:
+                continue
+            # 過去にほとんど出ていないグループでも 1 件程度の揺れではイベントにしない
+            mean, std = base.mean(axis=1), np.maximum(base.std(axis=1), 1.0)
+            hit = is_peak[:, j] & (y[:, j] >= np.maximum(self.min_count, mean + self.z_threshold * std))
+            hit &= c - self.last_event_bin >= self.min_distance
+            for g in np.flatnonzero(hit):
+                self.last_event_bin[g] = c
+                score = float((y[g, j] - mean[g]) / std[g])
+                events.append(self._event(int(g), c, float(raw[g, j]), score))
+        self.next_bin = last_ready + 1
+        return events
+
+    def _event(self, gid: int, bin_id: int, count: float, score: float) -> Dict[str, object]:
+        label = self.grouper.label(gid)
+        comments = []
+        for b in range(bin_id - self.peak_pad, bin_id + self.peak_pad + 1):
+            slot = self.samples[gid][b % self.window_bins]
+            if slot[0] == b:
+                comments.extend(slot[1])
+        detected = self.counts.latest_bin
+        return {
+            "group_id": gid,
+            "bin_id": bin_id,
+            "peak_time": self.start_time + pd.Timedelta(seconds=bin_id * self.bin_seconds),
+            "label": label,
+            "top_words": [label],
+            "count": count,
+            "score": score,
+            "detected_bin": detected,
+            "latency_sec": (detected - bin_id) * self.bin_seconds,
+            "comments": comments,
+        }
+
+    def get_stats(self) -> Dict[str, int]:
+        return {"comments": self.n_comments, "late": self.n_late, "latest_bin": self.counts.latest_bin}
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Parameter Sweep Utility
+
+event_comparison.run_parameter_sweep のグリッド展開・出力先の名前空間・グリッド点の評価と集計
+- グリッドは {引数名: 値のリスト}（SWEEP_PARAMS のみ）、指定のない引数は既定値で固定
+- 各グリッド点の出力は out_root/<sweep_point_name> に分けて保存する
+- 並列評価（プロセスプール）でも集計はグリッド順（完了順ではない）、ログもグリッド順に出す
+"""
+
+import contextlib
+import io
+import itertools
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from utils.table_store import save_table
+
+SWEEP_PARAMS = ("time_bins", "embedding_match_th", "time_match_th", "word_match_th", "n_events")
+
+
+def expand_sweep_grid(grid: Dict[str, List[object]], defaults) -> List[Dict[str, object]]:
+    """
+    {引数名: 値のリスト} を全組み合わせに展開
+
+    Args:
+        grid (dict): {引数名: 値のリスト}（SWEEP_PARAMS 以外の引数名は ValueError）
+        defaults: grid にない引数の値を属性として持つオブジェクト（parse_args() の結果など）
+
+    Returns:
+        List[Dict]: グリッド点（SWEEP_PARAMS の順に変化、最後の引数が最も速く変わる）
+    """
+    unknown = sorted(set(grid) - set(SWEEP_PARAMS))
+    if unknown:
+        raise ValueError(f"Unsupported sweep parameters: {unknown} (supported: {list(SWEEP_PARAMS)})")
+    values = [list(grid.get(name, [getattr(defaults, name)])) for name in SWEEP_PARAMS]
+    return [dict(zip(SWEEP_PARAMS, combo)) for combo in itertools.product(*values)]
+
+
+def sweep_point_name(point: Dict[str, object]) -> str:
+    """グリッド1点の出力先（名前空間）のディレクトリ名"""
+    emb = point["embedding_match_th"]
+    emb = "none" if emb is None else f"{emb:g}"
+    return (f"bins{point['time_bins']}_emb{emb}_time{point['time_match_th']}"
+            f"_word{point['word_match_th']:g}_n{point['n_events']}")
+
+
+def call_with_buffered_log(func: Callable, *args, **kwargs) -> Tuple[object, str]:
+    """func を実行し、(戻り値, 標準出力) を返す（ワーカーのログを親プロセスで順に出すため）"""
+    buf = io.StringIO()
+    with contextlib.redirect_stdout(buf):
+        result = func(*args, **kwargs)
+    return result, buf.getvalue()
+
+
+def evaluate_sweep_points(points: Sequence[Dict[str, object]], out_root: str,
+                          evaluate: Callable[[Dict[str, object], str], Dict[str, object]],
+                          workers: int = 1, worker: Optional[Callable] = None,
+                          initializer: Optional[Callable] = None, initargs: tuple = (),
+                          mp_context=None) -> pd.DataFrame:
+    """
+    グリッド点を評価して集計表を作り、out_root/sweep_summary.csv に保存する
+
+    Args:
+        points: expand_sweep_grid() のグリッド点
+        out_root (str): スイープ出力のルート（グリッド点ごとに out_root/<sweep_point_name>）
+        evaluate (callable): 逐次実行時の evaluate(point, out_dir) -> 集計行
+        workers (int): 並列評価するプロセス数（1 または worker がなければ逐次）
+        worker (callable): 並列実行時の worker(point, out_dir) -> (集計行, ログ)（pickle できる関数）
+        initializer / initargs: ワーカー初期化（共有データを1回だけ渡す）
+        mp_context: multiprocessing のコンテキスト（既定は spawn）
+
+    Returns:
+        DataFrame: グリッド順の集計表
+    """
+    out_dirs = [os.path.join(out_root, sweep_point_name(p)) for p in points]
+    workers = min(max(1, workers), len(points)) if points else 1
+    rows: List[Dict[str, object]] = []
+    if workers <= 1 or worker is None:
+        for point, out_dir in zip(points, out_dirs):
+            rows.append(evaluate(point, out_dir))
+    else:
+        ctx = mp_context or multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                                 initializer=initializer, initargs=initargs) as ex:
+            futures = [ex.submit(worker, p, d) for p, d in zip(points, out_dirs)]
+            # 完了順ではなくグリッド順に回収
+            for fut in futures:
+                summary, log = fut.result()
+                sys.stdout.write(log)
+                rows.append(summary)
+
+    summary_df = pd.DataFrame(rows)
+    save_table(summary_df, os.path.join(out_root, "sweep_summary.csv"))
+    print(f"[Sweep] Saved summary: {os.path.join(out_root, 'sweep_summary.csv')}")
+    return summary_df
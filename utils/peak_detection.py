@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+Peak Detection Utility
+
+グループ×ビンの時系列行列に対する平滑化・ピーク抽出をまとめて（ベクトル化して）行う
+- group_timeseries（Group / Timestamp / Frequency の縦持ち）を (groups × bins) の密行列に1回で変換
+- smooth_series / local_peaks は1本の系列（1次元）にも全グループの行列（2次元）にも使える
+- 結果（同値ピークの扱いを含む）はグループごとに np.convolve とループで計算した場合と同じ
+- 上位 k 個の選択は argpartition、任意でプロミネンス・最小間隔による絞り込み
+"""
+
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
+
+
+def timeseries_matrix(group_ids: Sequence[int], bin_ids: Sequence[int], values: Sequence[float],
+                      n_groups: int, n_bins: int) -> np.ndarray:
+    """
+    縦持ちの (group, bin, 値) を (n_groups × n_bins) の密行列に集計（同じセルは合計）
+
+    Args:
+        group_ids: 各行のグループID（0〜n_groups-1）
+        bin_ids: 各行のビン番号（0〜n_bins-1）
+        values: 各行の値（Frequency など）
+        n_groups (int): 行数
+        n_bins (int): 列数
+
+    Returns:
+        np.ndarray: float の行列
+    """
+    mat = np.zeros((n_groups, n_bins), dtype=float)
+    np.add.at(mat, (np.asarray(group_ids, dtype=np.intp), np.asarray(bin_ids, dtype=np.intp)),
+              np.asarray(values, dtype=float))
+    return mat
+
+
+def smooth_series(y: np.ndarray, k: int = 3) -> np.ndarray:
+    """
+    移動平均で平滑化（端は反射padding）
+
+    2次元の場合は各行（グループ）を独立に平滑化する。
+    窓内の項を左から順に足すため、np.convolve(ypad, ones(k) / k, "valid") と同じ値になる
+    （同値のピークの扱いが従来の1系列ずつの計算と変わらない）。
+    """
+    y = np.asarray(y, dtype=float)
+    if k <= 1 or y.shape[-1] == 0:
+        return y
+    pad = k // 2
+    width = [(0, 0)] * (y.ndim - 1) + [(pad, pad)]
+    ypad = np.pad(y, width, mode="reflect")
+    ker = np.ones(k) / k
+    n = ypad.shape[-1] - k + 1
+    out = np.zeros(ypad.shape[:-1] + (n,))
+    for j in range(k):
+        out += ypad[..., j:j + n] * ker[j]
+    return out
+
+
+def _sparse_tables(y: np.ndarray):
+    """各行の長さ 2^k の窓の最大値・最小値表（(levels × rows × bins)、範囲外は ±inf）"""
+    n_rows, n_bins = y.shape
+    levels = max(1, int(np.log2(n_bins)) + 1)
+    tmax = np.full((levels, n_rows, n_bins), np.inf)
+    tmin = np.full((levels, n_rows, n_bins), np.inf)
+    tmax[0], tmin[0] = y, y
+    for k in range(1, levels):
+        half, width = 1 << (k - 1), n_bins - (1 << k) + 1
+        tmax[k, :, :width] = np.maximum(tmax[k - 1, :, :width], tmax[k - 1, :, half:half + width])
+        tmin[k, :, :width] = np.minimum(tmin[k - 1, :, :width], tmin[k - 1, :, half:half + width])
+    return tmax, tmin
+
+
+def peak_prominences(y: np.ndarray, peaks: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    各位置のプロミネンス（scipy.signal.peak_prominences と同じ定義）を行ごとにまとめて計算
+
+    左右それぞれ自分より高い点（なければ端）の手前までを探索し、その区間の最小値のうち
+    高い方を基準として、基準からの高さをプロミネンスとする。
+    探索範囲は区間最大値の表を使った二分探索（倍々に伸ばす）で全候補を同時に求める。
+
+    Args:
+        y (np.ndarray): (n_rows × n_bins) の行列（1次元なら1行として扱う）
+        peaks (np.ndarray, optional): 計算する位置のマスク（y と同じ形、それ以外は 0）
+
+    Returns:
+        np.ndarray: y と同じ形のプロミネンス
+    """
+    y = np.asarray(y, dtype=float)
+    if y.ndim == 1:
+        return peak_prominences(y[None, :], None if peaks is None else np.asarray(peaks)[None, :])[0]
+    prom = np.zeros_like(y)
+    if y.shape[1] == 0:
+        return prom
+    mask = np.ones(y.shape, dtype=bool) if peaks is None else np.asarray(peaks, dtype=bool)
+    rows, pos = np.nonzero(mask)
+    if len(rows) == 0:
+        return prom
+    tmax, tmin = _sparse_tables(y)
+    levels = tmax.shape[0]
+    height = y[rows, pos]
+
+    # 自分以下の値が続く範囲 [lo, hi] を大きい幅から順に伸ばして求める
+    lo, hi = pos.copy(), pos.copy()
+    for k in reversed(range(levels)):
+        w = 1 << k
+        j = lo - w
+        ok = j >= 0
+        ok &= tmax[k, rows, np.where(ok, j, 0)] <= height
+        lo = np.where(ok, j, lo)
+        j = hi + 1
+        ok = j < y.shape[1]
+        ok &= tmax[k, rows, np.where(ok, j, 0)] <= height
+        hi = np.where(ok, hi + w, hi)
+
+    def range_min(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        k = np.log2(b - a + 1).astype(np.int64)
+        return np.minimum(tmin[k, rows, a], tmin[k, rows, b - (1 << k) + 1])
+
+    prom[rows, pos] = height - np.maximum(range_min(lo, pos), range_min(pos, hi))
+    return prom
+
+
+def _top_k_by_value(values: np.ndarray, mask: np.ndarray, n_keep: int) -> List[List[int]]:
+    """mask の位置から値の大きい順（同値は位置の早い順）に行ごとに上位 n_keep を選ぶ（argpartition）"""
+    n_rows, n_bins = values.shape
+    key = np.where(mask, values, -np.inf)
+    if n_keep < n_bins:
+        # n_keep 番目に大きい値を閾値とし、閾値と同値のものは位置の早い順に残りの枠を埋める
+        kth = n_bins - n_keep
+        part = np.argpartition(key, kth, axis=1)[:, kth]
+        thresh = key[np.arange(n_rows), part][:, None]
+        above = key > thresh
+        tied = key == thresh
+        room = n_keep - above.sum(axis=1, keepdims=True)
+        mask = mask & (above | (tied & (np.cumsum(tied, axis=1) <= room)))
+    rows, cols = np.nonzero(mask)
+    # 選ばれた高々 n_keep 個/行 だけを (行, 値の降順, 位置の昇順) で並べる
+    order = np.lexsort((cols, -values[rows, cols], rows))
+    counts = np.bincount(rows, minlength=n_rows)
+    return [row.tolist() for row in np.split(cols[order], np.cumsum(counts)[:-1])]
+
+
+def _top_k_with_distance(values: np.ndarray, mask: np.ndarray, n_keep: int, min_distance: int) -> List[List[int]]:
+    """強いピークから順に採用し、採用したピークから min_distance 未満の候補を除外（全行を同時に処理）"""
+    n_rows, n_bins = values.shape
+    avail = mask.copy()
+    rows = np.arange(n_rows)
+    cols = np.arange(n_bins)
+    picks = np.full((n_rows, n_keep), -1, dtype=np.int64)
+    for k in range(n_keep):
+        idx = np.argmax(np.where(avail, values, -np.inf), axis=1)
+        valid = avail[rows, idx]
+        if not valid.any():
+            break
+        picks[valid, k] = idx[valid]
+        avail &= ~(valid[:, None] & (np.abs(cols - idx[:, None]) < min_distance))
+    return [row[row >= 0].tolist() for row in picks]
+
+
+def local_peaks(y: np.ndarray, n_keep: int = 3, prominence: Optional[float] = None,
+                min_distance: Optional[int] = None) -> Union[List[int], List[List[int]]]:
+    """
+    単純な局所最大（隣より大きい or 同等）を抽出して強い順に上位 n_keep
+
+    同じ強さのピークは位置の早い順。2次元の場合は行ごとのリストのリストを返す。
+
+    Args:
+        y (np.ndarray): 系列（1次元）または (groups × bins) の行列
+        n_keep (int): 行ごとに残すピーク数
+        prominence (float, optional): これ未満のプロミネンスのピークを除外
+        min_distance (int, optional): 採用するピーク同士の最小間隔（bin 数、強いピークを優先）
+
+    Returns:
+        list: ピーク位置のリスト（2次元なら行ごとのリスト）
+    """
+    y = np.asarray(y, dtype=float)
+    if y.ndim == 1:
+        return local_peaks(y[None, :], n_keep, prominence, min_distance)[0]
+    n_rows, n_bins = y.shape
+    if n_bins == 0 or n_keep <= 0:
+        return [[] for _ in range(n_rows)]
+    edge = np.full((n_rows, 1), -np.inf)
+    left = np.concatenate([edge, y[:, :-1]], axis=1)
+    right = np.concatenate([y[:, 1:], edge], axis=1)
+    is_peak = (y >= left) & (y >= right)
+    if prominence is not None and prominence > 0:
+        is_peak &= peak_prominences(y, is_peak) >= prominence
+    if min_distance is not None and min_distance > 1:
+        return _top_k_with_distance(y, is_peak, n_keep, int(min_distance))
+    return _top_k_by_value(y, is_peak, n_keep)
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+Stage Cache Utility
+
+パイプラインの各ステージの出力を内容アドレス（ハッシュ）で保存し、再実行時に再利用する
+- キー: ステージ名 + そのステージに効く引数 + 上流ステージのキー（入力ファイルはその内容のハッシュ）
+- 上流のキーを含めるため、引数を1つ変えるとそのステージと下流だけが再計算される
+- 保存は pickle（一時ファイル経由で原子的に配置）
+- 埋め込みモデルのような巨大オブジェクトは externals として保存対象から外し、読み込み時に差し戻す
+- プロセス内メモは直近 memo_size 件だけ（トピックモデル等をプロセス終了まで抱えない）
+- ディスク上のチェックポイントは max_bytes を超えたら最も長く使われていないものから削除
+"""
+
+import os
+import io
+import json
+import pickle
+import hashlib
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+# パイプラインのステージ（上流 → 下流）
+STAGES = ("clean", "embed", "topic", "timeseries", "events", "match", "similarity", "report")
+
+_FILE_DIGESTS: Dict[Tuple[str, int, int], str] = {}
+
+
+def file_digest(path: str) -> str:
+    """ファイル内容の SHA-1（パス・サイズ・更新時刻が同じなら再計算しない）"""
+    st = os.stat(path)
+    memo_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    digest = _FILE_DIGESTS.get(memo_key)
+    if digest is None:
+        h = hashlib.sha1()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        digest = h.hexdigest()
+        _FILE_DIGESTS[memo_key] = digest
+    return digest
+
+
+def stage_key(stage: str, params: Dict[str, Any], parents: Sequence[str] = ()) -> str:
+    """
+    ステージ出力のキーを計算
+
+    Args:
+        stage (str): ステージ名
+        params (dict): このステージの出力に影響する引数（JSON化できる値）
+        parents: 上流ステージのキー（順序も区別する）
+
+    Returns:
+        str: SHA-1 の16進文字列
+    """
+    payload = json.dumps({"stage": stage, "params": params, "parents": list(parents)},
+                         sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class _Pickler(pickle.Pickler):
+    """externals に含まれるオブジェクトを名前で置き換えて保存"""
+
+    def __init__(self, f, externals: Dict[str, Any]):
+        super().__init__(f, protocol=pickle.HIGHEST_PROTOCOL)
+        self._ids = {id(obj): name for name, obj in externals.items() if obj is not None}
+
+    def persistent_id(self, obj):
+        return self._ids.get(id(obj))
+
+
+class _Unpickler(pickle.Unpickler):
+    """保存時に名前へ置き換えたオブジェクトを externals から差し戻す"""
+
+    def __init__(self, f, externals: Dict[str, Any]):
+        super().__init__(f)
+        self._externals = externals
+
+    def persistent_load(self, pid):
+        if pid not in self._externals:
+            raise pickle.UnpicklingError(f"missing external object: {pid}")
+        return self._externals[pid]
+
+
+class StageCache:
+    """ステージ出力のチェックポイント（ディスク + プロセス内メモ）"""
+
+    def __init__(self, cache_dir: str = './cache/stages', enabled: bool = True, memo_size: int = 4,
+                 max_bytes: Optional[int] = None):
+        """
+        Args:
+            cache_dir (str): 保存先ディレクトリ（ステージごとにサブディレクトリ）
+            enabled (bool): False なら常に再計算し、何も保存しない
+            memo_size (int): プロセス内に保持する出力の数（LRU、0 ならメモしない）
+            max_bytes (int): チェックポイントの合計サイズの上限 (None=無制限)
+                超えたら最も長く使われていないチェックポイントから削除（起動時と保存のたびに確認）
+        """
+        self.cache_dir = cache_dir
+        self.enabled = enabled
+        self.memo_size = memo_size
+        self.max_bytes = max_bytes
+        # (ステージ, キー) -> 出力（使用順に並べたLRU）
+        self._memo: OrderedDict = OrderedDict()
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+        if enabled:
+            os.makedirs(cache_dir, exist_ok=True)
+            if max_bytes is not None:
+                self.prune(max_bytes)
+
+    def path(self, stage: str, key: str) -> str:
+        return os.path.join(self.cache_dir, stage, f"{key}.pkl")
+
+    def _remember(self, stage: str, key: str, obj: Any):
+        if self.memo_size <= 0:
+            return
+        self._memo[(stage, key)] = obj
+        self._memo.move_to_end((stage, key))
+        while len(self._memo) > self.memo_size:
+            self._memo.popitem(last=False)
+
+    def load(self, stage: str, key: str, externals: Optional[Dict[str, Any]] = None) -> Tuple[bool, Any]:
+        """
+        保存済みの出力を読み込む
+
+        Returns:
+            tuple: (見つかったか, 出力)
+        """
+        if (stage, key) in self._memo:
+            self._memo.move_to_end((stage, key))
+            return True, self._memo[(stage, key)]
+        path = self.path(stage, key)
+        if not os.path.exists(path):
+            return False, None
+        try:
+            with open(path, "rb") as f:
+                obj = _Unpickler(f, externals or {}).load()
+            # 使用時刻を更新（prune は更新時刻の古い順に削除）
+            os.utime(path)
+        except Exception as e:
+            print(f"[Stage Cache] Ignoring broken checkpoint {stage}/{key[:12]}: {e}")
+            return False, None
+        self._remember(stage, key, obj)
+        return True, obj
+
+    def save(self, stage: str, key: str, obj: Any, externals: Optional[Dict[str, Any]] = None):
+        """出力を保存（一時ファイルに書いてから置き換え）"""
+        self._remember(stage, key, obj)
+        path = self.path(stage, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        buf = io.BytesIO()
+        _Pickler(buf, externals or {}).dump(obj)
+        tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(buf.getvalue())
+        os.replace(tmp, path)
+        if self.max_bytes is not None:
+            self.prune(self.max_bytes)
+
+    def prune(self, max_bytes: int) -> int:
+        """
+        チェックポイントの合計サイズが max_bytes 以下になるまで、最も長く使われていないものから削除
+
+        Returns:
+            int: 削除したチェックポイント数
+        """
+        entries = []
+        for root, _dirs, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".pkl"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        if removed:
+            print(f"[Stage Cache] Pruned {removed} checkpoints (max {max_bytes / 2**30:.1f} GB)")
+        return removed
+
+    def run(self, stage: str, params: Dict[str, Any], compute: Callable[[], Any],
+            parents: Sequence[str] = (), externals: Optional[Dict[str, Any]] = None) -> Tuple[str, Any]:
+        """
+        ステージを実行（保存済みなら読み込み、なければ compute() を実行して保存）
+
+        Args:
+            stage (str): ステージ名
+            params (dict): このステージに効く引数
+            compute (callable): 出力を計算する関数（引数なし）
+            parents: 上流ステージのキー
+            externals (dict): 保存対象から外すオブジェクト {名前: オブジェクト}
+
+        Returns:
+            tuple: (このステージのキー, 出力)
+        """
+        key = stage_key(stage, params, parents)
+        if self.enabled:
+            found, obj = self.load(stage, key, externals)
+            if found:
+                self.hits[stage] = self.hits.get(stage, 0) + 1
+                return key, obj
+        self.misses[stage] = self.misses.get(stage, 0) + 1
+        obj = compute()
+        if self.enabled:
+            self.save(stage, key, obj, externals)
+        return key, obj
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        """ステージごとのヒット/再計算回数"""
+        return {stage: {'hits': self.hits.get(stage, 0), 'misses': self.misses.get(stage, 0)}
+                for stage in STAGES if stage in self.hits or stage in self.misses}
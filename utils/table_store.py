@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+Table Store Utility
+
+パイプラインの中間・最終テーブル（イベント比較結果、類似イベント、ペア、時系列など）を
+列指向フォーマット（Parquet）で保存し、必要な列だけを読み込む
+- 保存は常に従来の CSV（utf-8-sig）を書き、pyarrow / fastparquet があれば同名の .parquet も書く
+- 読み込みは .parquet が CSV より新しければそれを使い、なければ CSV を usecols 付きで読む
+- columns を指定すると存在する列だけを読み込む（存在しない列は無視）
+- インデックスは通常の列として保存する（CSV / Parquet のどちらから読んでも同じテーブルになる）
+"""
+
+import os
+from typing import List, Optional, Sequence
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    import pyarrow.parquet as pq
+    PARQUET_ENGINE = "pyarrow"
+except ImportError:
+    pq = None
+    try:
+        import fastparquet  # noqa: F401
+        PARQUET_ENGINE = "fastparquet"
+    except ImportError:
+        PARQUET_ENGINE = None
+
+PARQUET_AVAILABLE = PARQUET_ENGINE is not None
+
+
+def table_paths(path: str):
+    """
+    テーブルの CSV / Parquet パスを返す
+
+    Args:
+        path (str): 拡張子付き（.csv / .parquet）または拡張子なしのパス
+
+    Returns:
+        tuple: (csv_path, parquet_path)
+    """
+    stem, ext = os.path.splitext(path)
+    if ext.lower() not in (".csv", ".parquet"):
+        stem = path
+    return f"{stem}.csv", f"{stem}.parquet"
+
+
+def to_columnar(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Parquet に書けるよう object 列の型を揃える
+
+    - 空文字と数値が混在する列（未検出イベントの行など）は空文字を NaN にして数値列へ
+    - それ以外の文字列以外の値（リストなど）は str に変換（CSV に書いた場合と同じ表記）
+    - 列名は文字列に変換
+    """
+    out = df.copy()
+    out.columns = [str(c) for c in out.columns]
+    for col in out.columns:
+        s = out[col]
+        if s.dtype != object:
+            continue
+        filled = s[s.notna() & (s != "")]
+        if len(filled) and filled.map(lambda v: isinstance(v, (int, float)) and not isinstance(v, bool)).all():
+            out[col] = pd.to_numeric(s.replace("", None), errors="coerce")
+        elif not filled.map(lambda v: isinstance(v, str)).all():
+            out[col] = s.map(lambda v: v if v is None or isinstance(v, str) or v != v else str(v))
+    return out
+
+
+def save_table(df: pd.DataFrame, path: str, index: bool = False) -> List[str]:
+    """
+    テーブルを CSV（+ 可能なら Parquet）で保存
+
+    Args:
+        df (DataFrame): 保存するテーブル
+        path (str): 保存先（拡張子は .csv / .parquet / なし のいずれでもよい）
+        index (bool): インデックスも保存するか（名前のない場合は "index" 列として保存）
+
+    Returns:
+        List[str]: 書き出したファイルのパス
+    """
+    csv_path, parquet_path = table_paths(path)
+    os.makedirs(os.path.dirname(csv_path) or ".", exist_ok=True)
+    # Parquet はインデックスを復元し CSV は "Unnamed: 0" 列になるので、どちらも通常の列にそろえる
+    if index:
+        df = df.reset_index()
+    df.to_csv(csv_path, index=False, encoding="utf-8-sig")
+    written = [csv_path]
+    if PARQUET_AVAILABLE:
+        try:
+            to_columnar(df).to_parquet(parquet_path, engine=PARQUET_ENGINE, index=False)
+            written.append(parquet_path)
+        except Exception as e:
+            print(f"[Table Store] Parquet write failed for {os.path.basename(parquet_path)}: {e}")
+    return written
+
+
+def _parquet_is_fresh(csv_path: str, parquet_path: str) -> bool:
+    if not (PARQUET_AVAILABLE and os.path.exists(parquet_path)):
+        return False
+    # CSV だけが後から更新された場合は CSV を優先
+    return not os.path.exists(csv_path) or os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path)
+
+
+def table_columns(path: str) -> List[str]:
+    """テーブルの列名だけを読む（データ本体は読まない）"""
+    csv_path, parquet_path = table_paths(path)
+    if _parquet_is_fresh(csv_path, parquet_path):
+        if pq is not None:
+            return [c for c in pq.read_schema(parquet_path).names if not c.startswith("__index_level_")]
+        return list(pd.read_parquet(parquet_path, engine=PARQUET_ENGINE).columns)
+    return list(pd.read_csv(csv_path, encoding="utf-8-sig", nrows=0).columns)
+
+
+def load_table(path: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    保存済みテーブルを読み込む（列の射影付き）
+
+    Args:
+        path (str): save_table に渡したパス（拡張子は問わない）
+        columns: 読み込む列（None なら全列、存在しない列は無視）
+
+    Returns:
+        DataFrame: columns の順に並んだテーブル
+    """
+    csv_path, parquet_path = table_paths(path)
+    use_parquet = _parquet_is_fresh(csv_path, parquet_path)
+    if not use_parquet and not os.path.exists(csv_path):
+        raise FileNotFoundError(csv_path)
+    if columns is not None:
+        available = set(table_columns(path))
+        columns = [c for c in columns if c in available]
+    if use_parquet:
+        return pd.read_parquet(parquet_path, engine=PARQUET_ENGINE, columns=columns)
+    df = pd.read_csv(csv_path, encoding="utf-8-sig", usecols=columns)
+    return df if columns is None else df[columns]
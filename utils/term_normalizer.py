@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Term Normalizer Utility
+
+用語正規化（normalize_term / normalize_with_synonyms）を高速に行う
+- 正規表現はモジュール読み込み時に1回だけコンパイル
+- 用語マッピング辞書と多言語類義語辞書を1つの参照テーブルに平坦化
+- 同じトークンの再正規化は LRU キャッシュで省略
+- normalize_many(words) で一括正規化
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Mapping
+
+# 特殊文字のみの単語（絵文字は呼び出し側で除外判定）
+SYMBOLS_ONLY_RE = re.compile(r'^[^\w\s]+$')
+# 3文字以上の繰り返しを2文字に（"goalllll" → "goall"）
+REPEAT_RE = re.compile(r'(.)\1{2,}')
+
+
+def _is_japanese_char(ch: str) -> bool:
+    """ひらがな・カタカナ・漢字か"""
+    cp = ord(ch)
+    return (0x3040 <= cp <= 0x309F or  # ひらがな
+            0x30A0 <= cp <= 0x30FF or  # カタカナ
+            0x4E00 <= cp <= 0x9FFF)    # 漢字
+
+
+def build_synonym_table(synonyms: Mapping[str, Iterable[str]]) -> Dict[str, str]:
+    """
+    {代表語: 類義語集合} を {類義語: 代表語} に平坦化
+
+    複数の代表語に属する語は、辞書順で最初の代表語を採用する
+    （従来の線形探索と同じ結果）。
+    """
+    table: Dict[str, str] = {}
+    for canonical, words in synonyms.items():
+        for w in words:
+            table.setdefault(w, canonical)
+    return table
+
+
+class TermNormalizer:
+    """事前コンパイル + 平坦化テーブル + LRU キャッシュによる用語正規化"""
+
+    def __init__(self, term_map: Mapping[str, str], synonyms: Mapping[str, Iterable[str]],
+                 cache_size: int = 200000):
+        """
+        Args:
+            term_map (dict): 用語マッピング辞書（各言語の表現 -> 共通語）
+            synonyms (dict): 多言語類義語辞書（代表語 -> 類義語集合）
+            cache_size (int): LRU キャッシュの最大エントリ数
+        """
+        self.synonym_table = build_synonym_table(synonyms)
+        # 用語マッピング → 類義語統一 の2段階を1回の参照にまとめる
+        self.lookup: Dict[str, str] = dict(self.synonym_table)
+        for src, dst in term_map.items():
+            self.lookup[src] = self.synonym(dst)
+        self.cache_size = cache_size
+        self._cached = lru_cache(maxsize=cache_size)(self._normalize)
+
+    def synonym(self, word: str) -> str:
+        """類義語を代表語に変換（辞書にない場合は小文字化・前後空白除去のみ）"""
+        word_lower = word.lower().strip()
+        return self.synonym_table.get(word_lower, word_lower)
+
+    def _normalize(self, word: str) -> str:
+        # 小文字化
+        w = word.lower().strip()
+        if not w:
+            return ""
+
+        # 数字のみの単語を除外
+        if w.isdigit():
+            return ""
+
+        # 特殊文字のみの単語を除外（絵文字は除く）
+        if SYMBOLS_ONLY_RE.match(w) and not any(ord(c) > 0x1F600 for c in w):
+            return ""
+
+        # 繰り返し文字の正規化
+        w = REPEAT_RE.sub(r'\1\1', w)
+
+        # 最小長フィルタ（1文字の単語を除外、ただし日本語は除く）
+        if len(w) == 1 and not _is_japanese_char(w):
+            return ""
+
+        # 用語マッピング + 多言語類義語の統一（w は小文字化・前後空白除去済み）
+        w = self.lookup.get(w, w)
+
+        # 最終的に短すぎる場合は除外
+        if len(w) < 2 and not any(0x3040 <= ord(c) <= 0x9FFF for c in w):
+            return ""
+        return w
+
+    def normalize(self, word: str) -> str:
+        """1語を正規化（非文字列はそのまま返す）"""
+        if not isinstance(word, str):
+            return word
+        return self._cached(word)
+
+    __call__ = normalize
+
+    def normalize_many(self, words: Iterable[str]) -> List[str]:
+        """
+        複数語を一括正規化
+
+        Args:
+            words: 単語の列
+
+        Returns:
+            List[str]: words と同じ順の正規化結果
+        """
+        cached = self._cached
+        return [cached(w) if isinstance(w, str) else w for w in words]
+
+    def get_stats(self) -> Dict:
+        """キャッシュ統計を取得"""
+        info = self._cached.cache_info()
+        total = info.hits + info.misses
+        return {
+            'lookup_entries': len(self.lookup),
+            'cache_entries': info.currsize,
+            'hits': info.hits,
+            'misses': info.misses,
+            'hit_ratio': info.hits / total if total > 0 else 0.0,
+        }
+
+    def clear_cache(self):
+        self._cached.cache_clear()
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Time Bin Utility
+
+相対時間ビンへの割り当てをベクトル化して行う
+- ビン境界に対する np.searchsorted で O(rows log bins) の割り当て
+- (group_id, bin_id) -> 行インデックスの転置インデックスでイベント行を O(k) で取得
+- トピック割り当て済みの行から (トピック, ビン) ごとの件数を直接集計（BERTopic.topics_over_time の代替）
+"""
+
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def build_relative_time_bins(timestamps: pd.Series, nr_bins: int) -> pd.IntervalIndex:
+    """最小〜最大時刻を nr_bins 等分した左閉区間のビンを作成"""
+    tmin, tmax = timestamps.min(), timestamps.max()
+    edges = pd.date_range(start=tmin, end=tmax, periods=nr_bins + 1)
+    return pd.IntervalIndex.from_breaks(edges, closed="left")
+
+
+def _to_ns(values) -> np.ndarray:
+    """Timestamp 列を int64 ナノ秒配列に変換"""
+    return pd.DatetimeIndex(pd.to_datetime(values)).asi8.astype(np.int64)
+
+
+def assign_time_bins(timestamps, bins: pd.IntervalIndex) -> np.ndarray:
+    """
+    各タイムスタンプのビン番号を求める
+
+    [left, right) に含まれるビンを返し、どのビンにも入らない時刻
+    （最終ビンの右端など）はビン左端が最も近いビンに割り当てる。
+
+    Args:
+        timestamps: タイムスタンプ列（Series / list / DatetimeIndex）
+        bins (pd.IntervalIndex): build_relative_time_bins で作成したビン
+
+    Returns:
+        np.ndarray: int64 のビン番号配列
+    """
+    ts = _to_ns(timestamps)
+    n_bins = len(bins)
+    if n_bins == 0 or len(ts) == 0:
+        return np.zeros(len(ts), dtype=np.int64)
+
+    lefts = bins.left.asi8.astype(np.int64)
+    rights = bins.right.asi8.astype(np.int64)
+
+    # left <= ts となる最後のビン
+    idx = np.searchsorted(lefts, ts, side="right") - 1
+    valid = idx >= 0
+    valid &= ts < rights[np.clip(idx, 0, n_bins - 1)]
+
+    out = np.empty(len(ts), dtype=np.int64)
+    out[valid] = idx[valid]
+
+    # 範囲外は左端が最も近いビン（同距離なら若い番号）
+    if not valid.all():
+        rest = ts[~valid]
+        out[~valid] = np.argmin(np.abs(lefts[None, :] - rest[:, None]), axis=1)
+    return out
+
+
+def topic_bin_counts(topics: Sequence[int], timestamps, nr_bins: int) -> pd.DataFrame:
+    """
+    (トピック, 時間ビン) ごとのコメント数を集計
+
+    BERTopic.topics_over_time(nr_bins=...) と同じビン（pd.cut の等幅ビン、Timestamp はビン左端）・
+    同じ行順（Timestamp → Topic）で Topic / Frequency / Timestamp を返す。
+    ビンごとの c-TF-IDF（Words 列）は計算しないため、bin 数を変えてもモデルの再計算は不要。
+
+    Args:
+        topics: 各行のトピックID
+        timestamps: 各行のタイムスタンプ
+        nr_bins (int): ビン数
+
+    Returns:
+        DataFrame: 件数が1以上の (Topic, Timestamp) のみ
+    """
+    topics = np.asarray(topics, dtype=np.int64)
+    if len(topics) == 0:
+        return pd.DataFrame({"Topic": topics, "Frequency": topics,
+                             "Timestamp": pd.DatetimeIndex([])})
+    cats = pd.cut(pd.Series(pd.DatetimeIndex(pd.to_datetime(timestamps))), bins=nr_bins)
+    codes = cats.cat.codes.to_numpy().astype(np.int64)
+    ok = codes >= 0
+    uniq_topics, topic_idx = np.unique(topics[ok], return_inverse=True)
+    n_topics = max(len(uniq_topics), 1)
+    keys, counts = np.unique(codes[ok] * n_topics + topic_idx, return_counts=True)
+    return pd.DataFrame({
+        "Topic": uniq_topics[keys % n_topics],
+        "Frequency": counts.astype(np.int64),
+        "Timestamp": cats.cat.categories.left[keys // n_topics],
+    })
+
+
+class TimeBinIndex:
+    """(group_id, bin_id) -> 行インデックスの転置インデックス"""
+
+    def __init__(self, group_ids: np.ndarray, bin_ids: np.ndarray):
+        """
+        Args:
+            group_ids (np.ndarray): 各行のグループID（-1 は対象外）
+            bin_ids (np.ndarray): 各行のビン番号
+        """
+        group_ids = np.asarray(group_ids, dtype=np.int64)
+        bin_ids = np.asarray(bin_ids, dtype=np.int64)
+        rows = np.flatnonzero(group_ids >= 0)
+
+        # (group, bin, row) の順に並べて連続区間に分割
+        order = np.lexsort((rows, bin_ids[rows], group_ids[rows]))
+        rows = rows[order]
+        g = group_ids[rows]
+        b = bin_ids[rows]
+        if len(rows) > 0:
+            starts = np.flatnonzero(np.r_[True, (g[1:] != g[:-1]) | (b[1:] != b[:-1])])
+            ends = np.r_[starts[1:], len(rows)]
+        else:
+            starts = ends = np.zeros(0, dtype=np.int64)
+
+        self._rows = rows
+        self._slices: Dict[Tuple[int, int], Tuple[int, int]] = {
+            (int(g[s]), int(b[s])): (int(s), int(e)) for s, e in zip(starts, ends)
+        }
+
+    def rows(self, group_id: int, bin_id: int) -> np.ndarray:
+        """1つの (group_id, bin_id) に属する行（昇順）"""
+        se = self._slices.get((int(group_id), int(bin_id)))
+        if se is None:
+            return self._rows[:0]
+        return self._rows[se[0]:se[1]]
+
+    def rows_in_range(self, group_id: int, low: int, high: int) -> np.ndarray:
+        """low〜high（両端含む）のビンに属する行（元の行順）"""
+        parts = [self.rows(group_id, b) for b in range(int(low), int(high) + 1)]
+        parts = [p for p in parts if len(p) > 0]
+        if not parts:
+            return self._rows[:0]
+        return np.sort(np.concatenate(parts))
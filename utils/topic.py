@@ -49,9 +49,6 @@ rcParams["axes.unicode_minus"] = False
 print(f"[Matplotlib] Using font: {chosen_font or '<<not found - text may garble>>'}")
 
 # ===== そのほかライブラリ =====
-from langdetect import detect, DetectorFactory
-DetectorFactory.seed = 42
-
 from sentence_transformers import SentenceTransformer
 from bertopic import BERTopic
 from bertopic.representation import MaximalMarginalRelevance
@@ -60,6 +57,14 @@ from sklearn.metrics import silhouette_score
 from umap import UMAP
 from hdbscan import HDBSCAN
 
+# 埋め込みキャッシュ（リポジトリ直下を import パスに追加）
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.embedding_cache import EmbeddingCache
+from utils.language_id import get_language_identifier
+from utils import text_preprocess
+from utils.csv_reader import read_chat_csv
+
 from gensim.corpora import Dictionary
 from gensim.models.coherencemodel import CoherenceModel
 
@@ -78,6 +83,7 @@ os.makedirs(OUTPUT_DIR, exist_ok=True)
 # 多言語埋め込み
 EMB_NAME = "sentence-transformers/paraphrase-multilingual-mpnet-base-v2"
 embedding_model_global = SentenceTransformer(EMB_NAME)
+embedding_cache_global = EmbeddingCache(EMB_NAME, cache_dir=os.path.join("cache", "embeddings"))
 
 # BERTopic 下回り
 vectorizer_model = CountVectorizer(
@@ -112,22 +118,7 @@ seed_topic_list = [
 # ユーティリティ
 # =====================
 def preprocess_text(text: str) -> str:
-    if not isinstance(text, str):
-        return ""
-    text = re.sub(r"http\S+|www\.\S+", " ", text)
-    text = re.sub(r"@\w+", " ", text)
-    text = re.sub(r"#\w+", " ", text)
-    text = (text.replace("😂", " laugh ").replace("😭", " cry ")
-                 .replace("👏", " clap ").replace("🔥", " fire "))
-    text = re.sub(r"[^\w\s\u4E00-\u9FFF\u3040-\u30FF\uAC00-\uD7AF]", " ", text)
-    text = re.sub(r"\s+", " ", text).strip().lower()
-    return text
-
-def detect_lang_safe(text: str) -> str:
-    try:
-        return detect(text)
-    except Exception:
-        return "unk"
+    return text_preprocess.preprocess_text(text, segment=False)
 
 def parse_country_from_filename(path: str) -> str:
     name = os.path.basename(path)
@@ -138,15 +129,6 @@ def parse_country_from_filename(path: str) -> str:
         return "Japan"
     return "Unknown"
 
-def read_csv_any(path: str) -> pd.DataFrame:
-    encodings = ["utf-8", "utf-8-sig", "cp932", "iso-8859-1"]
-    for enc in encodings:
-        try:
-            return pd.read_csv(path, encoding=enc)
-        except Exception:
-            continue
-    return pd.read_csv(path, engine="python")
-
 # ------- トピック重複の自動統合（上位語Jaccard） -------
 def jaccard_set(a: set, b: set) -> float:
     if not a and not b:
@@ -364,9 +346,10 @@ def make_wordclouds_for_peaks(
 # =====================
 def process_one_csv(csv_file: str,
                     wc_top_k: int,
-                    wc_bin_pad: int):
+                    wc_bin_pad: int,
+                    workers: int = 1):
     try:
-        df = read_csv_any(csv_file)
+        df = read_chat_csv(csv_file)
         if df.empty or "message" not in df.columns:
             print(f"⚠️ スキップ: {csv_file}")
             return None
@@ -375,13 +358,14 @@ def process_one_csv(csv_file: str,
 
         # 前処理
         df = df.dropna(subset=["message"]).copy()
-        df["message_clean"] = df["message"].astype(str).apply(preprocess_text)
+        df["message_clean"] = text_preprocess.preprocess_texts(df["message"].astype(str), segment=False,
+                                                               workers=workers)
         df = df[df["message_clean"].str.len() > 0].copy()
         if df.empty:
             print(f"⚠️ 空データ: {csv_file}")
             return None
 
-        df["lang"] = df["message_clean"].apply(detect_lang_safe)
+        df["lang"] = get_language_identifier(seed=42).detect_many(df["message_clean"].tolist())
 
         # タイムスタンプ
         if "timestamp" in df.columns and not df["timestamp"].isnull().all():
@@ -397,9 +381,7 @@ def process_one_csv(csv_file: str,
             return None
 
         # ===== 埋め込み =====
-        emb = embedding_model_global.encode(
-            texts, batch_size=64, show_progress_bar=False, normalize_embeddings=True
-        )
+        emb = embedding_cache_global.encode(embedding_model_global, texts, batch_size=64)
 
         # ===== BERTopic =====
         topic_model = BERTopic(
@@ -537,10 +519,9 @@ def process_one_csv(csv_file: str,
         try:
             sil = (
                 silhouette_score(
-                    np.asarray(embedding_model_global.encode(
-                        df_valid["message_clean"].tolist(),
-                        batch_size=64, show_progress_bar=False, normalize_embeddings=True
-                    )),
+                    embedding_cache_global.encode(
+                        embedding_model_global, df_valid["message_clean"].tolist(), batch_size=64
+                    ),
                     np.array(topics_valid)
                 ) if len(set(topics_valid)) > 1 else float("nan")
             )
@@ -579,6 +560,8 @@ def main():
                         help="ワードクラウドを作成する上位グループ数（既定=10）")
     parser.add_argument("--wc-bin-pad", type=int, default=0,
                         help="ピークbinの前後に何binを含めるか（既定=0）")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="大きなCSVの前処理を並列化するプロセス数（既定=1）")
     args = parser.parse_args()
 
     if args.files:
@@ -598,7 +581,7 @@ def main():
         return
 
     for csv in csv_files:
-        process_one_csv(csv, wc_top_k=args.wc_top_k, wc_bin_pad=args.wc_bin_pad)
+        process_one_csv(csv, wc_top_k=args.wc_top_k, wc_bin_pad=args.wc_bin_pad, workers=args.workers)
 
 if __name__ == "__main__":
     import multiprocessing as mp
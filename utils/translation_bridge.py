@@ -12,9 +12,15 @@ Date: 2025-11-20
 from transformers import MarianMTModel, MarianTokenizer
 from langdetect import detect, DetectorFactory
 import torch
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
+from collections import defaultdict, OrderedDict
 import numpy as np
 import warnings
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.translation_memory import TranslationMemory, normalize_source_text
 
 # 言語検出の再現性確保
 DetectorFactory.seed = 42
@@ -24,26 +30,32 @@ warnings.filterwarnings('ignore')
 class TranslationBridge:
     """多言語翻訳ブリッジ - イベント間の言語バリアを解消"""
     
-    def __init__(self, cache_dir='./cache/translation', device=None):
+    def __init__(self, cache_dir='./cache/translation', device=None, memory_lru_size=10000,
+                 max_resident_models=None, preload=False, per_comment=False):
         """
         Args:
-            cache_dir (str): モデルキャッシュディレクトリ
+            cache_dir (str): モデルキャッシュディレクトリ（翻訳メモリもここに保存）
             device (str): 'cuda' or 'cpu' (None=自動検出)
+            memory_lru_size (int): 翻訳メモリのプロセス内LRUサイズ
+            max_resident_models (int): 同時にメモリへ載せるモデル数の上限 (None=無制限)
+                上限を超えると最も長く使われていないモデルを解放する
+            preload (bool): True なら全言語のモデルを起動時にロード（従来の動作）
+            per_comment (bool): True ならコメントごとに言語を判定して翻訳モデルを振り分ける
+                (False=先頭テキストの言語でバッチ全体を翻訳)
         """
         self.cache_dir = cache_dir
         self.device = device or ('cuda' if torch.cuda.is_available() else 'cpu')
-        self.models = {}
+        # 言語 -> モデル（使用順に並べたLRU）
+        self.models: OrderedDict = OrderedDict()
         self.tokenizers = {}
+        self.max_resident_models = max_resident_models
+        # ロードに失敗した言語（再試行しない）
+        self.failed_langs = set()
+        self.per_comment = per_comment
         
         # サポート言語 (主要7言語)
         self.supported_langs = ['ja', 'es', 'fr', 'de', 'zh', 'ko', 'pt']
-        
-        # 翻訳モデルのロード
-        self._load_translation_models()
-    
-    def _load_translation_models(self):
-        """Helsinki-NLP翻訳モデルを事前ロード"""
-        model_names = {
+        self.model_names = {
             'ja': 'Helsinki-NLP/opus-mt-ja-en',
             'es': 'Helsinki-NLP/opus-mt-es-en',
             'fr': 'Helsinki-NLP/opus-mt-fr-en',
@@ -53,36 +65,81 @@ class TranslationBridge:
             'pt': 'Helsinki-NLP/opus-mt-tc-big-pt-en',  # Portuguese to English
         }
         
+        # 翻訳メモリ: (モデル名, 正規化原文) -> 英訳
+        self.memory = TranslationMemory(
+            os.path.join(cache_dir, 'translation_memory.sqlite'),
+            lru_size=memory_lru_size
+        )
+        
+        # 翻訳モデルは初回使用時に言語ごとにロード（preload=True なら一括ロード）
+        if preload:
+            self._load_translation_models()
+    
+    def _load_translation_models(self):
+        """Helsinki-NLP翻訳モデルを事前ロード"""
         print(f"\n[Translation Bridge] Loading translation models on {self.device}...")
         
-        for lang, model_name in model_names.items():
-            try:
-                print(f"  Loading {lang} → en...", end=' ')
-                
-                # Tokenizer
-                self.tokenizers[lang] = MarianTokenizer.from_pretrained(
-                    model_name, 
-                    cache_dir=self.cache_dir
-                )
-                
-                # Model
-                model = MarianMTModel.from_pretrained(
-                    model_name, 
-                    cache_dir=self.cache_dir
-                )
-                model = model.to(self.device)
-                model.eval()  # Inference mode
-                
-                self.models[lang] = model
-                
-                print("✓")
-                
-            except Exception as e:
-                print(f"✗ ({e})")
-                # 失敗しても続行 (他の言語は使える)
+        for lang in self.model_names:
+            self._get_model(lang)
         
         print(f"[Translation Bridge] Ready with {len(self.models)} language pairs")
     
+    def _get_model(self, lang: str):
+        """
+        言語のモデルとトークナイザを取得（未ロードならロードし、LRU上限を超えたら古いものを解放）
+        
+        Args:
+            lang (str): ソース言語
+        
+        Returns:
+            tuple: (model, tokenizer)  ロードできない場合は (None, None)
+        """
+        if lang in self.models:
+            self.models.move_to_end(lang)
+            return self.models[lang], self.tokenizers[lang]
+        if lang not in self.model_names or lang in self.failed_langs:
+            return None, None
+        
+        model_name = self.model_names[lang]
+        try:
+            print(f"  [Translation Bridge] Loading {lang} → en on {self.device}...", end=' ')
+            
+            # Tokenizer
+            tokenizer = MarianTokenizer.from_pretrained(
+                model_name, 
+                cache_dir=self.cache_dir
+            )
+            
+            # Model
+            model = MarianMTModel.from_pretrained(
+                model_name, 
+                cache_dir=self.cache_dir
+            )
+            model = model.to(self.device)
+            model.eval()  # Inference mode
+            
+            print("✓")
+            
+        except Exception as e:
+            print(f"✗ ({e})")
+            # 失敗しても続行 (他の言語は使える)
+            self.failed_langs.add(lang)
+            return None, None
+        
+        self.models[lang] = model
+        self.tokenizers[lang] = tokenizer
+        
+        # 常駐モデル数の上限を超えたら最も古いモデルを解放
+        if self.max_resident_models is not None:
+            while len(self.models) > max(1, self.max_resident_models):
+                old_lang, _ = self.models.popitem(last=False)
+                self.tokenizers.pop(old_lang, None)
+                print(f"  [Translation Bridge] Unloaded {old_lang} → en (max_resident_models={self.max_resident_models})")
+                if self.device == 'cuda':
+                    torch.cuda.empty_cache()
+        
+        return model, tokenizer
+    
     def detect_language(self, text: str) -> str:
         """
         言語を自動検出
@@ -94,17 +151,49 @@ class TranslationBridge:
             str: 言語コード (ja, es, en, etc.)
         """
         try:
-            lang = detect(text)
-            return lang if lang in self.supported_langs else 'en'
+            return self._route_language(detect(text))
         except:
             # 検出失敗時は英語と仮定
             return 'en'
     
+    def _route_language(self, lang: str) -> str:
+        """言語コードを翻訳モデルの言語に対応付け（zh-cn → zh, 未サポートは en）"""
+        lang = str(lang).lower().split('-')[0]
+        return lang if lang in self.supported_langs else 'en'
+    
+    def route_languages(self, texts: List[str], langs: Optional[List[str]] = None) -> List[str]:
+        """
+        コメントごとの翻訳元言語を決定
+        
+        Args:
+            texts (List[str]): テキストのリスト
+            langs (List[str]): 既知の言語列（例: df_valid["lang"]）。'unk' や欠損は自動検出
+        
+        Returns:
+            List[str]: テキストと同じ順の言語コード
+        """
+        routed = []
+        for i, text in enumerate(texts):
+            lang = langs[i] if langs is not None and i < len(langs) else None
+            if isinstance(lang, str) and lang and lang != 'unk':
+                routed.append(self._route_language(lang))
+            else:
+                routed.append(self.detect_language(text))
+        return routed
+    
+    def _event_language(self, event: Dict) -> str:
+        """イベントの言語（'language' → 先頭コメントの既知の言語 'languages' → 先頭コメントの自動検出の順）"""
+        if event.get('language'):
+            return event['language']
+        return self.route_languages(event['comments'][:1], event.get('languages'))[0]
+    
     def translate_to_english(
         self, 
         texts: List[str], 
         src_lang: str = None,
-        batch_size: int = 32
+        batch_size: int = 32,
+        per_comment: Optional[bool] = None,
+        langs: Optional[List[str]] = None
     ) -> List[str]:
         """
         テキストを英語に翻訳
@@ -113,13 +202,31 @@ class TranslationBridge:
             texts (List[str]): 翻訳するテキストのリスト
             src_lang (str): ソース言語 (None=自動検出)
             batch_size (int): バッチサイズ
+            per_comment (bool): コメントごとに言語を判定するか (None=初期化時の設定)
+            langs (List[str]): コメントごとの既知の言語（指定時は per_comment として扱う）
         
         Returns:
-            List[str]: 翻訳されたテキストのリスト
+            List[str]: 翻訳されたテキストのリスト（入力と同じ順）
         """
         if not texts:
             return []
         
+        if per_comment is None:
+            per_comment = self.per_comment
+        
+        # コメントごとに言語を判定し、言語別バケットで翻訳して元の順序に戻す
+        if src_lang is None and (per_comment or langs is not None):
+            routed = self.route_languages(texts, langs)
+            buckets: Dict[str, List[int]] = defaultdict(list)
+            for i, lang in enumerate(routed):
+                buckets[lang].append(i)
+            translated = list(texts)
+            for lang, idxs in buckets.items():
+                bucket_out = self.translate_to_english([texts[i] for i in idxs], lang, batch_size)
+                for i, t in zip(idxs, bucket_out):
+                    translated[i] = t
+            return translated
+        
         # 言語検出 (最初のテキストで判断)
         if src_lang is None:
             src_lang = self.detect_language(texts[0])
@@ -129,13 +236,41 @@ class TranslationBridge:
             return texts
         
         # 未サポート言語
-        if src_lang not in self.models:
+        if src_lang not in self.model_names or src_lang in self.failed_langs:
             print(f"[Translation Warning] Unsupported language '{src_lang}', returning original texts")
             return texts
         
-        # 翻訳実行
-        model = self.models[src_lang]
-        tokenizer = self.tokenizers[src_lang]
+        # 翻訳メモリを参照し、未翻訳の原文だけをモデルに渡す
+        model_name = self.model_names[src_lang]
+        sources = [normalize_source_text(t) for t in texts]
+        known = self.memory.get_many(model_name, sources)
+        misses = [t for t in dict.fromkeys(sources) if t not in known]
+        if misses:
+            new_pairs = self._generate(src_lang, misses, batch_size)
+            self.memory.put_many(model_name, new_pairs)
+            known.update(new_pairs)
+        
+        # 翻訳に失敗した原文は元のテキストを返す
+        return [known.get(src, text) for src, text in zip(sources, texts)]
+    
+    def _generate(self, src_lang: str, texts: List[str], batch_size: int = 32) -> List[Tuple[str, str]]:
+        """
+        Marianモデルで翻訳を生成
+        
+        Args:
+            src_lang (str): ソース言語
+            texts (List[str]): 翻訳するテキストのリスト
+            batch_size (int): バッチサイズ
+        
+        Returns:
+            List[Tuple[str, str]]: 翻訳に成功した (原文, 訳文) のリスト
+        """
+        model, tokenizer = self._get_model(src_lang)
+        if model is None:
+            return []
+        
+        # 長さ順に並べてバッチ内のパディングを最小化（結果は原文キーで返すので順序は不問）
+        texts = sorted(texts, key=len)
         
         translated = []
         
@@ -160,12 +295,11 @@ class TranslationBridge:
                 
                 # デコード
                 batch_translated = tokenizer.batch_decode(outputs, skip_special_tokens=True)
-                translated.extend(batch_translated)
+                translated.extend(zip(batch, batch_translated))
                 
             except Exception as e:
                 print(f"[Translation Error] Batch {i//batch_size}: {e}")
-                # エラー時は元のテキストを返す
-                translated.extend(batch)
+                # エラー時は翻訳メモリに保存しない（呼び出し側で元のテキストを返す）
         
         return translated
     
@@ -177,17 +311,23 @@ class TranslationBridge:
             event (dict): {
                 'comments': List[str],
                 'topics': List[str],
-                'language': str (optional)
+                'language': str (optional),
+                'languages': List[str] (optional, コメントごとの言語)
             }
         
         Returns:
             dict: 翻訳されたイベント辞書
         """
         # 言語検出
-        lang = event.get('language') or self.detect_language(event['comments'][0])
+        lang = self._event_language(event)
         
-        # コメント翻訳
-        translated_comments = self.translate_to_english(event['comments'], lang)
+        # コメント翻訳（コメント単位の言語列があればコメントごとに振り分け）
+        if self.per_comment or event.get('languages') is not None:
+            translated_comments = self.translate_to_english(
+                event['comments'], per_comment=True, langs=event.get('languages')
+            )
+        else:
+            translated_comments = self.translate_to_english(event['comments'], lang)
         
         # トピック翻訳
         translated_topics = self.translate_to_english(event['topics'], lang)
@@ -243,6 +383,108 @@ class TranslationBridge:
         
         return float(similarity), details
     
+    def prepare_event_translations(
+        self,
+        events: List[Dict],
+        bert_model,
+        batch_size: int = 32
+    ) -> List[Optional[Dict]]:
+        """
+        イベント群を言語ごとに一括翻訳し、翻訳後の埋め込みを付与（ペア比較の前処理）
+        
+        各イベントの翻訳・エンコードは1回だけ行われ、ペアごとの類似度は
+        prepared_similarity で内積として計算できる。
+        
+        Args:
+            events (List[Dict]): イベントリスト（'comments', 'topics', 'language', 'languages' (optional)）
+            bert_model: SentenceTransformer モデル
+            batch_size (int): 翻訳のバッチサイズ
+        
+        Returns:
+            List[Optional[Dict]]: 翻訳済みイベント（'embedding' は単位長の平均ベクトル）
+                コメントがないイベントは None
+        """
+        # 言語検出（translate_event と同じく先頭コメントで判断）
+        langs: List[Optional[str]] = []
+        for event in events:
+            if not event.get('comments'):
+                langs.append(None)
+                continue
+            langs.append(self._event_language(event))
+        
+        # テキストごとの翻訳元言語（per_comment 時はコメント単位、それ以外はイベント単位）
+        comment_langs: List[List[str]] = []
+        topic_langs: List[List[str]] = []
+        for event, lang in zip(events, langs):
+            topics = event.get('topics', [])
+            if lang is None:
+                comment_langs.append([]); topic_langs.append([])
+            elif self.per_comment or event.get('languages') is not None:
+                comment_langs.append(self.route_languages(event['comments'], event.get('languages')))
+                topic_langs.append([lang] * len(topics))
+            else:
+                comment_langs.append([lang] * len(event['comments']))
+                topic_langs.append([lang] * len(topics))
+        
+        # ソース言語ごとにユニークテキストをまとめて翻訳
+        texts_by_lang: Dict[str, List[str]] = defaultdict(list)
+        for event, c_langs, t_langs in zip(events, comment_langs, topic_langs):
+            for t, l in zip(event.get('comments', []), c_langs):
+                texts_by_lang[l].append(t)
+            for t, l in zip(event.get('topics', []), t_langs):
+                texts_by_lang[l].append(t)
+        translations: Dict[Tuple[str, str], str] = {}
+        for lang, texts in texts_by_lang.items():
+            unique = list(dict.fromkeys(texts))
+            for src, dst in zip(unique, self.translate_to_english(unique, lang, batch_size)):
+                translations[(lang, src)] = dst
+        
+        prepared: List[Optional[Dict]] = []
+        for event, lang, c_langs, t_langs in zip(events, langs, comment_langs, topic_langs):
+            if lang is None:
+                prepared.append(None)
+                continue
+            prepared.append({
+                'comments': [translations[(l, t)] for t, l in zip(event['comments'], c_langs)],
+                'topics': [translations[(l, t)] for t, l in zip(event.get('topics', []), t_langs)],
+                'original_language': lang,
+                'translated': lang != 'en'
+            })
+        
+        # 翻訳後コメントをまとめて1回でエンコード
+        unique_en = list(dict.fromkeys(c for p in prepared if p is not None for c in p['comments']))
+        if unique_en:
+            emb = np.asarray(bert_model.encode(unique_en, show_progress_bar=False))
+            row_of = {t: i for i, t in enumerate(unique_en)}
+            for p in prepared:
+                if p is None:
+                    continue
+                vec = emb[[row_of[c] for c in p['comments']]].mean(axis=0)
+                p['embedding'] = vec / (np.linalg.norm(vec) + 1e-12)
+        
+        return prepared
+    
+    def prepared_similarity(self, event_A_en: Dict, event_B_en: Dict) -> Tuple[float, Dict]:
+        """
+        prepare_event_translations 済みイベント間の類似度（get_cross_lingual_similarity と同じ形式）
+        
+        Args:
+            event_A_en (dict): 翻訳済みイベントA
+            event_B_en (dict): 翻訳済みイベントB
+        
+        Returns:
+            tuple: (類似度スコア, 詳細情報)
+        """
+        similarity = float(np.dot(event_A_en['embedding'], event_B_en['embedding']))
+        details = {
+            'lang_A': event_A_en['original_language'],
+            'lang_B': event_B_en['original_language'],
+            'translated_A': event_A_en['translated'],
+            'translated_B': event_B_en['translated'],
+            'cross_lingual': event_A_en['original_language'] != event_B_en['original_language']
+        }
+        return similarity, details
+    
     def batch_translate_events(self, events: List[Dict]) -> List[Dict]:
         """
         複数イベントを一括翻訳
@@ -263,16 +505,17 @@ class TranslationBridge:
         print()  # 改行
         return translated_events
     
-    def get_translation_stats(self, events: List[Dict]) -> Dict:
+    def get_translation_stats(self, events: Optional[List[Dict]] = None) -> Dict:
         """
         翻訳統計情報を取得
         
         Args:
-            events (List[Dict]): イベントリスト
+            events (List[Dict]): イベントリスト (None=翻訳メモリの統計のみ)
         
         Returns:
             dict: 統計情報
         """
+        events = events or []
         lang_counts = {}
         
         for event in events:
@@ -283,7 +526,8 @@ class TranslationBridge:
             'total_events': len(events),
             'language_distribution': lang_counts,
             'translation_required': sum(1 for e in events 
-                                        if self.detect_language(e['comments'][0]) != 'en')
+                                        if self.detect_language(e['comments'][0]) != 'en'),
+            'memory': self.memory.get_stats()
         }
 
 
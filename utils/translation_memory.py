@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+Translation Memory Utility
+
+翻訳結果を SQLite に永続化し、同じ原文の再翻訳を省略する
+- キー: (翻訳モデル名, 正規化した原文)
+- 手前にプロセス内 LRU を置き、ディスクアクセスも最小化
+- チャットは "gol" / "ゴール" / "allez" のような重複が非常に多いため効果が大きい
+"""
+
+import os
+import sqlite3
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Tuple
+
+
+def normalize_source_text(text: str) -> str:
+    """翻訳メモリのキー用に原文を正規化（NFC + 前後空白除去）"""
+    if not isinstance(text, str):
+        text = "" if text is None else str(text)
+    return unicodedata.normalize("NFC", text).strip()
+
+
+class TranslationMemory:
+    """SQLite + LRU の二段構成の翻訳メモリ"""
+
+    def __init__(self, db_path: str, lru_size: int = 10000):
+        """
+        Args:
+            db_path (str): SQLite ファイルのパス
+            lru_size (int): プロセス内 LRU の最大エントリ数（0 で無効）
+        """
+        self.db_path = db_path
+        self.lru_size = lru_size
+        self._lru: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            " model TEXT NOT NULL, src TEXT NOT NULL, dst TEXT NOT NULL,"
+            " PRIMARY KEY (model, src))"
+        )
+        self._conn.commit()
+
+        self.lru_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _lru_put(self, key: Tuple[str, str], value: str):
+        if self.lru_size <= 0:
+            return
+        self._lru[key] = value
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def get_many(self, model: str, texts: Iterable[str]) -> Dict[str, str]:
+        """
+        翻訳済みの原文を一括取得
+
+        Args:
+            model (str): 翻訳モデル名
+            texts: 正規化済みの原文
+
+        Returns:
+            dict: {原文: 訳文}（見つかったものだけ）
+        """
+        found: Dict[str, str] = {}
+        pending: List[str] = []
+        for t in dict.fromkeys(texts):
+            key = (model, t)
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                found[t] = self._lru[key]
+                self.lru_hits += 1
+            else:
+                pending.append(t)
+
+        # SQLite の変数上限を避けるため分割して問い合わせ
+        for i in range(0, len(pending), 500):
+            chunk = pending[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT src, dst FROM translations WHERE model = ? AND src IN ({placeholders})",
+                [model] + chunk,
+            ).fetchall()
+            for src, dst in rows:
+                found[src] = dst
+                self._lru_put((model, src), dst)
+                self.disk_hits += 1
+
+        self.misses += len(pending) - sum(1 for t in pending if t in found)
+        return found
+
+    def put_many(self, model: str, pairs: Iterable[Tuple[str, str]]):
+        """
+        翻訳結果を保存
+
+        Args:
+            model (str): 翻訳モデル名
+            pairs: (正規化済み原文, 訳文) のペア
+        """
+        pairs = list(pairs)
+        if not pairs:
+            return
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO translations (model, src, dst) VALUES (?, ?, ?)",
+            [(model, src, dst) for src, dst in pairs],
+        )
+        self._conn.commit()
+        for src, dst in pairs:
+            self._lru_put((model, src), dst)
+
+    def __len__(self) -> int:
+        return int(self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0])
+
+    def get_stats(self) -> Dict:
+        """ヒット/ミス統計を取得"""
+        hits = self.lru_hits + self.disk_hits
+        total = hits + self.misses
+        return {
+            'entries': len(self),
+            'hits': hits,
+            'lru_hits': self.lru_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_ratio': hits / total if total > 0 else 0.0,
+        }
+
+    def close(self):
+        self._conn.close()
@@ -20,6 +20,14 @@ os.makedirs(SAVE_DIR, exist_ok=True)
 def sanitize_filename(text):
     return re.sub(r'[\\/*?:"<>|]', "_", text)
 
+def rotate_chat_log(file_name):
+    """収集開始時に同名の既存ログを退避（前回の配信に追記して1本の配信として扱われないように）"""
+    if os.path.exists(file_name):
+        stamp = datetime.fromtimestamp(os.path.getmtime(file_name)).strftime("%Y%m%d_%H%M%S")
+        rotated = file_name.replace(".csv", f"_{stamp}.csv")
+        os.replace(file_name, rotated)
+        print(f"📦 既存のログを退避しました: {rotated}")
+
 # === user_id を自動取得 ===
 async def get_user_id(channel_name):
     url = f'https://api.twitch.tv/helix/users?login={channel_name}'
@@ -45,6 +53,8 @@ class ChatCollector(commands.Bot):
         self.twitch_user_id = twitch_user_id  # ← 変数名を変更
         self.chat_data = []
         self.loop_running = True
+        self.file_name = f"{SAVE_DIR}/{sanitize_filename(channel_name)}_chat_log.csv"
+        rotate_chat_log(self.file_name)
 
     async def event_ready(self):
         print(f"✅ 接続完了: {self.channel_name}")
@@ -60,12 +70,19 @@ class ChatCollector(commands.Bot):
             'message': message.content
         })
 
+    def flush(self):
+        """溜まったコメントをCSVに追記してメモリから消す（配信中に event_comparison.py --live が読めるように）"""
+        file_name = self.file_name
+        if self.chat_data:
+            rows, self.chat_data = self.chat_data, []
+            df = pd.DataFrame(rows, columns=['timestamp', 'author', 'author_id', 'message'])
+            df["timestamp"] = pd.to_datetime(df["timestamp"])
+            df.to_csv(file_name, mode="a", header=not os.path.exists(file_name), index=False)
+        return file_name
+
     async def save_and_close(self):
         self.loop_running = False
-        df = pd.DataFrame(self.chat_data)
-        df["timestamp"] = pd.to_datetime(df["timestamp"])
-        file_name = f"{SAVE_DIR}/{sanitize_filename(self.channel_name)}_chat_log.csv"
-        df.to_csv(file_name, index=False)
+        file_name = self.flush()
         print(f"💾 {self.channel_name} のチャットを保存しました: {file_name}")
         await self.stop()  # ← ここを修正！
 
@@ -87,6 +104,7 @@ class ChatCollector(commands.Bot):
                         await self.save_and_close()
                         break
                     else:
+                        self.flush()
                         print(f"📡 {self.channel_name} 配信中... コメント収集中")
                 await asyncio.sleep(CHECK_INTERVAL_SECONDS)
 
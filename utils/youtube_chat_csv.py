@@ -1,6 +1,6 @@
 import time
 import pandas as pd
-from datetime import timedelta
+from datetime import datetime, timedelta
 from googleapiclient.discovery import build
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import os
@@ -20,9 +20,25 @@ os.makedirs(SAVE_DIR, exist_ok=True)
 def sanitize_filename(text):
     return re.sub(r'[\\/*?:"<>|]', '_', text)
 
+def rotate_chat_log(file_name):
+    """収集開始時に同名の既存ログを退避（前回の配信に追記して1本の配信として扱われないように）"""
+    if os.path.exists(file_name):
+        stamp = datetime.fromtimestamp(os.path.getmtime(file_name)).strftime("%Y%m%d_%H%M%S")
+        rotated = file_name.replace(".csv", f"_{stamp}.csv")
+        os.replace(file_name, rotated)
+        print(f"📦 既存のログを退避しました: {rotated}")
+
+def append_chat_rows(rows, file_name):
+    """取得分をCSVに追記（配信中に event_comparison.py --live が読めるように）"""
+    if not rows:
+        return
+    df = pd.DataFrame(rows, columns=["timestamp", "author", "authorChannelId", "message"])
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    df.to_csv(file_name, mode="a", header=not os.path.exists(file_name), index=False)
+
 def collect_chat_until_end(video_id):
     youtube = build("youtube", "v3", developerKey=API_KEY)
-    chat_data = []
+    n_saved = 0
 
     try:
         video_response = youtube.videos().list(
@@ -41,6 +57,7 @@ def collect_chat_until_end(video_id):
             return
 
         file_name = f"{SAVE_DIR}/{title_clean}_chat_log.csv"
+        rotate_chat_log(file_name)
 
         print(f"🔁 チャット収集開始: {video_id}（{title}）")
 
@@ -53,6 +70,7 @@ def collect_chat_until_end(video_id):
                 ).execute()
 
                 items = response.get("items", [])
+                chat_data = []
                 for item in items:
                     snippet = item.get("snippet", {})
                     author_info = item.get("authorDetails", {})
@@ -68,6 +86,8 @@ def collect_chat_until_end(video_id):
                             "message": message
                         })
 
+                append_chat_rows(chat_data, file_name)
+                n_saved += len(chat_data)
                 print(f"[{video_id}] ✅ {len(items)}件取得")
                 time.sleep(INTERVAL_SECONDS)
 
@@ -79,10 +99,7 @@ def collect_chat_until_end(video_id):
                     print(f"⚠️ {video_id} エラー: {e}")
                     time.sleep(10)
 
-        df = pd.DataFrame(chat_data)
-        df["timestamp"] = pd.to_datetime(df["timestamp"])
-        df.to_csv(file_name, index=False)
-        print(f"💾 保存完了: {file_name}")
+        print(f"💾 保存完了: {file_name}（{n_saved}件）")
 
     except Exception as e:
         print(f"❌ 初期処理失敗 ({video_id}): {e}")